@@ -0,0 +1,132 @@
+"""
+Benchmark de la construcción de filas, el cálculo de descuentos y el renderizado de mensajes.
+
+Compara el camino anterior, fila por fila (`get_discount` por producto, `iterrows()` y
+`get_template('message.html')` dentro del ciclo), con el camino vectorizado de `core.pipeline`
+sobre un DataFrame sintético de productos.
+
+Ejecución:
+    python benchmarks/bench_pipeline.py --products 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import jinja2
+import numpy as np
+import pandas as pd
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+from core.pipeline import build_product_frame, get_empty_raw_dict, render_messages, select_discounts
+
+
+def get_synthetic_products(size:int, seed:int=0):
+    """
+    Genera productos sintéticos con los campos crudos de la extracción.
+    Parámetros:
+    size (int): La cantidad de productos.
+    seed (int): La semilla del generador aleatorio.
+    Devuelve:
+    list: Una lista de diccionarios de productos.
+    """
+    rng = np.random.default_rng(seed)
+    price_list = np.round(rng.uniform(100, 20000, size), 2)
+    has_list = rng.random(size) < 0.6
+    price = np.round(price_list * rng.uniform(0.3, 1.0, size), 2)
+    price[rng.random(size) < 0.05] = 0.0
+    types = rng.choice(['standard', 'sponsored', 'featured'], size)
+    return [
+        {
+            'code': f'B0{i:08d}',
+            'name': f'Producto sintetico {i}',
+            'type': types[i],
+            'price': float(price[i]),
+            'price_list': float(price_list[i]) if has_list[i] else 0.0,
+            'link': f'https://www.amazon.com.mx/dp/B0{i:08d}/',
+        }
+        for i in range(size)
+    ]
+
+
+def get_discount(price_list:float, price:float):
+    product_discount_rate = 0
+    if price_list > 0.00:
+        discount_amount = price_list - price
+        product_discount_rate = round((discount_amount / price_list) * 100)
+    return product_discount_rate
+
+
+def legacy_pipeline(products:list, jinja_env, discount_rate:int):
+    """
+    Camino anterior: descuento por fila, `iterrows()` y plantilla cargada dentro del ciclo.
+    El filtro de enviados basado en máscaras por fila (O(n²)) no se incluye.
+    """
+    product_dict = {key: [] for key in ['code', 'name', 'price', 'price_list', 'discount', 'link', 'short_link', 'type', 'page', 'sended']}
+    for product in products:
+        product_type = product['type']
+        if product['price'] == 0.00:
+            product_type = 'other'
+        product_dict['code'].append(product['code'])
+        product_dict['name'].append(product['name'])
+        product_dict['price_list'].append(product['price_list'])
+        product_dict['price'].append(product['price'])
+        product_dict['discount'].append(get_discount(product['price_list'], product['price']))
+        product_dict['type'].append(product_type)
+        product_dict['link'].append(product['link'])
+        product_dict['short_link'].append('')
+        product_dict['page'].append(1)
+        product_dict['sended'].append(False)
+    df = pd.DataFrame(product_dict)
+    discount_df = df[df['discount'] >= discount_rate].drop_duplicates(subset=['code'])
+    messages = []
+    for i, row in discount_df.iterrows():
+        template = jinja_env.get_template('message.html')
+        messages.append(template.render(product_name=row['name'], price=row.price, discount=row.discount, link=row.link))
+    return df, messages
+
+
+def vectorized_pipeline(products:list, template, discount_rate:int):
+    """
+    Camino vectorizado: columnas crudas, descuento y tipo en una pasada y renderizado en lote.
+    """
+    raw_dict = get_empty_raw_dict()
+    for product in products:
+        for key in ('code', 'name', 'type', 'price', 'price_list', 'link'):
+            raw_dict[key].append(product[key])
+        raw_dict['page'].append(1)
+    df = build_product_frame(raw_dict)
+    discount_df = select_discounts(df, discount_rate)
+    return df, render_messages(template, discount_df)
+
+
+def measure(func, *args):
+    startt = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - startt, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--discount-rate', type=int, default=40)
+    args = parser.parse_args()
+
+    jinja_env = jinja2.Environment(loader=jinja2.FileSystemLoader(os.path.join(BASE_PATH, 'template')))
+    products = get_synthetic_products(args.products)
+
+    legacy_time, (legacy_df, legacy_messages) = measure(legacy_pipeline, products, jinja_env, args.discount_rate)
+    template = jinja_env.get_template('message.html')
+    vector_time, (vector_df, vector_messages) = measure(vectorized_pipeline, products, template, args.discount_rate)
+
+    assert (legacy_df['discount'].to_numpy() == vector_df['discount'].to_numpy()).all()
+    assert (legacy_df['type'].to_numpy() == vector_df['type'].to_numpy()).all()
+    assert legacy_messages == vector_messages
+
+    print(f'Productos: {args.products} ({len(vector_messages)} con descuento >= {args.discount_rate}%)')
+    print(f'Fila por fila: {legacy_time:.3f}s')
+    print(f'Vectorizado:   {vector_time:.3f}s')
+    print(f'Aceleración:   {legacy_time / vector_time:.1f}x')
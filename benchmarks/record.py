@@ -0,0 +1,164 @@
+"""
+Graba fixtures para el benchmark offline (`benchmarks/run_benchmarks.py`).
+
+Descarga páginas de resultados de búsqueda de Amazon y respuestas de las APIs de Telegram y Bitly
+y las guarda en `benchmarks/fixtures`. Requiere acceso a la red y, para las APIs, las variables
+de entorno de `.env/.env`. Con `--synthetic` genera en su lugar una página de resultados sintética
+con el mismo marcado que Amazon, útil cuando no se puede acceder al sitio.
+
+Ejecución:
+    python benchmarks/record.py --search "audifonos" --pages 2
+    python benchmarks/record.py --telegram-chat -1001234567890 --bitly
+    python benchmarks/record.py --synthetic 60
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_PATH = os.path.join(BASE_PATH, 'benchmarks', 'fixtures')
+sys.path.insert(0, BASE_PATH)
+
+
+def write_fixture(filename:str, content):
+    """
+    Guarda un fixture en la carpeta de fixtures.
+    Parámetros:
+    filename (str): El nombre del archivo.
+    content: El contenido (str para HTML, dict para JSON).
+    """
+    os.makedirs(FIXTURES_PATH, exist_ok=True)
+    filepath = os.path.join(FIXTURES_PATH, filename)
+    with open(filepath, 'w', encoding='utf-8') as fixture_file:
+        if isinstance(content, str):
+            fixture_file.write(content)
+        else:
+            json.dump(content, fixture_file, indent=4, ensure_ascii=False)
+    print(f'Fixture guardado: {filepath}')
+
+
+def get_synthetic_tile(i:int, rng:random.Random):
+    """
+    Genera el HTML de un resultado de búsqueda con el marcado de Amazon.
+    Parámetros:
+    i (int): El índice del producto.
+    rng (random.Random): El generador aleatorio.
+    Devuelve:
+    str: El HTML del resultado.
+    """
+    code = f'B0SYN{i:05d}'
+    kind = rng.choices(['standard', 'sponsored', 'featured', 'no_price', 'no_list'], [50, 15, 10, 10, 15])[0]
+    price_list = round(rng.uniform(200, 15000), 2)
+    price = round(price_list * rng.uniform(0.35, 0.95), 2)
+    badge = ''
+    if kind == 'sponsored':
+        badge = '<div class="a-row a-spacing-micro"><span class="a-color-secondary">Patrocinado</span></div>'
+    elif kind == 'featured':
+        badge = '<div class="a-row a-spacing-micro"><span class="a-size-micro a-color-secondary">Destacado de Amazon</span></div>'
+    prices = ''
+    if kind != 'no_price':
+        prices = (
+            f'<span class="a-price" data-a-size="xl"><span class="a-offscreen">${price:,.2f}</span>'
+            f'<span aria-hidden="true"><span class="a-price-symbol">$</span><span class="a-price-whole">{int(price):,}</span></span></span>'
+        )
+        if kind != 'no_list':
+            prices += (
+                f'<span class="a-price a-text-price" data-a-strike="true"><span class="a-offscreen">${price_list:,.2f}</span>'
+                f'<span aria-hidden="true">${price_list:,.2f}</span></span>'
+            )
+    else:
+        prices = '<div class="a-row a-size-base a-color-secondary"><span>Ver opciones de compra</span></div>'
+    return f'''
+<div data-asin="{code}" data-index="{i}" data-component-type="s-search-result" class="sg-col-4-of-24 s-result-item s-asin">
+  <div class="sg-col-inner"><div class="s-widget-container s-spacing-small s-widget-container-height-small">
+    <div class="puis-card-container s-card-container"><div class="a-section a-spacing-base">
+      <div class="s-product-image-container"><span class="rush-component"><a class="a-link-normal s-no-outline" href="/Producto-Sintetico-{i}/dp/{code}/ref=sr_1_{i}?keywords=bench&amp;qid=1&amp;sr=8-{i}">
+        <div class="a-section aok-relative s-image-square-aspect"><img class="s-image" src="https://m.media-amazon.com/images/I/{code}.jpg" alt="Producto {i}"/></div></a></span></div>
+      <div class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small">
+        {badge}
+        <div class="a-section a-spacing-none a-spacing-top-small s-title-instructions-style">
+          <h2 class="a-size-mini a-spacing-none a-color-base s-line-clamp-4"><a class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal" href="/Producto-Sintetico-{i}/dp/{code}/ref=sr_1_{i}?keywords=bench&amp;qid=1&amp;sr=8-{i}"><span class="a-size-base-plus a-color-base a-text-normal">Producto sintético {i} con nombre largo de prueba</span></a></h2>
+        </div>
+        <div class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-small"><span aria-label="4.5 de 5 estrellas"><i class="a-icon a-icon-star-small a-star-small-4-5"><span class="a-icon-alt">4.5 de 5 estrellas</span></i></span><span aria-label="{rng.randint(1, 9000)}"><span class="a-size-base s-underline-text">{rng.randint(1, 9000)}</span></span></div></div>
+        <div class="a-section a-spacing-none a-spacing-top-small s-price-instructions-style"><div class="a-row a-size-base a-color-base">{prices}</div></div>
+        <div class="a-row a-size-base a-color-secondary s-align-children-center"><span class="a-size-small a-color-base">Envío GRATIS</span></div>
+      </div>
+    </div></div>
+  </div></div>
+</div>'''
+
+
+def get_synthetic_page(size:int, page:int=1, seed:int=0):
+    """
+    Genera una página de resultados de búsqueda sintética.
+    Parámetros:
+    size (int): La cantidad de resultados.
+    page (int): El número de página.
+    seed (int): La semilla del generador aleatorio.
+    Devuelve:
+    str: El HTML de la página.
+    """
+    rng = random.Random(seed + page)
+    tiles = ''.join(get_synthetic_tile((page - 1) * size + i + 1, rng) for i in range(size))
+    return f'''<!doctype html>
+<html lang="es-mx"><head><meta charset="utf-8"><title>Amazon.com.mx : bench</title></head>
+<body><div id="search"><div class="s-desktop-width-max s-desktop-content s-opposite-dir sg-row">
+<div class="s-main-slot s-result-list s-search-results sg-row">{tiles}
+</div>
+<span class="s-pagination-strip"><span class="s-pagination-item s-pagination-selected" aria-label="Página actual, página {page}">{page}</span><a href="/s?k=bench&amp;page={page + 1}" class="s-pagination-item s-pagination-button">{page + 1}</a><a href="/s?k=bench&amp;page={page + 1}" class="s-pagination-item s-pagination-next s-pagination-button s-pagination-separator">Siguiente</a></span>
+</div></div></body></html>
+'''
+
+
+def record_search(search_val:str, pages:int):
+    from core.scraping import Amazonscraping
+    scraper = Amazonscraping()
+    for page in range(1, pages + 1):
+        html = scraper.http_fetcher.get(scraper.get_search_url(search_val, page))
+        if html is None:
+            print(f'No se pudo descargar la página {page}')
+            continue
+        write_fixture(f'search_page_{page}.html', html)
+
+
+def record_telegram(chat_id:str):
+    from core.telegram import TelegramBot
+    tlg_bot = TelegramBot()
+    status_code, data = tlg_bot.send_message(chat_id, 'Mensaje de prueba del benchmark')
+    write_fixture('telegram_send_message.json', data)
+
+
+def record_bitly():
+    import requests
+    bitly_token = os.getenv('BITLY_TOKEN')
+    bitly_group = os.getenv('BITLY_GROUP')
+    bitly_domain = os.getenv('BITLY_DOMAIN')
+    res = requests.post(
+        f'{bitly_domain}/v4/bitlinks',
+        json={'group_guid': bitly_group, 'domain': 'bit.ly', 'long_url': 'https://www.amazon.com.mx/dp/B000000000/'},
+        headers={'Authorization': f'Bearer {bitly_token}'},
+    )
+    write_fixture('bitly_shorten.json', res.json())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--search', help='Valor de búsqueda a grabar')
+    parser.add_argument('--pages', type=int, default=1, help='Cantidad de páginas a grabar')
+    parser.add_argument('--telegram-chat', help='ID de chat al que enviar un mensaje de prueba')
+    parser.add_argument('--bitly', action='store_true', help='Grabar la respuesta de acortar un link')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Generar páginas sintéticas de N resultados')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        for page in range(1, args.pages + 1):
+            write_fixture(f'search_page_{page}.html', get_synthetic_page(args.synthetic, page))
+    if args.search:
+        record_search(args.search, args.pages)
+    if args.telegram_chat:
+        record_telegram(args.telegram_chat)
+    if args.bitly:
+        record_bitly()
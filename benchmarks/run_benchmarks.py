@@ -0,0 +1,361 @@
+"""
+Benchmark offline del scraper con fixtures grabados.
+
+Reproduce las páginas de resultados y las respuestas de Telegram/Bitly de `benchmarks/fixtures`
+a través de `Amazonscraping.get_product_data`, `get_product_df`, `process_discount`,
+`ShortLinkService.shorten_many` y `TelegramBot.send_message`, usando un servidor HTTP local en lugar de Amazon, Telegram y Bitly.
+No requiere acceso a la red.
+
+Por cada etapa se reporta el tiempo, los elementos por segundo y el pico de memoria. Si se
+indica una línea base (`benchmarks/baseline.json` por defecto), el proceso termina con código 1
+cuando alguna etapa es más lenta que la línea base por encima del umbral `--max-regression`.
+
+Ejecución:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --repeat 5 --max-regression 0.3
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_PATH = os.path.join(BASE_PATH, 'benchmarks', 'fixtures')
+BASELINE_PATH = os.path.join(BASE_PATH, 'benchmarks', 'baseline.json')
+# Descargas por página y repetición de la etapa http_fetch, para que su medición sea estable
+HTTP_FETCH_ROUNDS = 25
+# Mensajes por repetición de la etapa send_message
+SEND_MESSAGE_COUNT = 200
+sys.path.insert(0, BASE_PATH)
+
+from selenium.common.exceptions import NoSuchElementException
+
+
+def read_fixture(filename:str):
+    with open(os.path.join(FIXTURES_PATH, filename), 'r', encoding='utf-8') as fixture_file:
+        return fixture_file.read()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Servidor local que reemplaza a Amazon (GET /s), Telegram (POST /bot<token>/<method>)
+    y Bitly (POST /v4/bitlinks) con las respuestas grabadas.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    pages = []
+    telegram_response = b''
+    bitly_response = b''
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status:int, body:bytes, content_type:str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/s' or not self.pages:
+            return self.reply(404, b'', 'text/plain')
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        self.reply(200, self.pages[(page - 1) % len(self.pages)], 'text/html; charset=utf-8')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.startswith('/bot'):
+            return self.reply(200, self.telegram_response, 'application/json')
+        if self.path.startswith('/v4/bitlinks'):
+            return self.reply(200, self.bitly_response, 'application/json')
+        self.reply(404, b'', 'text/plain')
+
+
+class FixtureDriver():
+    """
+    Sustituto del WebDriver que expone el HTML de una página grabada en `page_source`.
+    """
+
+    def __init__(self, page_source:str):
+        self.page_source = page_source
+
+    def get(self, url:str):
+        pass
+
+    def find_element(self, by, value):
+        raise NoSuchElementException(f'{by}={value}')
+
+    def find_elements(self, by, value):
+        return []
+
+    def quit(self):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_stub_server(pages:list):
+    StubHandler.pages = [page.encode('utf-8') for page in pages]
+    StubHandler.telegram_response = read_fixture('telegram_send_message.json').encode('utf-8')
+    StubHandler.bitly_response = read_fixture('bitly_shorten.json').encode('utf-8')
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class BenchmarkRunner():
+    """
+    Clase que ejecuta las etapas del benchmark y mide su rendimiento.
+
+    Atributos:
+    repeat (int): La cantidad de repeticiones de cada etapa.
+    results (dict): Los resultados por etapa.
+    """
+
+    def __init__(self, repeat:int, workdir:str, base_url:str):
+        from core.scraping import Amazonscraping
+
+        self.repeat = repeat
+        self.workdir = workdir
+        self.base_url = base_url
+        self.results = {}
+        self.pages = [read_fixture(os.path.basename(path)) for path in sorted(glob.glob(os.path.join(FIXTURES_PATH, 'search_page_*.html')))]
+        self.chat_group_ids = {'-1001000000001': {}, '-1001000000002': {}}
+        self.scraper = Amazonscraping({
+            'download_df': True,
+            'discount_rate': 40,
+            'pagination_level': 1,
+            'parser_backend': 'html',
+            'tag_associates': '',
+            'history_filter': False,
+            # Todos los archivos persistentes se crean en la carpeta temporal, nunca en `data/`
+            'sent_index_path': os.path.join(workdir, 'sent_deals.db'),
+            'price_history_path': os.path.join(workdir, 'price_history.db'),
+            'fingerprint_path': os.path.join(workdir, 'fingerprints.db'),
+            'checkpoint_path': os.path.join(workdir, 'checkpoint.db'),
+            'short_link_cache_path': os.path.join(workdir, 'short_links.db'),
+            'enrichment_cache_path': os.path.join(workdir, 'product_details.db'),
+            'queue_path': os.path.join(workdir, 'work_queue.db'),
+            'output_path': os.path.join(workdir, 'results', 'parquet'),
+            'metrics_json_path': os.path.join(workdir, 'metrics.json'),
+            'metrics_prometheus_path': os.path.join(workdir, 'metrics.prom'),
+            'browser': {'user_data_dir': os.path.join(workdir, 'browser_profiles')},
+            'short_link_backend': '',
+            'enrichment_enabled': False,
+            'identities': [],
+            'telegram_rate_limits': {'global_per_second': 100000, 'chat_per_second': 100000, 'group_per_minute': 6000000},
+        })
+        self.scraper.url = f'{base_url}/s?k='
+        self.scraper.telegram_bot.get_chat_group_ids = lambda: self.chat_group_ids
+
+    def measure(self, name:str, func, items_func):
+        """
+        Mide una etapa: el tiempo sobre `repeat` repeticiones y el pico de memoria de una ejecución.
+        Los elementos por segundo se calculan con la repetición más rápida (como `timeit`), que es
+        la medición menos afectada por la carga del equipo.
+        Parámetros:
+        name (str): El nombre de la etapa.
+        func (function): La función de la etapa, que devuelve su resultado.
+        items_func (function): Función que calcula la cantidad de elementos procesados a partir del resultado.
+        Devuelve:
+        El resultado de la última ejecución.
+        """
+        items = 0
+        best = None
+        startt = time.perf_counter()
+        for _ in range(self.repeat):
+            repeat_startt = time.perf_counter()
+            result = func()
+            repeat_elapsed = time.perf_counter() - repeat_startt
+            repeat_items = items_func(result)
+            items += repeat_items
+            if repeat_elapsed and (best is None or repeat_items / repeat_elapsed > best):
+                best = repeat_items / repeat_elapsed
+        elapsed = time.perf_counter() - startt
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results[name] = {
+            'seconds': round(elapsed, 4),
+            'items': items,
+            'items_per_sec': round(best or 0.0, 2),
+            'peak_mb': round(peak / 1024 / 1024, 3),
+        }
+        return result
+
+    def run(self):
+        scraper = self.scraper
+
+        # Descarga HTTP de las páginas de resultados desde el servidor local
+        def http_fetch():
+            return [
+                scraper.http_fetcher.get(scraper.get_search_url('bench', page))
+                for _ in range(HTTP_FETCH_ROUNDS)
+                for page in range(1, len(self.pages) + 1)
+            ]
+        self.measure('http_fetch', http_fetch, lambda pages: len([page for page in pages if page]))
+
+        # Extracción de los productos
+        def get_product_data():
+            product_dicts = [scraper.get_product_data(FixtureDriver(page)) for page in self.pages]
+            return {key: [value for product_dict in product_dicts for value in product_dict[key]] for key in product_dicts[0]}
+        product_dict = self.measure('get_product_data', get_product_data, lambda result: len(result['code']))
+
+        # Construcción del DataFrame y escritura del CSV
+        df = self.measure(
+            'get_product_df',
+            lambda: scraper.get_product_df(product_dict, 'bench_products.csv'),
+            lambda result: len(result),
+        )
+
+        # Procesamiento de descuentos y envío de mensajes (con un índice de enviados vacío)
+        def process_discount():
+            scraper.sent_index.conn.execute('DELETE FROM sent_deals')
+            scraper.sent_index.conn.commit()
+            scraper.sent_index.sent = {}
+            return scraper.process_discount(df, 'bench_products.csv')
+        self.measure('process_discount', process_discount, lambda results: len([result for result in results if result.ok]))
+
+        # Links cortos con la API de Bitly, sin caché previo
+        from core.shortlink import BitlyBackend, ShortLinkCache, ShortLinkService
+        service = ShortLinkService(
+            BitlyBackend('bench', api_domain=self.base_url, pool_size=4),
+            ShortLinkCache(os.path.join(self.workdir, 'short_links.db')),
+            max_workers=4,
+            rate_per_second=100000,
+        )
+        items = [(code, link, name) for code, link, name in zip(df['code'], df['link'], df['name'])]
+        def short_links():
+            service.cache.links = {}
+            return service.shorten_many(items)[0]
+        self.measure('short_links', short_links, lambda links: len(links))
+        service.close()
+
+        # Envío directo de mensajes de Telegram
+        def send_message():
+            return [scraper.telegram_bot.send_message('-1001000000001', 'Mensaje de benchmark', 'html') for _ in range(SEND_MESSAGE_COUNT)]
+        self.measure('send_message', send_message, lambda results: len([status for status, data in results if status == 200]))
+
+        return self.results
+
+    def close(self):
+        self.scraper.delivery_queue.close()
+        self.scraper.http_fetcher.close()
+
+
+def run_benchmark(repeat:int):
+    """
+    Ejecuta el benchmark completo en una carpeta temporal con el servidor local de fixtures.
+    Parámetros:
+    repeat (int): La cantidad de repeticiones de cada etapa.
+    Devuelve:
+    dict: Los resultados por etapa.
+    """
+    workdir = tempfile.mkdtemp(prefix='amazon_bench_')
+    os.makedirs(os.path.join(workdir, 'results'), exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    pages = [read_fixture(os.path.basename(path)) for path in sorted(glob.glob(os.path.join(FIXTURES_PATH, 'search_page_*.html')))]
+    server = start_stub_server(pages)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    os.environ['TELEGRAM_DOMAIN'] = f'{base_url}/bot'
+    os.environ['TELEGRAM_TOKEN'] = 'bench'
+    os.environ['BITLY_DOMAIN'] = base_url
+
+    try:
+        runner = BenchmarkRunner(repeat, workdir, base_url)
+        results = runner.run()
+        runner.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_baseline(results:dict, baseline:dict, max_regression:float):
+    """
+    Compara los resultados con la línea base.
+    Parámetros:
+    results (dict): Los resultados por etapa.
+    baseline (dict): La línea base por etapa.
+    max_regression (float): La pérdida máxima de elementos por segundo permitida (0.3 = 30%).
+    Devuelve:
+    list: Las etapas con regresión, como tuplas (etapa, actual, línea base).
+    """
+    regressions = []
+    for stage, data in results.items():
+        expected = baseline.get(stage, {}).get('items_per_sec')
+        if expected and data['items_per_sec'] < expected * (1 - max_regression):
+            regressions.append((stage, data['items_per_sec'], expected))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones de cada etapa')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Archivo JSON de la línea base')
+    parser.add_argument('--max-regression', type=float, default=0.3, help='Pérdida de rendimiento máxima permitida (0.3 = 30%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Guardar los resultados como nueva línea base')
+    parser.add_argument('--baseline-runs', type=int, default=3,
+                        help='Corridas con --update-baseline; se guarda la más lenta de cada etapa')
+    parser.add_argument('--json', help='Guardar los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(handlers=[logging.NullHandler()], level=logging.CRITICAL)
+
+    results = run_benchmark(args.repeat)
+    if args.update_baseline:
+        # La línea base es la corrida más lenta de cada etapa, para que la variación normal del
+        # equipo no supere el umbral de regresión
+        for _ in range(args.baseline_runs - 1):
+            run_results = run_benchmark(args.repeat)
+            for stage, data in run_results.items():
+                if data['items_per_sec'] < results[stage]['items_per_sec']:
+                    results[stage] = data
+
+    print(f'{"Etapa":<20}{"Tiempo (s)":>12}{"Elementos":>12}{"Elem/s":>14}{"Pico (MB)":>12}')
+    for stage, data in results.items():
+        print(f'{stage:<20}{data["seconds"]:>12}{data["items"]:>12}{data["items_per_sec"]:>14}{data["peak_mb"]:>12}')
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(results, json_file, indent=4)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=4)
+        print(f'Línea base actualizada: {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_baseline(results, baseline, args.max_regression)
+        for stage, current, expected in regressions:
+            print(f'REGRESION en {stage}: {current} elem/s (línea base {expected} elem/s)')
+        if regressions:
+            sys.exit(1)
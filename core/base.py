@@ -1,25 +1,71 @@
 import os
-import json
 import jinja2
 
+from core.config import CONFIG
+
 BASE_PATH = os.path.dirname(os.path.abspath(__file__)).replace('/core', '')
 
 
+class Param():
+    """
+    Descriptor de un parámetro ajustable. Se lee de la configuración en cada acceso, de modo que
+    refleja los cambios de `config.json` que recarga el servicio de configuración, salvo que el
+    parámetro se haya fijado en el constructor o se asigne a la instancia.
+
+    Atributos:
+    name (str): El nombre del parámetro en `params`.
+    default: El valor por defecto si el parámetro no está configurado.
+    """
+
+
+    def __init__(self, name:str, default=None):
+        self.name = name
+        self.default = default
+
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.name in instance.param_overrides:
+            return instance.param_overrides[self.name]
+        return CONFIG.get_params().get(self.name, self.default)
+
+
+    def __set__(self, instance, value):
+        instance.param_overrides[self.name] = value
+        instance.params_cache = None
+
+
 class Base():
 
-    def __init__(self):
-        self.jinja_env = jinja2.Environment(loader=jinja2.FileSystemLoader('template/'))
-        config = self.get_config()
-        params = config['params']
-        self.params = params
+    def __init__(self, params:dict=None):
+        self.jinja_env = jinja2.Environment(loader=jinja2.FileSystemLoader(f'{BASE_PATH}/template/'))
+        self.param_overrides = dict(params or {})
+        self.params_cache = None
+
+
+    @property
+    def params(self):
+        """
+        Obtiene los parámetros vigentes: los de la configuración (recargada si el archivo cambia)
+        con los del constructor por encima. La combinación se guarda y se rehace solo cuando la
+        configuración se recarga o cambia un parámetro fijado. El diccionario devuelto es
+        compartido y no se debe modificar.
+        Returns:
+            dict: Un diccionario con los parámetros.
+        """
+        config_params = self.get_config()['params']
+        # La configuración recargada es un diccionario nuevo: basta comparar la identidad
+        if self.params_cache is None or self.params_cache[0] is not config_params:
+            self.params_cache = (config_params, {**config_params, **self.param_overrides})
+        return self.params_cache[1]
 
 
     def get_config(self):
         """
-        Lee y carga la configuración desde el archivo 'config.json'.
+        Obtiene la configuración del archivo 'config.json' desde el servicio de configuración
+        compartido, que la lee una sola vez y la recarga solo si el archivo cambia.
         Returns:
             dict: Un diccionario que contiene los datos de configuración.
         """
-        with open(f'{BASE_PATH}/config.json', 'r') as config_file:
-            data = json.loads(config_file.read())
-        return data
\ No newline at end of file
+        return CONFIG.get()
@@ -0,0 +1,290 @@
+import glob
+import logging
+import os
+import threading
+
+from selenium import webdriver
+
+from core.metrics import METRICS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Patrones de URL bloqueados por tipo de recurso (Network.setBlockedURLs de Chrome DevTools)
+BLOCKED_RESOURCE_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'stylesheet': ['*.css'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.mp3'],
+}
+
+
+def is_process_alive(pid:int):
+    """
+    Indica si un proceso del equipo sigue en ejecución.
+    Parámetros:
+    pid (int): El identificador del proceso.
+    Devuelve:
+    bool: True si el proceso existe.
+    """
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class BrowserFactory():
+    """
+    Clase que crea sesiones de Chrome ajustadas para el scraping a partir de la configuración:
+    sin interfaz gráfica, con una ventana fija y pequeña, sin extensiones y sin descargar imágenes,
+    hojas de estilo, fuentes ni multimedia, para abrir más sesiones simultáneas por equipo.
+
+    Cada sesión simultánea usa su propia carpeta de perfil (`<user_data_dir>/session-<pid>-<n>`), de
+    modo que varios procesos del mismo equipo no comparten un perfil. Para conservar las cookies
+    entre ejecuciones, una sesión nueva adopta el perfil del mismo número de sesión de un proceso
+    que ya terminó. Con `psutil` instalado, la fábrica mide la memoria y el tiempo de CPU de cada
+    sesión (chromedriver y los procesos de Chrome).
+
+    Atributos:
+    headless (bool): Indica si el navegador se ejecuta sin interfaz gráfica.
+    window_size (str): El tamaño de la ventana, por ejemplo '1366,768'.
+    blocked_resources (list): Los tipos de recurso que no se descargan ('image', 'stylesheet', 'font', 'media').
+    disable_extensions (bool): Indica si se desactivan las extensiones.
+    user_data_dir (str): La carpeta raíz de los perfiles reutilizados (None usa un perfil temporal).
+    page_load_strategy (str): La estrategia de carga de páginas de Selenium ('normal', 'eager' o 'none').
+    arguments (list): Argumentos adicionales de la línea de comandos de Chrome.
+    """
+
+
+    def __init__(self, headless:bool=True, window_size:str='1366,768', blocked_resources:list=None,
+                 disable_extensions:bool=True, user_data_dir:str=None, page_load_strategy:str='eager',
+                 arguments:list=None):
+        self.headless = headless
+        self.window_size = window_size
+        self.blocked_resources = list(blocked_resources or [])
+        self.disable_extensions = disable_extensions
+        self.user_data_dir = user_data_dir
+        self.page_load_strategy = page_load_strategy
+        self.arguments = list(arguments or [])
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.footprint_warned = False
+        unknown = [resource for resource in self.blocked_resources if resource not in BLOCKED_RESOURCE_PATTERNS]
+        if unknown:
+            raise ValueError(f'Tipos de recurso desconocidos: {unknown}')
+
+
+    @classmethod
+    def from_params(cls, params:dict, base_path:str):
+        """
+        Construye un BrowserFactory a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('browser').
+        base_path (str): La carpeta del proyecto, para resolver la ruta relativa de los perfiles.
+        Devuelve:
+        BrowserFactory: La instancia configurada.
+        """
+        options = params.get('browser', {})
+        user_data_dir = options.get('user_data_dir')
+        return cls(
+            headless=options.get('headless', True),
+            window_size=options.get('window_size', '1366,768'),
+            blocked_resources=options.get('blocked_resources', ['image', 'stylesheet', 'font', 'media']),
+            disable_extensions=options.get('disable_extensions', True),
+            user_data_dir=os.path.join(base_path, user_data_dir) if user_data_dir else None,
+            page_load_strategy=options.get('page_load_strategy', 'eager'),
+            arguments=options.get('arguments', []),
+        )
+
+
+    def get_options(self, profile_dir:str=None, identity=None):
+        """
+        Construye las opciones de Chrome de una sesión.
+        Parámetros:
+        profile_dir (str): La carpeta de perfil de la sesión (opcional).
+        identity (Identity): La identidad de salida (proxy y User-Agent) de la sesión (opcional).
+        Devuelve:
+        webdriver.ChromeOptions: Las opciones de la sesión.
+        """
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument('--headless=new')
+        if self.window_size:
+            options.add_argument(f'--window-size={self.window_size}')
+        if self.disable_extensions:
+            options.add_argument('--disable-extensions')
+        if profile_dir:
+            options.add_argument(f'--user-data-dir={profile_dir}')
+        if 'image' in self.blocked_resources:
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--mute-audio')
+        options.add_argument('--no-first-run')
+        options.add_argument('--no-default-browser-check')
+        if identity is not None and identity.proxy:
+            options.add_argument(f'--proxy-server={identity.proxy}')
+        if identity is not None and identity.user_agent:
+            options.add_argument(f'--user-agent={identity.user_agent}')
+        for argument in self.arguments:
+            options.add_argument(argument)
+        options.page_load_strategy = self.page_load_strategy
+        return options
+
+
+    def get_session_slot(self):
+        """
+        Obtiene el primer número de sesión libre. Las sesiones cuyo proceso de chromedriver terminó
+        se liberan antes de buscar; las que se están iniciando (None) se mantienen reservadas.
+        Devuelve:
+        int: El número de sesión.
+        """
+        for slot, driver in list(self.sessions.items()):
+            if driver is None:
+                continue
+            process = getattr(getattr(driver, 'service', None), 'process', None)
+            if process is None or process.poll() is not None:
+                del self.sessions[slot]
+        slot = 0
+        while slot in self.sessions:
+            slot += 1
+        return slot
+
+
+    def get_profile_dir(self, slot:int):
+        """
+        Obtiene la carpeta de perfil de una sesión de este proceso, adoptando la del mismo número de
+        sesión de un proceso que ya terminó si existe.
+        Parámetros:
+        slot (int): El número de sesión.
+        Devuelve:
+        str: La ruta de la carpeta de perfil.
+        """
+        profile_dir = os.path.join(self.user_data_dir, f'session-{os.getpid()}-{slot}')
+        if not os.path.isdir(profile_dir):
+            for stale_dir in glob.glob(os.path.join(self.user_data_dir, f'session-*-{slot}')):
+                pid = os.path.basename(stale_dir).split('-')[1]
+                if not pid.isdigit() or is_process_alive(int(pid)):
+                    continue
+                try:
+                    # El renombrado es atómico: si otro proceso adoptó el perfil, se prueba el siguiente
+                    os.rename(stale_dir, profile_dir)
+                    break
+                except OSError:
+                    continue
+        os.makedirs(profile_dir, exist_ok=True)
+        return profile_dir
+
+
+    def block_resources(self, driver):
+        """
+        Bloquea la descarga de los tipos de recurso configurados mediante Chrome DevTools, con y sin
+        parámetros en la URL (por ejemplo, `estilos.css?v=2`).
+        Parámetros:
+        driver: La sesión del navegador.
+        """
+        patterns = [
+            pattern + suffix
+            for resource in self.blocked_resources
+            for pattern in BLOCKED_RESOURCE_PATTERNS[resource]
+            for suffix in ('', '?*')
+        ]
+        if not patterns:
+            return
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            logging.warning(f'No se pudieron bloquear los recursos del navegador: {e}')
+
+
+    def create(self, identity=None):
+        """
+        Crea una nueva sesión del navegador.
+        Parámetros:
+        identity (Identity): La identidad de salida de la sesión (opcional).
+        Devuelve:
+        webdriver.Chrome: La sesión del navegador.
+        """
+        with self.lock:
+            slot = self.get_session_slot()
+            # Reserva el número de sesión mientras se inicia el navegador
+            self.sessions[slot] = None
+        profile_dir = None
+        if self.user_data_dir:
+            profile_dir = self.get_profile_dir(slot)
+        try:
+            driver = webdriver.Chrome(options=self.get_options(profile_dir, identity))
+        except Exception:
+            with self.lock:
+                self.sessions.pop(slot, None)
+            raise
+        with self.lock:
+            self.sessions[slot] = driver
+        driver.session_name = f'session-{slot}' if identity is None else f'session-{slot}-{identity.name}'
+        driver.identity = identity
+        self.block_resources(driver)
+        return driver
+
+
+    def get_footprint(self, driver):
+        """
+        Mide los recursos de una sesión: chromedriver y todos los procesos de Chrome que inició.
+        Parámetros:
+        driver: La sesión del navegador.
+        Devuelve:
+        dict: Las llaves 'memory_bytes' (memoria residente), 'cpu_seconds' (tiempo de CPU de
+        usuario y de sistema) y 'processes', o None si no se puede medir (por ejemplo, sin `psutil`).
+        """
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        if psutil is None or process is None:
+            return None
+        try:
+            root = psutil.Process(process.pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        memory_bytes = 0
+        cpu_seconds = 0.0
+        for child in processes:
+            try:
+                memory_bytes += child.memory_info().rss
+                cpu_times = child.cpu_times()
+                cpu_seconds += cpu_times.user + cpu_times.system
+            except psutil.Error:
+                continue
+        return {'memory_bytes': memory_bytes, 'cpu_seconds': round(cpu_seconds, 3), 'processes': len(processes)}
+
+
+    def record_footprint(self, driver):
+        """
+        Registra los recursos de una sesión en las métricas `browser_memory_bytes` y
+        `browser_cpu_seconds`, con la etiqueta `session`.
+        Parámetros:
+        driver: La sesión del navegador.
+        Devuelve:
+        dict: Los recursos medidos o None si no se pueden medir.
+        """
+        if psutil is None:
+            if not self.footprint_warned:
+                self.footprint_warned = True
+                logging.warning('psutil no está instalado: no se registran la memoria ni el CPU del navegador (pip install psutil)')
+            return None
+        footprint = self.get_footprint(driver)
+        if footprint is None:
+            return None
+        session = getattr(driver, 'session_name', 'session')
+        METRICS.set_gauge('browser_memory_bytes', footprint['memory_bytes'], session=session)
+        METRICS.set_gauge('browser_cpu_seconds', footprint['cpu_seconds'], session=session)
+        METRICS.set_gauge('browser_processes', footprint['processes'], session=session)
+        return footprint
@@ -0,0 +1,271 @@
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+
+class RunJournal():
+    """
+    Clase que mantiene el diario persistente (SQLite) de las ejecuciones de `process`, para poder
+    reanudar una ejecución interrumpida (por ejemplo, por una falla del proceso o del navegador).
+
+    El diario registra las unidades de trabajo (búsqueda, filtro y página) terminadas de la ejecución
+    en curso y los mensajes de Telegram pendientes: cada mensaje se registra antes de enviarse y se
+    elimina después de registrarse en el índice de ofertas enviadas. Hay a lo sumo un mensaje
+    pendiente por oferta y chat, con la cantidad de intentos fallidos. Al reanudar, las unidades
+    terminadas se omiten y los mensajes pendientes se envían una sola vez. Una ejecución solo se
+    reanuda mientras no supere una antigüedad y una cantidad de reanudaciones máximas, para que una
+    búsqueda que falla siempre no haga que las ejecuciones siguientes omitan las demás.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    run_id (str): El identificador de la ejecución en curso (None fuera de una ejecución).
+    completed (set): Las unidades terminadas de la ejecución en curso: (search_val, filter, page).
+    """
+
+
+    def __init__(self, db_path:str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.run_id = None
+        self.completed = set()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                resumes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS completed_units (
+                run_id TEXT NOT NULL,
+                search_val TEXT NOT NULL,
+                filter TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                products INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, search_val, filter, page)
+            );
+            CREATE TABLE IF NOT EXISTS pending_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                price REAL,
+                discount INTEGER,
+                message TEXT NOT NULL,
+                parse_mode TEXT,
+                created_at TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            '''
+        )
+        # Diarios creados antes de limitar las reanudaciones y los reintentos
+        with self.conn:
+            if 'resumes' not in {row[1] for row in self.conn.execute('PRAGMA table_info(runs)')}:
+                self.conn.execute('ALTER TABLE runs ADD COLUMN resumes INTEGER NOT NULL DEFAULT 0')
+            if 'attempts' not in {row[1] for row in self.conn.execute('PRAGMA table_info(pending_messages)')}:
+                self.conn.execute('ALTER TABLE pending_messages ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute(
+                    'DELETE FROM pending_messages WHERE id NOT IN (SELECT MAX(id) FROM pending_messages GROUP BY code, chat_id)'
+                )
+            self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_pending_code_chat ON pending_messages (code, chat_id)')
+
+
+    def start_run(self, resume:bool=True, max_age_hours:float=None, max_resumes:int=None):
+        """
+        Inicia una ejecución. Si la última ejecución no terminó y `resume` es True, se reanuda con
+        sus unidades terminadas, salvo que se haya iniciado hace más de `max_age_hours` horas o ya
+        se haya reanudado `max_resumes` veces; de lo contrario, se descarta y se inicia una nueva.
+        Parámetros:
+        resume (bool): Indica si se reanuda la última ejecución sin terminar.
+        max_age_hours (float): La antigüedad máxima de una ejecución que se reanuda (opcional, sin límite).
+        max_resumes (int): La cantidad máxima de reanudaciones de una ejecución (opcional, sin límite).
+        Devuelve:
+        bool: True si se reanudó una ejecución.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT run_id, started_at, resumes FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1'
+            ).fetchone()
+            if row is not None and resume:
+                age = datetime.now() - datetime.fromisoformat(row[1])
+                if max_age_hours is not None and age > timedelta(hours=max_age_hours):
+                    logging.warning(f'La ejecucion interrumpida se inicio hace {age}, se descarta')
+                    resume = False
+                elif max_resumes is not None and row[2] >= max_resumes:
+                    logging.warning(f'La ejecucion interrumpida ya se reanudo {row[2]} veces, se descarta')
+                    resume = False
+            if row is not None and resume:
+                self.run_id = row[0]
+                with self.conn:
+                    self.conn.execute('UPDATE runs SET resumes = resumes + 1 WHERE run_id = ?', (self.run_id,))
+                self.completed = {
+                    (search_val, filter or None, page)
+                    for search_val, filter, page in self.conn.execute(
+                        'SELECT search_val, filter, page FROM completed_units WHERE run_id = ?', (self.run_id,))
+                }
+                return True
+            with self.conn:
+                self.conn.execute('DELETE FROM completed_units')
+                self.conn.execute('DELETE FROM runs WHERE finished_at IS NULL')
+                self.run_id = uuid.uuid4().hex
+                self.completed = set()
+                self.conn.execute(
+                    'INSERT INTO runs (run_id, started_at) VALUES (?, ?)',
+                    (self.run_id, datetime.now().isoformat()),
+                )
+            return False
+
+
+    def is_completed(self, search_val:str, filter:str=None, page:int=None):
+        """
+        Indica si una unidad de trabajo ya se terminó en la ejecución en curso.
+        Parámetros:
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon (opcional).
+        page (int): La página de resultados.
+        Devuelve:
+        bool: True si la unidad ya se terminó.
+        """
+        return (search_val, filter, page) in self.completed
+
+
+    def complete_unit(self, search_val:str, filter:str=None, page:int=None, products:int=0):
+        """
+        Registra una unidad de trabajo terminada en la ejecución en curso.
+        Parámetros:
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon (opcional).
+        page (int): La página de resultados.
+        products (int): La cantidad de productos procesados de la unidad.
+        """
+        if self.run_id is None:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    '''
+                    INSERT OR REPLACE INTO completed_units (run_id, search_val, filter, page, products, completed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ''',
+                    (self.run_id, search_val, filter or '', page, products, datetime.now().isoformat()),
+                )
+            self.completed.add((search_val, filter, page))
+
+
+    def finish_run(self):
+        """
+        Marca la ejecución en curso como terminada y elimina sus unidades registradas.
+        """
+        if self.run_id is None:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute('UPDATE runs SET finished_at = ? WHERE run_id = ?', (datetime.now().isoformat(), self.run_id))
+                self.conn.execute('DELETE FROM completed_units WHERE run_id = ?', (self.run_id,))
+                self.conn.execute('DELETE FROM runs WHERE run_id <> ? AND finished_at IS NOT NULL', (self.run_id,))
+            self.run_id = None
+            self.completed = set()
+
+
+    def add_pending(self, messages:list, records:list):
+        """
+        Registra los mensajes que se van a enviar. Si ya hay un mensaje pendiente de la misma oferta
+        y chat, se reemplaza su contenido y se conservan su identificador y sus intentos.
+        Parámetros:
+        messages (list): Una lista de tuplas (chat_id, message, parse_mode).
+        records (list): Una lista de tuplas (code, chat_id, price, discount), una por mensaje.
+        Devuelve:
+        list: Los identificadores de los mensajes registrados, en el mismo orden.
+        """
+        created_at = datetime.now().isoformat()
+        ids = []
+        with self.lock:
+            with self.conn:
+                for (chat_id, message, parse_mode), (code, _, price, discount) in zip(messages, records):
+                    row = self.conn.execute(
+                        'SELECT id FROM pending_messages WHERE code = ? AND chat_id = ?', (code, str(chat_id))
+                    ).fetchone()
+                    if row is not None:
+                        self.conn.execute(
+                            '''
+                            UPDATE pending_messages SET price = ?, discount = ?, message = ?, parse_mode = ?, created_at = ?
+                            WHERE id = ?
+                            ''',
+                            (price, discount, message, parse_mode, created_at, row[0]),
+                        )
+                        ids.append(row[0])
+                        continue
+                    cursor = self.conn.execute(
+                        '''
+                        INSERT INTO pending_messages (code, chat_id, price, discount, message, parse_mode, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''',
+                        (code, str(chat_id), price, discount, message, parse_mode, created_at),
+                    )
+                    ids.append(cursor.lastrowid)
+        return ids
+
+
+    def get_pending(self):
+        """
+        Obtiene los mensajes pendientes de envío.
+        Devuelve:
+        list: Una lista de tuplas (id, code, chat_id, price, discount, message, parse_mode, created_at).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                '''
+                SELECT id, code, chat_id, price, discount, message, parse_mode, created_at
+                FROM pending_messages ORDER BY id
+                '''
+            ).fetchall()
+        return [row[:7] + (datetime.fromisoformat(row[7]),) for row in rows]
+
+
+    def remove_pending(self, ids:list):
+        """
+        Elimina mensajes pendientes ya procesados.
+        Parámetros:
+        ids (list): Los identificadores de los mensajes.
+        """
+        if not ids:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.executemany('DELETE FROM pending_messages WHERE id = ?', [(message_id,) for message_id in ids])
+
+
+    def record_failures(self, ids:list, max_attempts:int=5):
+        """
+        Registra un intento fallido de los mensajes pendientes indicados y elimina los que llegan a
+        `max_attempts` intentos.
+        Parámetros:
+        ids (list): Los identificadores de los mensajes.
+        max_attempts (int): La cantidad máxima de intentos de un mensaje pendiente.
+        Devuelve:
+        list: Los datos (code, chat_id) de los mensajes descartados.
+        """
+        if not ids:
+            return []
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE pending_messages SET attempts = attempts + 1 WHERE id = ?', [(message_id,) for message_id in set(ids)]
+                )
+                dropped = self.conn.execute(
+                    'SELECT code, chat_id FROM pending_messages WHERE attempts >= ?', (max_attempts,)
+                ).fetchall()
+                self.conn.execute('DELETE FROM pending_messages WHERE attempts >= ?', (max_attempts,))
+        return dropped
+
+
+    def close(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        self.conn.close()
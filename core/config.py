@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from core.utils import write_atomic
+
+NUMBER = (int, float)
+
+# Tipos esperados de cada parámetro de `params`. Los parámetros desconocidos se aceptan sin validar.
+CONFIG_SCHEMA = {
+    'discount_rate': NUMBER,
+    'search_values': list,
+    'use_amazon_filters': bool,
+    'amazon_filters': dict,
+    'pagination_level': int,
+    'download_df': bool,
+    'chat_ids': dict,
+    'chat_group_ids': dict,
+    'alert_chat_ids': dict,
+    'tag_associates': (str, bool),
+    'parser_backend': str,
+    'max_workers': int,
+    'fetch_mode': str,
+    'http_headers': dict,
+    'http_retries': int,
+    'http_backoff': NUMBER,
+    'http_timeout': NUMBER,
+    'wait_timeouts': dict,
+    'navigation': str,
+    'page_workers': int,
+    'telegram_workers': int,
+    'telegram_retries': int,
+    'telegram_backoff': NUMBER,
+    'telegram_rate_limits': dict,
+    'sent_index_path': str,
+    'realert_price_drop': NUMBER,
+    'realert_after_days': NUMBER,
+    'use_price_history': bool,
+    'price_history_path': str,
+    'history_filter': bool,
+    'history_max_ratio': NUMBER,
+    'history_min_samples': int,
+    'metrics_json_path': str,
+    'metrics_prometheus_path': str,
+    'schedule': dict,
+    'schedule_jitter': NUMBER,
+    'schedule_max_concurrency': int,
+    'incremental': bool,
+    'fingerprint_path': str,
+    'fingerprint_ttl_hours': NUMBER,
+    'short_link_backend': str,
+    'short_link_cache_path': str,
+    'short_link_workers': int,
+    'short_link_rate_per_second': NUMBER,
+    'short_link_retries': int,
+    'enrichment_enabled': bool,
+    'enrichment_workers': int,
+    'enrichment_cache_path': str,
+    'enrichment_ttl_hours': NUMBER,
+    'consolidate_run': bool,
+    'output_format': str,
+    'output_path': str,
+    'output_compression': str,
+    'resume_runs': bool,
+    'resume_max_age_hours': NUMBER,
+    'resume_max_attempts': int,
+    'checkpoint_path': str,
+    'pending_max_attempts': int,
+    'browser': dict,
+    'queue_backend': str,
+    'queue_url': str,
+    'queue_path': str,
+    'queue_lease_seconds': NUMBER,
+    'queue_max_attempts': int,
+    'queue_poll_interval': NUMBER,
+    'queue_idle_timeout': NUMBER,
+    'queue_run_timeout': NUMBER,
+    'queue_timeout': NUMBER,
+    'throttle': dict,
+    'identities': list,
+    'identity_pool': dict,
+}
+
+CONFIG_CHOICES = {
+    'parser_backend': ('html', 'selenium', 'elements'),
+    'fetch_mode': ('selenium', 'http'),
+    'navigation': ('url', 'click'),
+    'short_link_backend': ('', 'bitly', 'stub'),
+    'output_format': ('csv', 'parquet'),
+    'queue_backend': ('sqlite', 'redis'),
+}
+
+
+class ConfigError(ValueError):
+    """
+    Error de validación del archivo de configuración.
+    """
+
+
+def validate_config(config:dict):
+    """
+    Valida la estructura del archivo de configuración y los tipos de sus parámetros.
+    Parámetros:
+    config (dict): Los datos de configuración.
+    Lanza:
+    ConfigError: Si la configuración no es válida.
+    """
+    if not isinstance(config, dict) or not isinstance(config.get('params'), dict):
+        raise ConfigError('La configuración debe contener el diccionario "params"')
+    errors = []
+    for key, value in config['params'].items():
+        expected = CONFIG_SCHEMA.get(key)
+        if expected is None:
+            continue
+        expected = expected if isinstance(expected, tuple) else (expected,)
+        # bool es subclase de int: solo se acepta donde el esquema lo indica
+        if isinstance(value, bool) and bool not in expected or not isinstance(value, expected):
+            names = ', '.join(value_type.__name__ for value_type in expected)
+            errors.append(f'{key}: se esperaba {names}, se obtuvo {type(value).__name__}')
+        elif key in CONFIG_CHOICES and value not in CONFIG_CHOICES[key]:
+            errors.append(f'{key}: debe ser uno de {", ".join(CONFIG_CHOICES[key])}')
+    if errors:
+        raise ConfigError('Configuración inválida: ' + '; '.join(errors))
+
+
+class ConfigService():
+    """
+    Clase que mantiene en memoria la configuración de `config.json` como única fuente compartida.
+    El archivo se lee y se valida la primera vez que se consulta y se vuelve a leer solo cuando
+    cambia su fecha de modificación. Las escrituras son atómicas (archivo temporal + renombrado),
+    de modo que otros procesos nunca leen un archivo a medio escribir.
+
+    Atributos:
+    filepath (str): La ruta del archivo de configuración.
+    check_interval (float): Los segundos mínimos entre verificaciones de la fecha de modificación.
+    """
+
+
+    def __init__(self, filepath:str, check_interval:float=1.0):
+        self.filepath = filepath
+        self.check_interval = check_interval
+        self.lock = threading.RLock()
+        self.data = None
+        self.mtime = None
+        self.checked = 0.0
+
+
+    def load(self):
+        """
+        Lee y valida el archivo de configuración, reemplazando la copia en memoria.
+        Devuelve:
+        dict: Los datos de configuración.
+        """
+        with self.lock:
+            mtime = os.stat(self.filepath).st_mtime_ns
+            with open(self.filepath, 'r', encoding='utf-8') as config_file:
+                data = json.load(config_file)
+            validate_config(data)
+            self.data = data
+            self.mtime = mtime
+            self.checked = time.monotonic()
+            logging.info(f'Configuración cargada desde {self.filepath}')
+            return self.data
+
+
+    def get(self):
+        """
+        Obtiene la configuración en memoria, recargándola si el archivo fue modificado.
+        El diccionario devuelto es compartido y no se debe modificar.
+        Devuelve:
+        dict: Los datos de configuración.
+        """
+        with self.lock:
+            if self.data is None:
+                return self.load()
+            now = time.monotonic()
+            if now - self.checked >= self.check_interval:
+                self.checked = now
+                try:
+                    if os.stat(self.filepath).st_mtime_ns != self.mtime:
+                        return self.load()
+                except (OSError, ValueError) as e:
+                    logging.error(f'Error al recargar la configuración, se mantiene la anterior: {e}')
+            return self.data
+
+
+    def get_params(self):
+        """
+        Obtiene los parámetros de la configuración.
+        Devuelve:
+        dict: El diccionario `params` de la configuración.
+        """
+        return self.get()['params']
+
+
+    def update_params(self, **params):
+        """
+        Actualiza parámetros de la configuración y guarda el archivo de forma atómica.
+        Parámetros:
+        params: Los parámetros a actualizar.
+        """
+        with self.lock:
+            # Se parte del archivo actual para no perder cambios hechos por otros procesos
+            data = self.load()
+            data = {**data, 'params': {**data['params'], **params}}
+            validate_config(data)
+            write_atomic(self.filepath, json.dumps(data, indent=4, ensure_ascii=False) + '\n')
+            self.data = data
+            self.mtime = os.stat(self.filepath).st_mtime_ns
+            self.checked = time.monotonic()
+
+
+# Configuración compartida del proyecto
+CONFIG = ConfigService(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json'))
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import METRICS
+
+DEFAULT_RATE_LIMITS = {
+    'global_per_second': 30,
+    'chat_per_second': 1,
+    'group_per_minute': 20,
+}
+
+
+class TokenBucket():
+    """
+    Clase que implementa un limitador de tasa de tipo token bucket, seguro entre hilos.
+
+    Atributos:
+    rate (float): La cantidad de tokens que se recuperan por segundo.
+    capacity (float): La cantidad máxima de tokens acumulables (ráfaga).
+    """
+
+
+    def __init__(self, rate:float, capacity:float=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    def reserve(self):
+        """
+        Reserva un token y devuelve el tiempo que se debe esperar para poder usarlo.
+        Devuelve:
+        float: Los segundos de espera (0 si el token está disponible de inmediato).
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+    def acquire(self):
+        """
+        Espera hasta que haya un token disponible y lo consume.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+    def pause(self, seconds:float):
+        """
+        Bloquea el bucket durante los segundos indicados (por ejemplo, tras un `retry_after`).
+        Parámetros:
+        seconds (float): Los segundos de pausa.
+        """
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class DeliveryResult():
+    """
+    Clase que representa el resultado del envío de un mensaje.
+
+    Atributos:
+    chat_id (str): El ID de chat de destino.
+    ok (bool): Indica si el mensaje fue entregado.
+    status_code (int): El código de estado HTTP de la última solicitud.
+    attempts (int): La cantidad de intentos realizados.
+    error (str): La descripción del error, si el mensaje no fue entregado.
+    response (dict): Los datos de la respuesta JSON de la última solicitud.
+    """
+
+
+    def __init__(self, chat_id:str, ok:bool, status_code:int=None, attempts:int=0, error:str=None, response:dict=None):
+        self.chat_id = chat_id
+        self.ok = ok
+        self.status_code = status_code
+        self.attempts = attempts
+        self.error = error
+        self.response = response
+
+
+    @property
+    def retryable(self):
+        """
+        Indica si un mensaje no entregado se puede reintentar más adelante: errores de red, 429 o
+        errores del servidor. Los demás errores (chat inexistente, bot expulsado, solicitud inválida)
+        son permanentes.
+        Devuelve:
+        bool: True si el envío falló por una causa transitoria.
+        """
+        return not self.ok and (self.status_code is None or self.status_code == 429 or self.status_code >= 500)
+
+
+    def __repr__(self):
+        return f'DeliveryResult(chat_id={self.chat_id!r}, ok={self.ok}, status_code={self.status_code}, attempts={self.attempts})'
+
+
+class DeliveryQueue():
+    """
+    Clase que envía mensajes de Telegram en paralelo respetando los límites de la API:
+    un límite global de mensajes por segundo, uno por chat privado y uno por grupo. Las respuestas
+    429 se reintentan después del `retry_after` indicado por Telegram y los errores de red o de
+    servidor se reintentan con espera exponencial.
+
+    Atributos:
+    telegram_bot (TelegramBot): La instancia de TelegramBot utilizada para enviar los mensajes.
+    max_retries (int): La cantidad máxima de reintentos por mensaje.
+    backoff (float): El tiempo base de espera exponencial entre reintentos en segundos.
+    rate_limits (dict): Los límites de envío ('global_per_second', 'chat_per_second', 'group_per_minute').
+    """
+
+
+    def __init__(self, telegram_bot, max_workers:int=8, max_retries:int=3, backoff:float=1.0, rate_limits:dict=None):
+        self.telegram_bot = telegram_bot
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.global_bucket = TokenBucket(self.rate_limits['global_per_second'], self.rate_limits['global_per_second'])
+        self.chat_buckets = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='telegram')
+
+
+    @classmethod
+    def from_params(cls, telegram_bot, params:dict):
+        """
+        Construye una DeliveryQueue a partir de los parámetros de configuración.
+        Parámetros:
+        telegram_bot (TelegramBot): La instancia de TelegramBot.
+        params (dict): Los parámetros de configuración ('telegram_workers', 'telegram_retries',
+        'telegram_backoff', 'telegram_rate_limits').
+        Devuelve:
+        DeliveryQueue: La instancia configurada.
+        """
+        return cls(
+            telegram_bot,
+            max_workers=params.get('telegram_workers', 8),
+            max_retries=params.get('telegram_retries', 3),
+            backoff=params.get('telegram_backoff', 1.0),
+            rate_limits=params.get('telegram_rate_limits', {}),
+        )
+
+
+    def get_chat_bucket(self, chat_id):
+        """
+        Obtiene el limitador de tasa del chat, creándolo si no existe. Los ID de grupos
+        (negativos) usan el límite por minuto de grupos.
+        Parámetros:
+        chat_id: El ID de chat.
+        Devuelve:
+        TokenBucket: El limitador de tasa del chat.
+        """
+        key = str(chat_id)
+        with self.lock:
+            if key not in self.chat_buckets:
+                if key.startswith('-'):
+                    self.chat_buckets[key] = TokenBucket(self.rate_limits['group_per_minute'] / 60)
+                else:
+                    self.chat_buckets[key] = TokenBucket(self.rate_limits['chat_per_second'])
+            return self.chat_buckets[key]
+
+
+    def deliver(self, chat_id, message:str, parse_mode=None):
+        """
+        Envía un mensaje respetando los límites de tasa y reintentando cuando corresponde.
+        Parámetros:
+        chat_id: El ID de chat de destino.
+        message (str): El mensaje a enviar.
+        parse_mode (str, opcional): El modo de análisis del mensaje.
+        Devuelve:
+        DeliveryResult: El resultado del envío.
+        """
+        chat_bucket = self.get_chat_bucket(chat_id)
+        result = DeliveryResult(chat_id, False)
+        for attempt in range(self.max_retries + 1):
+            chat_bucket.acquire()
+            self.global_bucket.acquire()
+            result.attempts = attempt + 1
+            if attempt > 0:
+                METRICS.incr('telegram_retries')
+            try:
+                with METRICS.span('telegram_send'):
+                    status_code, data = self.telegram_bot.send_message(chat_id, message, parse_mode)
+            except Exception as e:
+                result.error = str(e)
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            result.status_code = status_code
+            result.response = data
+            if status_code == 200 and data.get('ok', False):
+                result.ok = True
+                result.error = None
+                METRICS.incr('messages_sent')
+                return result
+
+            result.error = data.get('description', f'HTTP {status_code}')
+            if status_code == 429:
+                METRICS.incr('telegram_429')
+                retry_after = data.get('parameters', {}).get('retry_after', self.backoff * 2 ** attempt)
+                logging.warning(f'Telegram 429 en el chat {chat_id}, reintento en {retry_after}s')
+                chat_bucket.pause(retry_after)
+            elif status_code is not None and status_code >= 500:
+                time.sleep(self.backoff * 2 ** attempt)
+            else:
+                break
+
+        logging.error(f'Error al enviar el mensaje al chat {chat_id}: {result.error}')
+        METRICS.incr('messages_failed')
+        return result
+
+
+    def submit(self, chat_id, message:str, parse_mode=None):
+        """
+        Encola un mensaje para su envío.
+        Parámetros:
+        chat_id: El ID de chat de destino.
+        message (str): El mensaje a enviar.
+        parse_mode (str, opcional): El modo de análisis del mensaje.
+        Devuelve:
+        Future: Un Future cuyo resultado es el DeliveryResult del mensaje.
+        """
+        return self.executor.submit(self.deliver, chat_id, message, parse_mode)
+
+
+    def send_batch(self, messages:list):
+        """
+        Envía un lote de mensajes en paralelo y espera a que terminen.
+        Parámetros:
+        messages (list): Una lista de tuplas (chat_id, message, parse_mode).
+        Devuelve:
+        list: Los DeliveryResult de cada mensaje, en el mismo orden.
+        """
+        futures = [self.submit(chat_id, message, parse_mode) for chat_id, message, parse_mode in messages]
+        return [future.result() for future in futures]
+
+
+    def close(self):
+        """
+        Espera a que terminen los envíos pendientes y libera los hilos.
+        """
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from core.metrics import METRICS
+from core.pipeline import DETAIL_COLUMNS
+
+
+class DetailCache():
+    """
+    Clase que mantiene el caché persistente (SQLite) de los datos de detalle por producto (ASIN),
+    con una copia en memoria. Los datos vencen `ttl_hours` horas después de obtenerse.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    ttl (timedelta): La vigencia de los datos de detalle.
+    details (dict): Los datos en memoria: code -> (detail, fetched_at).
+    """
+
+
+    def __init__(self, db_path:str, ttl_hours:float=24):
+        self.db_path = db_path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS product_details (
+                code TEXT PRIMARY KEY,
+                detail TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+            '''
+        )
+        # Descarta los datos vencidos al iniciar
+        self.conn.execute('DELETE FROM product_details WHERE fetched_at < ?', ((datetime.now() - self.ttl).isoformat(),))
+        self.conn.commit()
+        self.details = {
+            code: (json.loads(detail), datetime.fromisoformat(fetched_at))
+            for code, detail, fetched_at in self.conn.execute('SELECT code, detail, fetched_at FROM product_details')
+        }
+
+
+    def get(self, code:str):
+        """
+        Obtiene los datos de detalle vigentes de un producto.
+        Parámetros:
+        code (str): El código del producto.
+        Devuelve:
+        dict: Los datos de detalle o None si no están en el caché o vencieron.
+        """
+        cached = self.details.get(code)
+        if cached is None or datetime.now() - cached[1] >= self.ttl:
+            return None
+        return cached[0]
+
+
+    def save(self, records:list):
+        """
+        Guarda datos de detalle nuevos.
+        Parámetros:
+        records (list): Una lista de tuplas (code, detail).
+        """
+        if not records:
+            return
+        fetched_at = datetime.now()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO product_details (code, detail, fetched_at) VALUES (?, ?, ?)',
+                [(code, json.dumps(detail, ensure_ascii=False), fetched_at.isoformat()) for code, detail in records],
+            )
+            self.conn.commit()
+            for code, detail in records:
+                self.details[code] = (detail, fetched_at)
+
+
+    def close(self):
+        self.conn.close()
+
+
+class EnrichmentService():
+    """
+    Clase que completa las ofertas con los datos de la página de detalle de cada producto
+    (vendedor, calificación, disponibilidad y Prime). Consulta primero el caché por ASIN y descarga
+    las páginas faltantes en paralelo, con un máximo de `max_workers` descargas simultáneas; el
+    HTML se procesa con `ProductParser.parse_detail` sin acceder de nuevo a la red.
+
+    Atributos:
+    fetch (function): Función `fetch(url)` que descarga una página de detalle y devuelve su HTML (o None).
+    parser (ProductParser): El parser de las páginas de detalle.
+    cache (DetailCache): El caché persistente de los datos de detalle.
+    """
+
+
+    def __init__(self, fetch, parser, cache:DetailCache, max_workers:int=4):
+        self.fetch = fetch
+        self.parser = parser
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='enrichment')
+
+
+    @classmethod
+    def from_params(cls, params:dict, base_path:str, fetch, parser):
+        """
+        Construye un EnrichmentService a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('enrichment_enabled', 'enrichment_workers',
+        'enrichment_cache_path', 'enrichment_ttl_hours').
+        base_path (str): La carpeta del proyecto, para resolver la ruta relativa del caché.
+        fetch (function): Función `fetch(url)` que descarga una página de detalle.
+        parser (ProductParser): El parser de las páginas de detalle.
+        Devuelve:
+        EnrichmentService: La instancia configurada o None si el enriquecimiento está desactivado.
+        """
+        if not params.get('enrichment_enabled', False):
+            return None
+        cache_path = os.path.join(base_path, params.get('enrichment_cache_path', 'data/product_details.db'))
+        return cls(
+            fetch,
+            parser,
+            DetailCache(cache_path, params.get('enrichment_ttl_hours', 24)),
+            max_workers=params.get('enrichment_workers', 4),
+        )
+
+
+    def enrich_one(self, code:str):
+        """
+        Descarga y procesa la página de detalle de un producto.
+        Parámetros:
+        code (str): El código del producto.
+        Devuelve:
+        dict: Los datos de detalle.
+        Lanza:
+        ValueError: Si la página no se pudo descargar.
+        """
+        with METRICS.span('enrichment_fetch'):
+            html = self.fetch(self.parser.get_detail_url(code))
+        if html is None:
+            raise ValueError('no se pudo descargar la pagina de detalle')
+        with METRICS.span('enrichment_parse'):
+            return self.parser.parse_detail(html)
+
+
+    def enrich_many(self, codes:list):
+        """
+        Obtiene los datos de detalle de un lote de productos, descargando solo los que no están en el caché.
+        Parámetros:
+        codes (list): Los códigos de los productos.
+        Devuelve:
+        tuple: Un diccionario code -> detail con los datos obtenidos y una lista con los errores.
+        """
+        details = {}
+        missing = []
+        for code in codes:
+            if not code or code in details or code in missing:
+                continue
+            detail = self.cache.get(code)
+            if detail is not None:
+                details[code] = detail
+            else:
+                missing.append(code)
+        METRICS.incr('enrichment_cache_hits', len(details))
+
+        futures = {code: self.executor.submit(self.enrich_one, code) for code in missing}
+        records = []
+        errors = []
+        for code, future in futures.items():
+            try:
+                detail = future.result()
+            except Exception as e:
+                errors.append(f'{code}: {e}')
+                METRICS.incr('enrichment_errors')
+                continue
+            details[code] = detail
+            records.append((code, detail))
+        self.cache.save(records)
+        METRICS.incr('products_enriched', len(records))
+        return details, errors
+
+
+    def enrich_frame(self, df):
+        """
+        Agrega al DataFrame las columnas de detalle (DETAIL_COLUMNS) de cada producto.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de productos con la columna 'code'.
+        Devuelve:
+        tuple: El DataFrame con las columnas de detalle (None si no se obtuvieron) y una lista con los errores.
+        """
+        details, errors = self.enrich_many(list(df['code']))
+        return df.assign(**{
+            column: [details.get(code, {}).get(column) for code in df['code']]
+            for column in DETAIL_COLUMNS
+        }), errors
+
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.cache.close()
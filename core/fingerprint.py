@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+def make_fingerprint(price:float, price_list:float, product_type:str):
+    """
+    Construye la huella de un producto a partir de los campos que determinan si es una oferta.
+    Parámetros:
+    price (float): El precio del producto.
+    price_list (float): El precio de lista del producto.
+    product_type (str): El tipo de producto.
+    Devuelve:
+    str: La huella del producto.
+    """
+    return f'{price}|{price_list}|{product_type}'
+
+
+class FingerprintCache():
+    """
+    Clase que mantiene la huella (precio, precio de lista y tipo) de cada producto (ASIN) procesado,
+    persistida en SQLite entre ejecuciones y con una copia en memoria. Permite procesar solo los
+    productos nuevos o cuyo precio cambió desde la última ejecución.
+
+    Una huella se considera vencida pasadas `ttl_hours` horas desde que se registró, de modo que los
+    productos sin cambios se vuelven a procesar completos periódicamente (por ejemplo, para aplicar
+    las reglas de reenvío del índice de ofertas enviadas).
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    ttl_hours (float): Las horas de validez de una huella (0 la mantiene indefinidamente).
+    fingerprints (dict): Las huellas en memoria: code -> (fingerprint, seen_at).
+    """
+
+
+    def __init__(self, db_path:str, ttl_hours:float=24):
+        self.db_path = db_path
+        self.ttl_hours = ttl_hours or 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS product_fingerprints (
+                code TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                seen_at TEXT NOT NULL
+            )
+            '''
+        )
+        self.conn.commit()
+        self.fingerprints = self.load()
+
+
+    def load(self):
+        """
+        Carga en memoria todas las huellas registradas.
+        Devuelve:
+        dict: Las huellas: code -> (fingerprint, seen_at).
+        """
+        rows = self.conn.execute('SELECT code, fingerprint, seen_at FROM product_fingerprints').fetchall()
+        return {code: (fingerprint, datetime.fromisoformat(seen_at)) for code, fingerprint, seen_at in rows}
+
+
+    def is_changed(self, code:str, fingerprint:str, now:datetime=None):
+        """
+        Indica si un producto es nuevo, cambió su huella o tiene la huella vencida.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        fingerprint (str): La huella actual del producto.
+        now (datetime): La fecha y hora de referencia (por defecto, ahora).
+        Devuelve:
+        bool: True si el producto se debe procesar.
+        """
+        if not code:
+            return True
+        entry = self.fingerprints.get(code)
+        if entry is None or entry[0] != fingerprint:
+            return True
+        if self.ttl_hours:
+            now = now or datetime.now()
+            return now - entry[1] >= timedelta(hours=self.ttl_hours)
+        return False
+
+
+    def update(self, records:list, now:datetime=None):
+        """
+        Registra las huellas de los productos procesados.
+        Parámetros:
+        records (list): Una lista de tuplas (code, fingerprint).
+        now (datetime): La fecha y hora del registro (por defecto, ahora).
+        """
+        now = now or datetime.now()
+        seen_at = now.isoformat()
+        rows = [(code, fingerprint, seen_at) for code, fingerprint in records if code]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                '''
+                INSERT INTO product_fingerprints (code, fingerprint, seen_at) VALUES (?, ?, ?)
+                ON CONFLICT (code) DO UPDATE SET fingerprint = excluded.fingerprint, seen_at = excluded.seen_at
+                ''',
+                rows,
+            )
+            self.conn.commit()
+            for code, fingerprint, _ in rows:
+                self.fingerprints[code] = (fingerprint, now)
+
+
+    def close(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        self.conn.close()
@@ -0,0 +1,206 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+
+class PriceHistory():
+    """
+    Clase que mantiene el histórico de precios por producto (ASIN) en una base de datos SQLite
+    de solo inserción, indexada por código y fecha. Cada scraping se ingiere de forma incremental.
+    Los precios registrados uno a uno (`record`) se acumulan y se escriben junto con la próxima
+    ingesta o con `flush`.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    pending (list): Los precios registrados que aún no se escriben en la base de datos.
+    """
+
+
+    def __init__(self, db_path:str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.pending = []
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS prices (
+                code TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                price REAL NOT NULL,
+                price_list REAL,
+                search_val TEXT,
+                filter TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_prices_code_ts ON prices (code, ts);
+            '''
+        )
+
+
+    def record(self, code:str, price:float, price_list:float=None, search_val:str=None, filter:str=None):
+        """
+        Registra el precio de un solo producto, que se escribe con la próxima ingesta o con `flush`.
+        Los productos sin código o sin precio (o con precio 0) se omiten.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        price (float): El precio del producto.
+        price_list (float): El precio de lista del producto (opcional).
+        search_val (str): El valor de búsqueda del que proviene el producto (opcional).
+        filter (str): El filtro de Amazon aplicado (opcional).
+        """
+        if not code or pd.isna(price) or not price > 0:
+            return
+        ts = datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            self.pending.append(
+                (code, ts, float(price), None if pd.isna(price_list) else float(price_list), search_val, filter)
+            )
+
+
+    def write_rows(self, rows:list):
+        """
+        Escribe en una sola transacción los precios indicados y los registrados pendientes.
+        Parámetros:
+        rows (list): Las filas (code, ts, price, price_list, search_val, filter).
+        """
+        with self.lock:
+            rows = self.pending + rows
+            self.pending = []
+            if not rows:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO prices (code, ts, price, price_list, search_val, filter) VALUES (?, ?, ?, ?, ?, ?)',
+                    rows,
+                )
+
+
+    def flush(self):
+        """
+        Escribe en la base de datos los precios registrados pendientes.
+        """
+        self.write_rows([])
+
+
+    def ingest(self, df:pd.DataFrame, search_val:str=None, filter:str=None, ts:datetime=None):
+        """
+        Agrega al histórico los precios de los productos de un DataFrame.
+        Los productos sin código o sin precio (o con precio 0) se omiten.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame con las columnas 'code', 'price' y 'price_list'.
+        search_val (str): El valor de búsqueda del que provienen los productos (opcional).
+        filter (str): El filtro de Amazon aplicado (opcional).
+        ts (datetime): La fecha y hora de la observación (por defecto, ahora).
+        Devuelve:
+        int: La cantidad de precios agregados.
+        """
+        if df is None or df.empty:
+            self.flush()
+            return 0
+        ts = (ts or datetime.now()).isoformat(timespec='seconds')
+        prices_df = df[['code', 'price', 'price_list']].dropna(subset=['code', 'price'])
+        prices_df = prices_df[prices_df['price'] > 0].drop_duplicates(subset=['code'])
+        rows = [
+            (code, ts, float(price), None if pd.isna(price_list) else float(price_list), search_val, filter)
+            for code, price, price_list in prices_df.itertuples(index=False, name=None)
+        ]
+        self.write_rows(rows)
+        return len(rows)
+
+
+    def get_prices(self, codes:list, before:datetime=None):
+        """
+        Obtiene las observaciones de precio de los productos indicados.
+        Parámetros:
+        codes (list): Los códigos de los productos (ASIN).
+        before (datetime): Solo considera observaciones anteriores a esta fecha (opcional).
+        Devuelve:
+        pd.DataFrame: Las observaciones con las columnas 'code', 'ts' y 'price', ordenadas por fecha.
+        """
+        codes = [code for code in dict.fromkeys(codes) if code]
+        frames = []
+        # SQLite limita la cantidad de parámetros por consulta
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i+500]
+            query = f'SELECT code, ts, price FROM prices WHERE code IN ({",".join("?"*len(chunk))})'
+            params = list(chunk)
+            if before is not None:
+                query += ' AND ts < ?'
+                params.append(before.isoformat(timespec='seconds'))
+            with self.lock:
+                frames.append(pd.read_sql_query(query + ' ORDER BY code, ts', self.conn, params=params))
+        if not frames:
+            return pd.DataFrame(columns=['code', 'ts', 'price'])
+        return pd.concat(frames, ignore_index=True)
+
+
+    def get_stats_df(self, codes:list, before:datetime=None):
+        """
+        Calcula el precio mínimo, la mediana y el último precio observado de cada producto.
+        Parámetros:
+        codes (list): Los códigos de los productos (ASIN).
+        before (datetime): Solo considera observaciones anteriores a esta fecha (opcional).
+        Devuelve:
+        pd.DataFrame: Un DataFrame indexado por código con las columnas 'min', 'median', 'last',
+        'samples' y 'last_seen'.
+        """
+        prices_df = self.get_prices(codes, before)
+        grouped = prices_df.groupby('code')
+        return pd.DataFrame({
+            'min': grouped['price'].min(),
+            'median': grouped['price'].median(),
+            'last': grouped['price'].last(),
+            'samples': grouped['price'].count(),
+            'last_seen': grouped['ts'].last(),
+        })
+
+
+    def get_stats(self, code:str, before:datetime=None):
+        """
+        Calcula el precio mínimo, la mediana y el último precio observado de un producto.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        before (datetime): Solo considera observaciones anteriores a esta fecha (opcional).
+        Devuelve:
+        dict: Las estadísticas del producto o None si no tiene historial.
+        """
+        stats_df = self.get_stats_df([code], before)
+        if code not in stats_df.index:
+            return None
+        return stats_df.loc[code].to_dict()
+
+
+    def filter_genuine_discounts(self, df:pd.DataFrame, max_ratio:float=0.95, min_samples:int=3, before:datetime=None):
+        """
+        Descarta los descuentos cuyo precio actual no es realmente bajo respecto al historial del
+        producto, es decir, cuando el precio supera `max_ratio` veces la mediana histórica. Los
+        productos con menos de `min_samples` observaciones se conservan.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de ofertas con las columnas 'code' y 'price'.
+        max_ratio (float): La proporción máxima entre el precio actual y la mediana histórica.
+        min_samples (int): La cantidad mínima de observaciones para aplicar el filtro.
+        before (datetime): Solo considera observaciones anteriores a esta fecha (opcional).
+        Devuelve:
+        pd.DataFrame: Las ofertas que no fueron descartadas.
+        """
+        if df.empty:
+            return df
+        stats_df = self.get_stats_df(df['code'].tolist(), before)
+        median = df['code'].map(stats_df['median'])
+        samples = df['code'].map(stats_df['samples']).fillna(0)
+        fake = (samples >= min_samples) & (df['price'] > median * max_ratio)
+        if fake.any():
+            logging.info(f'Descuentos descartados por historial de precios: {", ".join(df.loc[fake, "code"])}')
+        return df[~fake]
+
+
+    def close(self):
+        """
+        Escribe los precios pendientes y cierra la conexión con la base de datos.
+        """
+        self.flush()
+        self.conn.close()
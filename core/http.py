@@ -0,0 +1,121 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.metrics import METRICS
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+    'Connection': 'keep-alive',
+}
+
+
+class HttpFetcher():
+    """
+    Clase que descarga páginas mediante una sesión HTTP persistente (keep-alive) con reintentos.
+
+    La capa de transporte es inyectable: cualquier adaptador de `requests` (por ejemplo uno que
+    apunte a un servidor local de pruebas) puede reemplazar al `HTTPAdapter` por defecto.
+
+    Atributos:
+    session (requests.Session): La sesión HTTP compartida.
+    timeout (float): El tiempo máximo de espera por solicitud en segundos.
+    proxy (str): La URL del proxy de salida (opcional).
+    """
+
+
+    def __init__(self, headers:dict=None, retries:int=3, backoff_factor:float=1.0, timeout:float=20,
+                 pool_size:int=10, transport=None, proxy:str=None):
+        self.timeout = timeout
+        self.proxy = proxy
+        self.session = requests.Session()
+        self.session.headers.update({**DEFAULT_HEADERS, **(headers or {})})
+        if proxy:
+            self.session.proxies = {'http': proxy, 'https': proxy}
+        if transport is None:
+            retry = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET', 'HEAD'),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            transport = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', transport)
+        self.session.mount('https://', transport)
+
+
+    @classmethod
+    def from_params(cls, params:dict, pool_size:int=10, transport=None, proxy:str=None, user_agent:str=None):
+        """
+        Construye un HttpFetcher a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('http_headers', 'http_retries', 'http_backoff', 'http_timeout').
+        pool_size (int): La cantidad de conexiones a mantener abiertas.
+        transport: El adaptador de transporte a utilizar (opcional).
+        proxy (str): La URL del proxy de salida (opcional).
+        user_agent (str): El User-Agent que reemplaza al de `http_headers` (opcional).
+        Devuelve:
+        HttpFetcher: La instancia configurada.
+        """
+        headers = params.get('http_headers', {})
+        if user_agent:
+            headers = {**headers, 'User-Agent': user_agent}
+        return cls(
+            headers=headers,
+            retries=params.get('http_retries', 3),
+            backoff_factor=params.get('http_backoff', 1.0),
+            timeout=params.get('http_timeout', 20),
+            pool_size=pool_size,
+            transport=transport,
+            proxy=proxy,
+        )
+
+
+    def get(self, url:str):
+        """
+        Descarga el contenido HTML de la URL proporcionada.
+        Parámetros:
+        url (str): La URL a descargar.
+        Devuelve:
+        str: El HTML de la página o None si la descarga falla.
+        """
+        return self.fetch(url)[1]
+
+
+    def fetch(self, url:str):
+        """
+        Descarga el contenido HTML de la URL proporcionada, junto con el código de estado de la respuesta.
+        Parámetros:
+        url (str): La URL a descargar.
+        Devuelve:
+        tuple: El código de estado HTTP (None si no hubo respuesta) y el HTML de la página (None si la descarga falla).
+        """
+        with METRICS.span('http_get'):
+            try:
+                res = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                logging.error(f'Error al descargar {url}: {e}')
+                METRICS.incr('http_errors', reason='connection')
+                return None, None
+        retries = getattr(getattr(res.raw, 'retries', None), 'history', ())
+        if retries:
+            METRICS.incr('http_retries', len(retries))
+        if not res.ok:
+            logging.error(f'Error al descargar {url}: HTTP {res.status_code}')
+            METRICS.incr('http_errors', reason=str(res.status_code))
+            return res.status_code, None
+        METRICS.incr('pages_fetched', mode='http')
+        return res.status_code, res.text
+
+
+    def close(self):
+        """
+        Cierra la sesión HTTP y sus conexiones.
+        """
+        self.session.close()
@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+
+from core.utils import write_atomic
+
+PROMETHEUS_PREFIX = 'amazon_scraping'
+
+
+class Metrics():
+    """
+    Clase que registra métricas de la ejecución: spans anidados de tiempo (por hilo), contadores
+    y valores instantáneos (gauges) con etiquetas. Está pensada para mantenerse activa en producción: cada span solo mide el tiempo
+    con `perf_counter` y actualiza un diccionario bajo un lock.
+
+    Atributos:
+    spans (dict): Por cada (ruta, etiquetas), la cantidad, el tiempo total y el tiempo máximo.
+    counters (dict): Por cada (nombre, etiquetas), el valor acumulado.
+    gauges (dict): Por cada (nombre, etiquetas), el último valor registrado.
+    """
+
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = {}
+        self.counters = {}
+        self.gauges = {}
+
+
+    def reset(self):
+        """
+        Reinicia todas las métricas.
+        """
+        with self.lock:
+            self.spans = {}
+            self.counters = {}
+            self.gauges = {}
+
+
+    def get_stack(self):
+        """
+        Obtiene la pila de spans activos del hilo actual.
+        Devuelve:
+        list: Los nombres de los spans activos.
+        """
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+
+    @contextmanager
+    def span(self, name:str, **labels):
+        """
+        Mide el tiempo de un bloque. Los spans anidados en el mismo hilo se registran con la ruta
+        completa, por ejemplo 'scraping/page_load'.
+        Parámetros:
+        name (str): El nombre del span.
+        labels: Etiquetas adicionales del span (por ejemplo, term='audifonos').
+        """
+        stack = self.get_stack()
+        stack.append(name)
+        path = '/'.join(stack)
+        startt = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - startt
+            stack.pop()
+            key = (path, tuple(sorted(labels.items())))
+            with self.lock:
+                data = self.spans.get(key)
+                if data is None:
+                    data = self.spans[key] = {'count': 0, 'total': 0.0, 'max': 0.0}
+                data['count'] += 1
+                data['total'] += elapsed
+                if elapsed > data['max']:
+                    data['max'] = elapsed
+
+
+    def incr(self, name:str, value:float=1, **labels):
+        """
+        Incrementa un contador.
+        Parámetros:
+        name (str): El nombre del contador.
+        value (float): El incremento (por defecto, 1).
+        labels: Etiquetas del contador (por ejemplo, field='price').
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+    def set_gauge(self, name:str, value:float, **labels):
+        """
+        Registra el valor actual de una medición, reemplazando el anterior.
+        Parámetros:
+        name (str): El nombre de la medición.
+        value (float): El valor.
+        labels: Etiquetas de la medición (por ejemplo, session='session-0').
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+
+    def get_counter(self, name:str, **labels):
+        """
+        Obtiene el valor de un contador. Sin etiquetas, suma todas las series del contador.
+        Parámetros:
+        name (str): El nombre del contador.
+        labels: Etiquetas del contador (opcional).
+        Devuelve:
+        float: El valor del contador.
+        """
+        with self.lock:
+            if labels:
+                return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+
+    def snapshot(self):
+        """
+        Devuelve una copia serializable de las métricas.
+        Devuelve:
+        dict: Un diccionario con las listas 'spans', 'counters' y 'gauges'.
+        """
+        with self.lock:
+            spans = [
+                {'span': path, 'labels': dict(labels), 'count': data['count'],
+                 'total_seconds': round(data['total'], 6), 'max_seconds': round(data['max'], 6)}
+                for (path, labels), data in sorted(self.spans.items())
+            ]
+            counters = [
+                {'counter': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            gauges = [
+                {'gauge': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.gauges.items())
+            ]
+        return {'spans': spans, 'counters': counters, 'gauges': gauges}
+
+
+    def to_prometheus(self):
+        """
+        Genera las métricas en el formato de texto de Prometheus (textfile collector).
+        Devuelve:
+        str: Las métricas en formato Prometheus.
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f'# TYPE {PROMETHEUS_PREFIX}_span_seconds_total counter',
+            f'# TYPE {PROMETHEUS_PREFIX}_span_count_total counter',
+        ]
+        for span in snapshot['spans']:
+            labels = format_labels({'span': span['span'], **span['labels']})
+            lines.append(f'{PROMETHEUS_PREFIX}_span_seconds_total{labels} {span["total_seconds"]}')
+            lines.append(f'{PROMETHEUS_PREFIX}_span_count_total{labels} {span["count"]}')
+        declared = set()
+        for counter in snapshot['counters']:
+            name = f'{PROMETHEUS_PREFIX}_{sanitize_name(counter["counter"])}_total'
+            if name not in declared:
+                lines.append(f'# TYPE {name} counter')
+                declared.add(name)
+            lines.append(f'{name}{format_labels(counter["labels"])} {counter["value"]}')
+        for gauge in snapshot['gauges']:
+            name = f'{PROMETHEUS_PREFIX}_{sanitize_name(gauge["gauge"])}'
+            if name not in declared:
+                lines.append(f'# TYPE {name} gauge')
+                declared.add(name)
+            lines.append(f'{name}{format_labels(gauge["labels"])} {gauge["value"]}')
+        return '\n'.join(lines) + '\n'
+
+
+    def export(self, json_path:str=None, prometheus_path:str=None):
+        """
+        Guarda las métricas en un archivo JSON y/o en un archivo de texto de Prometheus.
+        Los archivos se escriben de forma atómica (archivo temporal + renombrado).
+        Parámetros:
+        json_path (str): La ruta del archivo JSON (opcional).
+        prometheus_path (str): La ruta del archivo de Prometheus (opcional).
+        """
+        if json_path:
+            write_atomic(json_path, json.dumps(self.snapshot(), indent=4, ensure_ascii=False))
+        if prometheus_path:
+            write_atomic(prometheus_path, self.to_prometheus())
+
+
+def sanitize_name(name:str):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels:dict):
+    if not labels:
+        return ''
+    values = ','.join(f'{sanitize_name(key)}="{escape_label(value)}"' for key, value in labels.items())
+    return '{' + values + '}'
+
+
+# Registro global de métricas de la ejecución
+METRICS = Metrics()
+
+
+def timer(func):
+    """
+    Decorador que mide el tiempo de ejecución de una función como un span de métricas
+    y registra el inicio, el fin y la duración en el log.
+    Parámetros:
+    func (function): La función que se va a medir.
+    Devuelve:
+    function: Una función envoltorio que ejecuta `func` dentro de un span con su nombre.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        startt = time.perf_counter()
+        logging.info(f'INICIA {func.__name__}')
+        with METRICS.span(func.__name__):
+            result = func(*args, **kwargs)
+        endt = time.perf_counter()
+        logging.info(f'FIN {func.__name__}')
+        logging.info(f'{"="*15} Tiempo de ejecución {func.__name__}: {timedelta(seconds=endt-startt)} {"="*25}')
+        return result
+
+    return wrapper
@@ -0,0 +1,266 @@
+import os
+import threading
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    ds = None
+    pq = None
+
+
+def get_result_schema():
+    """
+    Construye el esquema de columnas tipadas de los archivos Parquet de resultados. Las columnas de
+    partición (`date` y `term`) forman parte de la ruta y no del archivo.
+    Devuelve:
+    pyarrow.Schema: El esquema de los resultados.
+    """
+    return pa.schema([
+        ('code', pa.string()),
+        ('name', pa.string()),
+        ('price', pa.float64()),
+        ('price_list', pa.float64()),
+        ('discount', pa.int64()),
+        ('link', pa.string()),
+        ('short_link', pa.string()),
+        ('type', pa.string()),
+        ('page', pa.int64()),
+        ('sended', pa.bool_()),
+        ('filter', pa.string()),
+        ('sources', pa.string()),
+        ('scraped_at', pa.timestamp('s')),
+    ])
+
+
+class CsvOutputWriter():
+    """
+    Clase que guarda los resultados en archivos CSV sin comprimir dentro de una sola carpeta
+    (un archivo por búsqueda y filtro, y un archivo consolidado por ejecución). La primera escritura
+    de un archivo lo reemplaza y las siguientes, hasta `close`, agregan filas al final, de modo que
+    las páginas de una búsqueda se guardan a medida que se procesan. Los archivos se registran por
+    valor de búsqueda, de modo que cerrar una búsqueda no afecta a las que siguen en curso.
+
+    Atributos:
+    base_dir (str): La carpeta de resultados.
+    written (dict): Los archivos escritos desde la última llamada a `close`: filepath -> search_val.
+    """
+
+
+    def __init__(self, base_dir:str='results'):
+        self.base_dir = base_dir
+        self.lock = threading.Lock()
+        self.written = {}
+
+
+    def write(self, df:pd.DataFrame, search_val:str, filter:str=None, filename:str=None):
+        """
+        Guarda los productos de una búsqueda y filtro.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de productos.
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        filename (str): El nombre del archivo (por defecto, '<search_val>_products.csv').
+        """
+        os.makedirs(self.base_dir, exist_ok=True)
+        filepath = os.path.join(self.base_dir, filename or f'{search_val}_products.csv')
+        with self.lock:
+            append = filepath in self.written
+            df.to_csv(filepath, index=False, mode='a' if append else 'w', header=not append)
+            self.written[filepath] = search_val
+
+
+    def write_run(self, df:pd.DataFrame, run_started:datetime):
+        """
+        Guarda el archivo consolidado de una ejecución.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame consolidado.
+        run_started (datetime): La fecha y hora de inicio de la ejecución.
+        """
+        os.makedirs(self.base_dir, exist_ok=True)
+        df.to_csv(os.path.join(self.base_dir, f'products_{run_started:%Y-%m-%dT%H-%M-%S}.csv'), index=False)
+
+
+    def close(self, search_val:str=None):
+        """
+        Termina los archivos escritos: la próxima escritura de cada archivo lo reemplaza.
+        Parámetros:
+        search_val (str): El valor de búsqueda cuyos archivos se terminan (por defecto, todos).
+        """
+        with self.lock:
+            if search_val is None:
+                self.written.clear()
+                return
+            for filepath in [filepath for filepath, term in self.written.items() if term == search_val]:
+                del self.written[filepath]
+
+
+class ParquetOutputWriter():
+    """
+    Clase que guarda los resultados en archivos Parquet comprimidos y con columnas tipadas,
+    particionados por fecha y valor de búsqueda (`<base_dir>/date=AAAA-MM-DD/term=<búsqueda>/`).
+    Cada escritura agrega un grupo de filas al archivo abierto de su partición; los archivos se
+    cierran con `close`, al terminar la ejecución. Requiere `pyarrow`.
+
+    Atributos:
+    base_dir (str): La carpeta raíz de los resultados.
+    compression (str): El códec de compresión ('zstd', 'snappy', 'gzip', ...).
+    """
+
+
+    def __init__(self, base_dir:str='results/parquet', compression:str='zstd'):
+        if pa is None:
+            raise ImportError('El formato de salida parquet requiere pyarrow: pip install pyarrow')
+        self.base_dir = base_dir
+        self.compression = compression
+        self.schema = get_result_schema()
+        self.lock = threading.Lock()
+        self.writers = {}
+
+
+    def get_writer(self, day:str, term:str):
+        """
+        Obtiene el archivo abierto de una partición, creándolo si no existe.
+        Parámetros:
+        day (str): La fecha de la partición (AAAA-MM-DD).
+        term (str): El valor de búsqueda de la partición.
+        Devuelve:
+        pyarrow.parquet.ParquetWriter: El archivo de la partición.
+        """
+        key = (day, term)
+        writer = self.writers.get(key)
+        if writer is None:
+            dirpath = os.path.join(self.base_dir, f'date={day}', f'term={quote(term, safe="")}')
+            os.makedirs(dirpath, exist_ok=True)
+            filepath = os.path.join(dirpath, f'part-{datetime.now():%H%M%S}-{uuid.uuid4().hex[:8]}.parquet')
+            writer = self.writers[key] = pq.ParquetWriter(filepath, self.schema, compression=self.compression)
+        return writer
+
+
+    def to_table(self, df:pd.DataFrame, filter:str=None, scraped_at:datetime=None):
+        """
+        Convierte un DataFrame de productos en una tabla con el esquema de resultados.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de productos.
+        filter (str): La descripción del filtro, si el DataFrame no tiene la columna 'filter' (opcional).
+        scraped_at (datetime): La fecha y hora del scraping (por defecto, ahora).
+        Devuelve:
+        pyarrow.Table: La tabla tipada.
+        """
+        df = df.copy()
+        if 'filter' not in df:
+            df['filter'] = filter
+        if 'sources' not in df:
+            df['sources'] = None
+        df['scraped_at'] = pd.Timestamp(scraped_at or datetime.now()).floor('s')
+        df['discount'] = df['discount'].fillna(0).astype('int64')
+        df['page'] = df['page'].fillna(0).astype('int64')
+        df['sended'] = df['sended'].fillna(False).astype(bool)
+        return pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False)
+
+
+    def write(self, df:pd.DataFrame, search_val:str, filter:str=None, filename:str=None, scraped_at:datetime=None):
+        """
+        Agrega los productos de una búsqueda y filtro como un grupo de filas de su partición.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de productos.
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        filename (str): No se utiliza; se acepta por compatibilidad con CsvOutputWriter.
+        scraped_at (datetime): La fecha y hora del scraping (por defecto, ahora).
+        """
+        if df is None or not len(df):
+            return
+        scraped_at = scraped_at or datetime.now()
+        table = self.to_table(df, filter, scraped_at)
+        with self.lock:
+            self.get_writer(f'{scraped_at:%Y-%m-%d}', search_val or 'unknown').write_table(table)
+
+
+    def write_run(self, df:pd.DataFrame, run_started:datetime):
+        """
+        Guarda los productos consolidados de una ejecución, cada uno en la partición de la primera
+        búsqueda en la que apareció.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame consolidado (con las columnas 'search_val', 'filter' y 'sources').
+        run_started (datetime): La fecha y hora de inicio de la ejecución.
+        """
+        for search_val, group in df.groupby(df['search_val'].fillna('unknown'), sort=False):
+            self.write(group, search_val, scraped_at=run_started)
+
+
+    def close(self, search_val:str=None):
+        """
+        Cierra los archivos abiertos. Las siguientes escrituras crean archivos nuevos.
+        Parámetros:
+        search_val (str): El valor de búsqueda cuyos archivos se cierran (por defecto, todos).
+        """
+        with self.lock:
+            if search_val is None:
+                writers, self.writers = self.writers, {}
+            else:
+                writers = {key: writer for key, writer in self.writers.items() if key[1] == search_val}
+                for key in writers:
+                    del self.writers[key]
+        for writer in writers.values():
+            writer.close()
+
+
+def get_output_writer(params:dict, base_path:str):
+    """
+    Construye el escritor de resultados según la configuración.
+    Parámetros:
+    params (dict): Los parámetros de configuración ('output_format', 'output_path', 'output_compression').
+    base_path (str): La carpeta del proyecto, para resolver la ruta relativa de los resultados.
+    Devuelve:
+    CsvOutputWriter o ParquetOutputWriter: El escritor configurado.
+    """
+    output_format = params.get('output_format', 'csv')
+    if output_format == 'parquet':
+        output_path = os.path.join(base_path, params.get('output_path', 'results/parquet'))
+        return ParquetOutputWriter(output_path, params.get('output_compression', 'zstd'))
+    if output_format == 'csv':
+        return CsvOutputWriter('results')
+    raise ValueError(f'Formato de salida desconocido: {output_format}')
+
+
+def read_results(base_dir:str, start_date=None, end_date=None, search_values:list=None,
+                 min_discount:float=None, columns:list=None):
+    """
+    Lee los resultados Parquet de un rango de fechas. Las condiciones sobre la fecha y la búsqueda
+    descartan particiones completas y la de descuento se evalúa con las estadísticas de cada grupo
+    de filas, de modo que solo se leen los datos necesarios.
+    Parámetros:
+    base_dir (str): La carpeta raíz de los resultados Parquet.
+    start_date (date o str): La fecha inicial, inclusive (opcional).
+    end_date (date o str): La fecha final, inclusive (opcional).
+    search_values (list): Los valores de búsqueda a leer (opcional).
+    min_discount (float): El descuento mínimo de los productos (opcional).
+    columns (list): Las columnas a leer (por defecto, todas, más 'date' y 'term').
+    Devuelve:
+    pd.DataFrame: Los resultados.
+    """
+    if ds is None:
+        raise ImportError('La lectura de resultados parquet requiere pyarrow: pip install pyarrow')
+    partitioning = ds.partitioning(pa.schema([('date', pa.string()), ('term', pa.string())]), flavor='hive')
+    dataset = ds.dataset(base_dir, format='parquet', partitioning=partitioning)
+    expression = None
+    conditions = []
+    if start_date is not None:
+        conditions.append(ds.field('date') >= str(start_date))
+    if end_date is not None:
+        conditions.append(ds.field('date') <= str(end_date))
+    if search_values:
+        conditions.append(ds.field('term').isin(list(search_values)))
+    if min_discount is not None:
+        conditions.append(ds.field('discount') >= min_discount)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
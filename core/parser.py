@@ -0,0 +1,544 @@
+import json
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from core.metrics import METRICS
+
+AMAZON_DOMAIN = 'https://www.amazon.com.mx'
+
+RESULT_SELECTOR = '[data-component-type="s-search-result"]'
+NAME_SELECTOR = 'span[class="a-size-base-plus a-color-base a-text-normal"]'
+TYPE_SELECTOR = 'div[class="a-row a-spacing-micro"]'
+SPONSORED_SELECTOR = 'span[class="a-color-secondary"]'
+FEATURED_SELECTOR = 'span[class="a-size-micro a-color-secondary"]'
+PRICE_SELECTOR = 'span[class="a-price"]'
+PRICE_LIST_SELECTOR = 'span[class="a-price a-text-price"]'
+CONTENT_SELECTOR = 'div[class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small"]'
+LINK_SELECTOR = 'a[class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal"]'
+NEXT_PAGE_SELECTOR = 'a.s-pagination-next'
+
+# Selectores de la página de detalle del producto (/dp/<ASIN>)
+DETAIL_MARKER = 'productTitle'
+DETAIL_SELLER_SELECTORS = ('#sellerProfileTriggerId', '#merchantInfoFeature_feature_div .offer-display-feature-text', '#merchant-info')
+DETAIL_RATING_SELECTOR = '#acrPopover'
+DETAIL_RATING_TEXT_SELECTOR = '#averageCustomerReviews span.a-icon-alt'
+DETAIL_REVIEWS_SELECTOR = '#acrCustomerReviewText'
+DETAIL_AVAILABILITY_SELECTOR = '#availability'
+DETAIL_PRIME_SELECTOR = 'i.a-icon-prime, #prime-badge, #primeBadge'
+OUT_OF_STOCK_MARKERS = ('no disponible', 'agotado', 'currently unavailable', 'out of stock')
+
+# Script que obtiene, en una sola llamada al WebDriver, la presencia y el contenido de los campos
+# de todos los resultados de la página. Los campos ausentes se devuelven como null/false.
+TILE_SCRIPT = '''
+var query = function (element, selector) { return element ? element.querySelector(selector) : null; };
+var firstSpan = function (element) { return element ? element.querySelector(':scope > span') : null; };
+return Array.from(document.querySelectorAll(%(result)s)).map(function (tile) {
+    var typeRow = query(tile, %(type)s);
+    var price = query(tile, %(price)s);
+    var priceList = query(tile, %(price_list)s);
+    var content = query(tile, %(content)s);
+    var name = query(tile, %(name)s);
+    var link = query(tile, %(link)s);
+    return {
+        code: tile.getAttribute('data-asin'),
+        type_row: !!typeRow,
+        sponsored: !!query(typeRow, %(sponsored)s),
+        featured: !!query(typeRow, %(featured)s),
+        has_price: !!price,
+        price: firstSpan(price) ? firstSpan(price).innerHTML : null,
+        has_price_list: !!priceList,
+        price_list: firstSpan(priceList) ? firstSpan(priceList).innerHTML : null,
+        has_content: !!query(content, 'div'),
+        name: name ? name.textContent.trim() : null,
+        href: link ? link.getAttribute('href') : null
+    };
+});
+''' % {key: json.dumps(selector) for key, selector in {
+    'result': RESULT_SELECTOR,
+    'type': TYPE_SELECTOR,
+    'sponsored': SPONSORED_SELECTOR,
+    'featured': FEATURED_SELECTOR,
+    'price': PRICE_SELECTOR,
+    'price_list': PRICE_LIST_SELECTOR,
+    'content': CONTENT_SELECTOR,
+    'name': NAME_SELECTOR,
+    'link': LINK_SELECTOR,
+}.items()}
+
+
+def parse_price(price_raw:str):
+    """
+    Convierte el texto de un precio de Amazon ('$1,299.00') a float.
+    Parámetros:
+    price_raw (str): El texto del precio.
+    Devuelve:
+    float: El precio convertido.
+    """
+    return float(price_raw.replace('$', '').replace(',', '').strip())
+
+
+def get_type(has_type_row:bool, sponsored:bool, featured:bool):
+    """
+    Clasifica el tipo de producto según la fila de etiquetas del resultado.
+    Parámetros:
+    has_type_row (bool): Indica si el resultado tiene la fila de etiquetas.
+    sponsored (bool): Indica si la fila contiene la etiqueta de patrocinado.
+    featured (bool): Indica si la fila contiene la etiqueta de destacado.
+    Devuelve:
+    str: El tipo de producto ('standard', 'sponsored', 'featured' o None).
+    """
+    if not has_type_row:
+        return 'standard'
+    if featured:
+        return 'featured'
+    if sponsored:
+        return 'sponsored'
+    return None
+
+
+class ProductParser():
+    """
+    Clase que extrae los datos de los productos a partir del HTML de una página de resultados de Amazon.
+
+    A diferencia de los métodos basados en Selenium de `Amazonscraping`, el parser recibe el HTML
+    completo de la página (`driver.page_source`) y extrae todos los campos sin realizar llamadas
+    al WebDriver, por lo que también puede utilizarse con archivos HTML guardados. Con `parse_tiles`
+    también procesa los campos obtenidos en el navegador con `TILE_SCRIPT`.
+
+    Los campos ausentes se clasifican sin lanzar excepciones y sin registrar una línea de log por
+    producto: los productos sin precio o sin precio de lista se cuentan en `parse_anomalies` y los
+    campos que no se pudieron obtener en `parse_failures`, ambos con la etiqueta `field`.
+
+    Atributos:
+    tag_associates (str): El tag de asociados de Amazon que se agrega a los links (opcional).
+    domain (str): El dominio utilizado para completar los links relativos.
+    features (str): El parser de BeautifulSoup a utilizar ('lxml' o 'html.parser').
+    """
+
+
+    def __init__(self, tag_associates:str=None, domain:str=AMAZON_DOMAIN, features:str='lxml'):
+        self.tag_associates = tag_associates
+        self.domain = domain
+        self.features = features
+
+
+    def get_soup(self, html:str):
+        """
+        Construye el árbol de BeautifulSoup del HTML proporcionado.
+        Parámetros:
+        html (str): El HTML de la página.
+        Devuelve:
+        BeautifulSoup: El árbol del documento.
+        """
+        try:
+            return BeautifulSoup(html, self.features)
+        except Exception:
+            # lxml no disponible
+            return BeautifulSoup(html, 'html.parser')
+
+
+    def get_product_elements(self, soup):
+        """
+        Obtiene los elementos de resultados de búsqueda de la página.
+        Parámetros:
+        soup: El árbol del documento o un elemento contenedor.
+        Devuelve:
+        list: La lista de elementos de productos.
+        """
+        return soup.select(RESULT_SELECTOR)
+
+
+    def get_product_code(self, product_element):
+        """
+        Obtiene el código del producto (ASIN) desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene el código del producto.
+        Devuelve:
+        str: El código del producto o None si no se puede obtener.
+        """
+        return product_element.get('data-asin')
+
+
+    def get_product_name(self, product_element):
+        """
+        Obtiene el nombre del producto desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene el nombre del producto.
+        Devuelve:
+        str: El nombre del producto o None si no se puede obtener.
+        """
+        product_name_element = product_element.select_one(NAME_SELECTOR)
+        if product_name_element is None:
+            METRICS.incr('parse_failures', field='name')
+            return None
+        return product_name_element.get_text(strip=True)
+
+
+    def get_product_type(self, product_element):
+        """
+        Obtiene el tipo de producto desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene la información sobre el tipo de producto.
+        Devuelve:
+        str: El tipo de producto ('standard', 'sponsored', 'featured' o None).
+        """
+        sponsored_element = product_element.select_one(TYPE_SELECTOR)
+        if sponsored_element is None:
+            return 'standard'
+        return get_type(
+            True,
+            sponsored_element.select_one(SPONSORED_SELECTOR) is not None,
+            sponsored_element.select_one(FEATURED_SELECTOR) is not None,
+        )
+
+
+    def get_price_value(self, price_element):
+        """
+        Obtiene el valor de un elemento de precio ('a-price'), leyendo el contenido de su primer span.
+        Parámetros:
+        price_element: El elemento de precio.
+        Devuelve:
+        float: El precio o None si no se puede obtener.
+        """
+        price_span = price_element.find('span', recursive=False)
+        if price_span is None:
+            return None
+        return self.get_price_text_value(price_span.decode_contents())
+
+
+    def get_price_text_value(self, price_raw:str):
+        """
+        Convierte el texto de un precio, contando los textos que no son un precio válido.
+        Parámetros:
+        price_raw (str): El texto del precio.
+        Devuelve:
+        float: El precio o None si no se puede obtener.
+        """
+        if price_raw is None:
+            return None
+        try:
+            return parse_price(price_raw)
+        except ValueError:
+            METRICS.incr('parse_failures', field='price_value')
+            return None
+
+
+    def classify_missing_price(self, has_content:bool):
+        """
+        Clasifica un producto sin elemento de precio. Si el resultado tiene contenido (por ejemplo,
+        'Ver opciones de compra'), el producto no tiene precio y se considera 0.00.
+        Parámetros:
+        has_content (bool): Indica si el resultado tiene contenido.
+        Devuelve:
+        float: 0.00 o None si no se puede obtener el precio.
+        """
+        if has_content:
+            METRICS.incr('parse_anomalies', field='price')
+            return 0.00
+        METRICS.incr('parse_failures', field='price')
+        return None
+
+
+    def get_product_price(self, product_element):
+        """
+        Obtiene el precio del producto desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene la información sobre el precio del producto.
+        Devuelve:
+        float: El precio del producto, 0.00 si el producto no tiene precio o None si no se puede obtener.
+        """
+        product_price_element = product_element.select_one(PRICE_SELECTOR)
+        if product_price_element is not None:
+            return self.get_price_value(product_price_element)
+        product_content_element = product_element.select_one(CONTENT_SELECTOR)
+        return self.classify_missing_price(product_content_element is not None and product_content_element.find('div') is not None)
+
+
+    def get_product_price_list(self, product_element):
+        """
+        Obtiene el precio de lista del producto desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene la información sobre el precio de lista del producto.
+        Devuelve:
+        float: El precio de lista del producto o 0.00 si el producto no tiene descuento.
+        """
+        product_price_list_element = product_element.select_one(PRICE_LIST_SELECTOR)
+        if product_price_list_element is None:
+            METRICS.incr('parse_anomalies', field='price_list')
+            return 0.00
+        return self.get_price_value(product_price_list_element)
+
+
+    def get_product_link(self, product_element, product_code):
+        """
+        Obtiene el enlace del producto desde el elemento proporcionado.
+        Parámetros:
+        product_element: El elemento que contiene el enlace del producto.
+        product_code (str): El código del producto.
+        Devuelve:
+        str: El enlace del producto o None si no se puede obtener.
+        """
+        product_link_element = product_element.select_one(LINK_SELECTOR)
+        return self.build_product_link(product_link_element.get('href') if product_link_element is not None else None, product_code)
+
+
+    def build_product_link(self, href:str, product_code:str):
+        """
+        Construye el enlace limpio del producto ('<dominio>/<slug>/dp/<ASIN>/') a partir del href del resultado.
+        Parámetros:
+        href (str): El href del enlace del resultado (absoluto o relativo).
+        product_code (str): El código del producto.
+        Devuelve:
+        str: El enlace del producto o None si no se puede obtener.
+        """
+        if not href or not product_code:
+            METRICS.incr('parse_failures', field='link')
+            return None
+        product_link = urljoin(self.domain, href)
+        if product_code not in product_link:
+            METRICS.incr('parse_failures', field='link')
+            return None
+        product_link = f'{product_link[:product_link.index(product_code)]}{product_code}/'
+        if self.tag_associates:
+            product_link = f'{product_link}&tag={self.tag_associates}'
+        return product_link
+
+
+    def parse_product(self, product_element, changed=None):
+        """
+        Extrae todos los campos de un elemento de producto.
+        Parámetros:
+        product_element: El elemento del producto.
+        changed (function): Función `changed(code, price, price_list, type)` que indica si el producto
+        cambió desde la última ejecución (opcional). Si devuelve False, no se extraen los demás campos.
+        Devuelve:
+        dict: Un diccionario con las llaves 'code', 'name', 'type', 'price', 'price_list' y 'link',
+        o None si el producto no cambió.
+        """
+        product_code = self.get_product_code(product_element)
+        product_type = self.get_product_type(product_element)
+        product_price = self.get_product_price(product_element)
+        product_price_list = self.get_product_price_list(product_element)
+        if changed is not None and not changed(product_code, product_price, product_price_list, product_type):
+            return None
+        return {
+            'code': product_code,
+            'name': self.get_product_name(product_element),
+            'type': product_type,
+            'price': product_price,
+            'price_list': product_price_list,
+            'link': self.get_product_link(product_element, product_code),
+        }
+
+
+    def parse_tile(self, tile:dict, changed=None):
+        """
+        Construye los campos de un producto a partir de los datos obtenidos en el navegador con `TILE_SCRIPT`.
+        Parámetros:
+        tile (dict): Los datos del resultado devueltos por el script.
+        changed (function): Función que indica si el producto cambió (ver `parse_product`) (opcional).
+        Devuelve:
+        dict: Un diccionario con las llaves 'code', 'name', 'type', 'price', 'price_list' y 'link',
+        o None si el producto no cambió.
+        """
+        product_code = tile.get('code')
+        product_type = get_type(tile.get('type_row'), tile.get('sponsored'), tile.get('featured'))
+        if tile.get('has_price'):
+            product_price = self.get_price_text_value(tile.get('price'))
+        else:
+            product_price = self.classify_missing_price(tile.get('has_content'))
+        if tile.get('has_price_list'):
+            product_price_list = self.get_price_text_value(tile.get('price_list'))
+        else:
+            METRICS.incr('parse_anomalies', field='price_list')
+            product_price_list = 0.00
+        if changed is not None and not changed(product_code, product_price, product_price_list, product_type):
+            return None
+        product_name = tile.get('name')
+        if not product_name:
+            METRICS.incr('parse_failures', field='name')
+        return {
+            'code': product_code,
+            'name': product_name or None,
+            'type': product_type,
+            'price': product_price,
+            'price_list': product_price_list,
+            'link': self.build_product_link(tile.get('href'), product_code),
+        }
+
+
+    def parse_tiles(self, tiles:list, changed=None):
+        """
+        Construye los campos de todos los productos obtenidos en el navegador con `TILE_SCRIPT`.
+        Parámetros:
+        tiles (list): Los datos de cada resultado devueltos por el script.
+        changed (function): Función que indica si un producto cambió (ver `parse_product`). Los
+        productos sin cambios se omiten (opcional).
+        Devuelve:
+        list: Una lista de diccionarios con los datos de cada producto.
+        """
+        products = [self.parse_tile(tile, changed) for tile in tiles or []]
+        products = [product for product in products if product is not None]
+        METRICS.incr('products_parsed', len(products), backend='selenium')
+        return products
+
+
+    def parse_soup(self, soup, changed=None):
+        """
+        Extrae los datos de todos los productos de un árbol de documento ya construido.
+        Parámetros:
+        soup: El árbol del documento.
+        changed (function): Función que indica si un producto cambió (ver `parse_product`). Los
+        productos sin cambios se omiten (opcional).
+        Devuelve:
+        list: Una lista de diccionarios con los datos de cada producto.
+        """
+        products = [self.parse_product(element, changed) for element in self.get_product_elements(soup)]
+        products = [product for product in products if product is not None]
+        METRICS.incr('products_parsed', len(products), backend='html')
+        return products
+
+
+    def parse_products(self, html:str, changed=None):
+        """
+        Extrae los datos de todos los productos de una página de resultados.
+        Parámetros:
+        html (str): El HTML de la página (por ejemplo `driver.page_source`).
+        changed (function): Función que indica si un producto cambió (ver `parse_product`) (opcional).
+        Devuelve:
+        list: Una lista de diccionarios con los datos de cada producto.
+        """
+        return self.parse_soup(self.get_soup(html), changed)
+
+
+    def has_results(self, soup):
+        """
+        Indica si la página contiene elementos de resultados de búsqueda.
+        Parámetros:
+        soup: El árbol del documento.
+        Devuelve:
+        bool: True si existe al menos un resultado de búsqueda.
+        """
+        return soup.select_one(RESULT_SELECTOR) is not None
+
+
+    def get_next_page_url(self, soup):
+        """
+        Obtiene la URL de la siguiente página de resultados.
+        Parámetros:
+        soup: El árbol del documento.
+        Devuelve:
+        str: La URL de la siguiente página o None si no existe.
+        """
+        next_page_element = soup.select_one(NEXT_PAGE_SELECTOR)
+        if next_page_element is None or not next_page_element.get('href'):
+            return None
+        return urljoin(self.domain, next_page_element['href'])
+
+
+    def get_filter_url(self, soup, filter_key:str):
+        """
+        Obtiene la URL que aplica el filtro de Amazon con el identificador proporcionado.
+        Parámetros:
+        soup: El árbol del documento.
+        filter_key (str): El identificador del elemento del filtro (por ejemplo 'p_n_deal_type/23565477011').
+        Devuelve:
+        str: La URL del filtro o None si no existe.
+        """
+        filter_element = soup.find(id=filter_key)
+        if filter_element is None:
+            return None
+        filter_link = filter_element.find('a')
+        if filter_link is None or not filter_link.get('href'):
+            return None
+        return urljoin(self.domain, filter_link['href'])
+
+
+    def get_detail_url(self, product_code:str):
+        """
+        Construye la URL de la página de detalle de un producto.
+        Parámetros:
+        product_code (str): El código del producto (ASIN).
+        Devuelve:
+        str: La URL de la página de detalle.
+        """
+        return urljoin(self.domain, f'/dp/{product_code}')
+
+
+    def get_detail_text(self, soup, selector:str):
+        """
+        Obtiene el texto del primer elemento que coincide con el selector CSS, con los espacios normalizados.
+        Parámetros:
+        soup: El árbol del documento.
+        selector (str): El selector CSS del elemento.
+        Devuelve:
+        str: El texto del elemento o None si no existe o está vacío.
+        """
+        element = soup.select_one(selector)
+        if element is None:
+            return None
+        text = ' '.join(element.get_text(' ', strip=True).split())
+        return text or None
+
+
+    def parse_detail(self, html:str):
+        """
+        Extrae los datos de la página de detalle de un producto: vendedor, calificación, cantidad de
+        calificaciones, disponibilidad y elegibilidad para Prime. Los campos que no se pudieron obtener
+        se devuelven como None y se cuentan en `detail_parse_failures`, con la etiqueta `field`.
+        Parámetros:
+        html (str): El HTML de la página de detalle.
+        Devuelve:
+        dict: Las llaves 'seller', 'rating', 'reviews', 'availability', 'in_stock' y 'prime'.
+        """
+        soup = self.get_soup(html)
+        seller = None
+        for selector in DETAIL_SELLER_SELECTORS:
+            seller = self.get_detail_text(soup, selector)
+            if seller:
+                break
+
+        rating = None
+        rating_element = soup.select_one(DETAIL_RATING_SELECTOR)
+        rating_text = rating_element.get('title') if rating_element is not None else None
+        rating_text = rating_text or self.get_detail_text(soup, DETAIL_RATING_TEXT_SELECTOR)
+        match = re.search(r'\d+(?:[.,]\d+)?', rating_text or '')
+        if match:
+            rating = float(match.group().replace(',', '.'))
+
+        reviews = None
+        digits = re.sub(r'\D', '', self.get_detail_text(soup, DETAIL_REVIEWS_SELECTOR) or '')
+        if digits:
+            reviews = int(digits)
+
+        availability = self.get_detail_text(soup, DETAIL_AVAILABILITY_SELECTOR)
+        in_stock = None
+        if availability:
+            in_stock = not any(marker in availability.lower() for marker in OUT_OF_STOCK_MARKERS)
+
+        detail = {
+            'seller': seller,
+            'rating': rating,
+            'reviews': reviews,
+            'availability': availability,
+            'in_stock': in_stock,
+            'prime': soup.select_one(DETAIL_PRIME_SELECTOR) is not None,
+        }
+        for field, value in detail.items():
+            if value is None:
+                METRICS.incr('detail_parse_failures', field=field)
+        return detail
+
+
+    def parse_file(self, filepath:str):
+        """
+        Extrae los datos de los productos de un archivo HTML guardado.
+        Parámetros:
+        filepath (str): La ruta del archivo HTML.
+        Devuelve:
+        list: Una lista de diccionarios con los datos de cada producto.
+        """
+        with open(filepath, 'r', encoding='utf-8') as html_file:
+            return self.parse_products(html_file.read())
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+PRODUCT_COLUMNS = ['code', 'name', 'price', 'price_list', 'discount', 'link', 'short_link', 'type', 'page', 'sended']
+RAW_COLUMNS = ['code', 'name', 'type', 'price', 'price_list', 'link', 'page']
+DETAIL_COLUMNS = ['seller', 'rating', 'reviews', 'availability', 'in_stock', 'prime']
+
+
+def get_empty_raw_dict():
+    """
+    Construye el diccionario vacío con las columnas crudas que emite la extracción.
+    Devuelve:
+    dict: Un diccionario con una lista vacía por cada columna cruda.
+    """
+    return {column: [] for column in RAW_COLUMNS}
+
+
+def get_discounts(price_list, price):
+    """
+    Calcula el porcentaje de descuento de todos los productos en una sola operación vectorizada.
+    Equivale a `Amazonscraping.get_discount` aplicado fila por fila: 0 cuando no hay precio de
+    lista y el porcentaje redondeado en caso contrario.
+    Parámetros:
+    price_list (array): Los precios de lista.
+    price (array): Los precios actuales.
+    Devuelve:
+    np.ndarray: Los porcentajes de descuento como enteros.
+    """
+    price_list = np.asarray(price_list, dtype='float64')
+    price = np.asarray(price, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discount = np.where(price_list > 0, np.round((price_list - price) / price_list * 100), 0)
+    return np.nan_to_num(discount, nan=0).astype('int64')
+
+
+def build_product_frame(raw_dict:dict):
+    """
+    Construye el DataFrame de productos a partir de las columnas crudas de la extracción,
+    calculando el descuento y la clasificación de tipo en una sola pasada vectorizada.
+    Parámetros:
+    raw_dict (dict): Un diccionario con las columnas crudas ('code', 'name', 'type', 'price',
+    'price_list', 'link', 'page').
+    Devuelve:
+    pd.DataFrame: El DataFrame con las columnas de `PRODUCT_COLUMNS`.
+    """
+    df = pd.DataFrame({
+        'code': pd.Series(raw_dict['code'], dtype='object'),
+        'name': pd.Series(raw_dict['name'], dtype='object'),
+        'price': pd.Series(raw_dict['price'], dtype='float64'),
+        'price_list': pd.Series(raw_dict['price_list'], dtype='float64'),
+        'link': pd.Series(raw_dict['link'], dtype='object'),
+        'type': pd.Series(raw_dict['type'], dtype='object'),
+        'page': pd.Series(raw_dict['page'], dtype='int64'),
+    })
+    df['discount'] = get_discounts(df['price_list'].to_numpy(), df['price'].to_numpy())
+    df.loc[df['price'] == 0, 'type'] = 'other'
+    df['short_link'] = ''
+    df['sended'] = False
+    return df[PRODUCT_COLUMNS]
+
+
+def select_discounts(df:pd.DataFrame, discount_rate:float, exclude_codes=None):
+    """
+    Selecciona los productos con descuento igual o mayor a `discount_rate`, sin duplicados y sin
+    los códigos excluidos, en una sola pasada vectorizada.
+    Parámetros:
+    df (pd.DataFrame): El DataFrame de productos.
+    discount_rate (float): La tasa de descuento mínima.
+    exclude_codes (iterable): Los códigos de productos a excluir (opcional).
+    Devuelve:
+    pd.DataFrame: Los productos con descuento.
+    """
+    mask = df['discount'].to_numpy() >= discount_rate
+    if exclude_codes:
+        mask &= ~df['code'].isin(exclude_codes).to_numpy()
+    return df[mask].drop_duplicates(subset=['code'])
+
+
+def render_messages(template, df:pd.DataFrame):
+    """
+    Renderiza en lote el mensaje de cada producto con una plantilla ya compilada.
+    Parámetros:
+    template (jinja2.Template): La plantilla compilada del mensaje.
+    df (pd.DataFrame): El DataFrame de productos con las columnas 'name', 'price', 'discount', 'link'
+    y, opcionalmente, 'short_link' (si tiene valor, se usa en lugar de 'link') y las columnas de
+    detalle de DETAIL_COLUMNS (los valores faltantes se pasan como None).
+    Devuelve:
+    list: Los mensajes renderizados, en el mismo orden que las filas.
+    """
+    render = template.render
+    short_links = df['short_link'] if 'short_link' in df else [''] * len(df)
+    detail_columns = [column for column in DETAIL_COLUMNS if column in df]
+    details = [
+        {column: None if pd.isna(value) else value for column, value in zip(detail_columns, values)}
+        for values in zip(*(df[column] for column in detail_columns))
+    ] if detail_columns else [{}] * len(df)
+    return [
+        render(product_name=name, price=price, discount=discount, link=short_link or link, **detail)
+        for name, price, discount, link, short_link, detail in zip(df['name'], df['price'], df['discount'], df['link'], short_links, details)
+    ]
@@ -0,0 +1,155 @@
+import logging
+import queue
+import threading
+import time
+
+from core.identity import is_driver_retired
+
+
+class WorkerStats():
+    """
+    Clase que acumula las métricas de rendimiento de un worker del pool.
+
+    Atributos:
+    name (str): El nombre del worker.
+    items (int): La cantidad de elementos procesados.
+    errors (int): La cantidad de elementos que terminaron con error.
+    products (int): La cantidad de productos obtenidos.
+    elapsed (float): El tiempo total de procesamiento en segundos.
+    """
+
+
+    def __init__(self, name:str):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.products = 0
+        self.elapsed = 0.0
+
+
+    def to_dict(self):
+        """
+        Devuelve las métricas del worker, incluyendo el rendimiento por minuto.
+        Devuelve:
+        dict: Un diccionario con las métricas del worker.
+        """
+        minutes = self.elapsed / 60
+        return {
+            'worker': self.name,
+            'items': self.items,
+            'errors': self.errors,
+            'products': self.products,
+            'elapsed': round(self.elapsed, 2),
+            'items_per_min': round(self.items / minutes, 2) if minutes else 0.0,
+            'products_per_min': round(self.products / minutes, 2) if minutes else 0.0,
+        }
+
+
+class ScrapingPool():
+    """
+    Clase que distribuye elementos de trabajo entre un conjunto de workers, cada uno con una
+    sesión de navegador de larga duración que se reutiliza para todos los elementos que procesa.
+
+    Atributos:
+    max_workers (int): La cantidad de workers (y de sesiones de navegador) simultáneos.
+    driver_factory (function): Función que crea una nueva sesión de navegador. Si es None, los
+    workers no abren navegadores y reciben `None` como sesión.
+    stats (list): Las métricas de cada worker de la última ejecución.
+    """
+
+
+    def __init__(self, max_workers:int, driver_factory):
+        self.max_workers = max(1, int(max_workers))
+        self.driver_factory = driver_factory
+        self.stats = []
+
+
+    def quit_driver(self, driver):
+        """
+        Cierra la sesión del navegador ignorando los errores.
+        Parámetros:
+        driver: La sesión del navegador.
+        """
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f'Error al cerrar el navegador {e}')
+
+
+    def worker(self, items:queue.Queue, func, stats:WorkerStats):
+        """
+        Procesa elementos de la cola hasta vaciarla, reutilizando la misma sesión de navegador.
+        Si el procesamiento de un elemento falla, o la identidad de la sesión entra en espera, la
+        sesión se descarta y se crea una nueva.
+        Parámetros:
+        items (queue.Queue): La cola de elementos a procesar.
+        func (function): Función `func(driver, item)` que procesa un elemento y devuelve la cantidad de productos.
+        stats (WorkerStats): Las métricas del worker.
+        """
+        driver = None
+        try:
+            while True:
+                try:
+                    item = items.get_nowait()
+                except queue.Empty:
+                    break
+                startt = time.time()
+                try:
+                    if driver is not None and is_driver_retired(driver):
+                        # La identidad de la sesión entró en espera
+                        self.quit_driver(driver)
+                        driver = None
+                    if driver is None and self.driver_factory is not None:
+                        driver = self.driver_factory()
+                    stats.products += func(driver, item) or 0
+                except Exception as e:
+                    stats.errors += 1
+                    logging.error(f'[{stats.name}] Error al procesar {item}: {e}')
+                    if driver is not None:
+                        self.quit_driver(driver)
+                        driver = None
+                finally:
+                    stats.items += 1
+                    stats.elapsed += time.time() - startt
+        finally:
+            if driver is not None:
+                self.quit_driver(driver)
+
+
+    def run(self, items:list, func):
+        """
+        Ejecuta `func` para cada elemento usando el pool de workers.
+        Parámetros:
+        items (list): Los elementos a procesar.
+        func (function): Función `func(driver, item)` que procesa un elemento y devuelve la cantidad de productos.
+        Devuelve:
+        list: Las métricas de cada worker.
+        """
+        work = queue.Queue()
+        for item in items:
+            work.put(item)
+
+        workers = min(self.max_workers, len(items)) or 1
+        self.stats = [WorkerStats(f'worker-{i+1}') for i in range(workers)]
+        threads = [
+            threading.Thread(target=self.worker, args=(work, func, stats), name=stats.name)
+            for stats in self.stats
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+
+    def log_stats(self):
+        """
+        Registra en el log el rendimiento de cada worker de la última ejecución.
+        """
+        for stats in self.stats:
+            data = stats.to_dict()
+            logging.info(
+                f'{data["worker"]}: {data["items"]} busquedas ({data["errors"]} con error), '
+                f'{data["products"]} productos en {data["elapsed"]}s '
+                f'[{data["items_per_min"]} busquedas/min, {data["products_per_min"]} productos/min]'
+            )
@@ -0,0 +1,96 @@
+import threading
+
+import pandas as pd
+
+from core.pipeline import PRODUCT_COLUMNS
+
+
+def format_source(search_val:str, filter:str=None, page:int=None):
+    """
+    Construye la etiqueta de una fuente (búsqueda, filtro y página) en la que se vio un producto.
+    Parámetros:
+    search_val (str): El valor de búsqueda.
+    filter (str): La descripción del filtro de Amazon (opcional).
+    page (int): La página de resultados (opcional).
+    Devuelve:
+    str: La etiqueta, por ejemplo 'audifonos[Envio gratis]:2'.
+    """
+    source = search_val if filter is None else f'{search_val}[{filter}]'
+    return source if page is None else f'{source}:{page}'
+
+
+class ProductRegistry():
+    """
+    Clase que registra, durante una ejecución, cada producto (ASIN) visto en cualquier búsqueda,
+    filtro o página. Solo la primera vez que aparece un producto se extraen todos sus campos y se
+    evalúa su descuento; las apariciones siguientes solo agregan su fuente como etiqueta. Al final
+    de la ejecución, el registro genera un único DataFrame consolidado con las fuentes de cada producto.
+
+    Atributos:
+    sources (dict): Las fuentes de cada producto: code -> lista de tuplas (search_val, filter, page).
+    products (dict): Los datos de los productos procesados: code -> fila del DataFrame de productos.
+    duplicates (int): La cantidad de apariciones repetidas omitidas.
+    """
+
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.products = {}
+        self.duplicates = 0
+
+
+    def add_sighting(self, code:str, source:tuple):
+        """
+        Registra una aparición de un producto.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        source (tuple): La fuente como una tupla (search_val, filter, page).
+        Devuelve:
+        bool: True si es la primera aparición del producto en la ejecución.
+        """
+        if not code:
+            return True
+        with self.lock:
+            sources = self.sources.get(code)
+            if sources is None:
+                self.sources[code] = [source]
+                return True
+            if source not in sources:
+                sources.append(source)
+            self.duplicates += 1
+            return False
+
+
+    def add_products(self, df:pd.DataFrame):
+        """
+        Guarda los datos de los productos procesados para la salida consolidada.
+        Parámetros:
+        df (pd.DataFrame): El DataFrame de productos.
+        """
+        records = df[PRODUCT_COLUMNS].to_dict('records')
+        with self.lock:
+            for record in records:
+                self.products.setdefault(record['code'], record)
+
+
+    def get_sources(self, code:str):
+        with self.lock:
+            return list(self.sources.get(code, []))
+
+
+    def to_frame(self):
+        """
+        Genera el DataFrame consolidado de la ejecución.
+        Devuelve:
+        pd.DataFrame: Los productos procesados con las columnas de `PRODUCT_COLUMNS`, las columnas
+        'search_val' y 'filter' de la primera fuente y la columna 'sources' con todas sus fuentes
+        separadas por ';'.
+        """
+        with self.lock:
+            df = pd.DataFrame(list(self.products.values()), columns=PRODUCT_COLUMNS)
+            sources = [self.sources.get(code) or [(None, None, None)] for code in df['code']]
+        df['search_val'] = [product_sources[0][0] for product_sources in sources]
+        df['filter'] = [product_sources[0][1] for product_sources in sources]
+        df['sources'] = [';'.join(format_source(*source) for source in product_sources if source[0]) for product_sources in sources]
+        return df
@@ -0,0 +1,295 @@
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core.identity import is_driver_retired
+from core.metrics import METRICS
+
+
+class TermSchedule():
+    """
+    Clase que representa la programación de un valor de búsqueda dentro del planificador.
+
+    Atributos:
+    term (str): El valor de búsqueda.
+    interval (float): El intervalo entre ejecuciones en segundos.
+    priority (int): La prioridad del valor de búsqueda; entre los pendientes se ejecuta primero el de mayor prioridad.
+    next_run (float): El instante (`time.monotonic`) de la próxima ejecución.
+    running (bool): Indica si la búsqueda se está ejecutando.
+    runs (int): La cantidad de ejecuciones terminadas.
+    skipped (int): La cantidad de ejecuciones omitidas porque la anterior seguía en curso.
+    last_products (int): La cantidad de productos de la última ejecución.
+    last_elapsed (float): La duración de la última ejecución en segundos.
+    """
+
+
+    def __init__(self, term:str, interval:float, priority:int=0):
+        self.term = term
+        self.interval = interval
+        self.priority = priority
+        self.next_run = 0.0
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+        self.last_products = 0
+        self.last_elapsed = 0.0
+
+
+    def __repr__(self):
+        return f'TermSchedule(term={self.term!r}, interval={self.interval}, priority={self.priority})'
+
+
+class DriverPool():
+    """
+    Clase que mantiene sesiones de navegador abiertas entre ejecuciones para reutilizarlas.
+
+    Atributos:
+    driver_factory (function): Función que crea una nueva sesión de navegador. Si es None, no se
+    abren navegadores y `acquire` devuelve None.
+    max_idle (int): La cantidad máxima de sesiones inactivas que se mantienen abiertas.
+    """
+
+
+    def __init__(self, driver_factory, max_idle:int=1):
+        self.driver_factory = driver_factory
+        self.max_idle = max(1, max_idle)
+        self.idle = queue.LifoQueue()
+
+
+    def acquire(self):
+        """
+        Obtiene una sesión inactiva o crea una nueva.
+        Devuelve:
+        La sesión del navegador o None si no se usan navegadores.
+        """
+        if self.driver_factory is None:
+            return None
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.driver_factory()
+
+
+    def release(self, driver, ok:bool=True):
+        """
+        Devuelve una sesión al pool. Las sesiones de ejecuciones fallidas, o cuya identidad entró en
+        espera, se cierran.
+        Parámetros:
+        driver: La sesión del navegador.
+        ok (bool): Indica si la ejecución que usó la sesión terminó sin errores.
+        """
+        if driver is None:
+            return
+        if ok and not is_driver_retired(driver) and self.idle.qsize() < self.max_idle:
+            self.idle.put(driver)
+        else:
+            self.quit_driver(driver)
+
+
+    def quit_driver(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f'Error al cerrar el navegador {e}')
+
+
+    def close(self):
+        """
+        Cierra todas las sesiones inactivas.
+        """
+        while True:
+            try:
+                self.quit_driver(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class Scheduler():
+    """
+    Clase que ejecuta el scraping de forma continua, con un intervalo y una prioridad por valor de
+    búsqueda. El proceso se mantiene activo entre ejecuciones, de modo que las sesiones del navegador,
+    la configuración, el índice de enviados y el histórico de precios se reutilizan en lugar de
+    iniciarse en cada ejecución.
+
+    Cada intervalo se varía aleatoriamente en ±`jitter` (proporción del intervalo) para no repetir
+    las búsquedas en instantes fijos. Si una búsqueda sigue en curso cuando vuelve a tocar, esa
+    ejecución se omite.
+
+    Atributos:
+    scraper (Amazonscraping): La instancia de scraping a ejecutar.
+    schedules (list): La programación (TermSchedule) de cada valor de búsqueda.
+    max_concurrency (int): La cantidad máxima de búsquedas simultáneas.
+    jitter (float): La variación aleatoria máxima de los intervalos, como proporción del intervalo.
+    tick (float): El tiempo máximo de espera entre revisiones de la programación en segundos.
+    """
+
+
+    def __init__(self, scraper, schedules:list, max_concurrency:int=1, jitter:float=0.1, tick:float=1.0):
+        self.scraper = scraper
+        self.schedules = schedules
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.jitter = max(0.0, jitter)
+        self.tick = tick
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='scheduler')
+        driver_factory = scraper.get_driver if scraper.fetch_mode == 'selenium' else None
+        self.driver_pool = DriverPool(driver_factory, self.max_concurrency)
+
+
+    @classmethod
+    def from_params(cls, scraper, params:dict):
+        """
+        Construye un Scheduler a partir de los parámetros de configuración.
+        Parámetros:
+        scraper (Amazonscraping): La instancia de scraping.
+        params (dict): Los parámetros de configuración ('search_values', 'schedule', 'schedule_jitter',
+        'schedule_max_concurrency', 'max_workers').
+        Devuelve:
+        Scheduler: La instancia configurada.
+        """
+        schedule = params.get('schedule', {})
+        default = schedule.get('default', {})
+        terms = schedule.get('terms', {})
+        schedules = []
+        for term in params.get('search_values', []):
+            term_params = {**default, **terms.get(term, {})}
+            schedules.append(TermSchedule(term, term_params.get('interval', 3600), term_params.get('priority', 0)))
+        return cls(
+            scraper,
+            schedules,
+            max_concurrency=params.get('schedule_max_concurrency', params.get('max_workers', 1)),
+            jitter=params.get('schedule_jitter', 0.1),
+        )
+
+
+    def get_delay(self, interval:float):
+        """
+        Calcula la espera hasta la próxima ejecución aplicando la variación aleatoria.
+        Parámetros:
+        interval (float): El intervalo en segundos.
+        Devuelve:
+        float: La espera en segundos.
+        """
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+    def get_due(self, now:float):
+        """
+        Obtiene las búsquedas cuya ejecución está pendiente, de mayor a menor prioridad.
+        Parámetros:
+        now (float): El instante actual (`time.monotonic`).
+        Devuelve:
+        list: Las programaciones pendientes.
+        """
+        due = [schedule for schedule in self.schedules if schedule.next_run <= now]
+        return sorted(due, key=lambda schedule: (-schedule.priority, schedule.next_run))
+
+
+    def run_term(self, schedule:TermSchedule, run_started:datetime=None):
+        """
+        Ejecuta el scraping de un valor de búsqueda con una sesión del pool de navegadores.
+        Parámetros:
+        schedule (TermSchedule): La programación del valor de búsqueda.
+        run_started (datetime): La fecha y hora de inicio de esta ejecución de la búsqueda (por defecto, ahora).
+        """
+        startt = time.time()
+        driver = None
+        ok = False
+        try:
+            driver = self.driver_pool.acquire()
+            schedule.last_products = self.scraper.scraping_worker(driver, schedule.term, run_started or datetime.now()) or 0
+            ok = True
+        except Exception as e:
+            logging.error(f'Error al procesar {schedule.term}: {e}')
+            METRICS.incr('scheduler_errors', term=schedule.term)
+        finally:
+            self.driver_pool.release(driver, ok)
+            # Cierra solo los archivos de resultados de esta búsqueda para que puedan leerse
+            self.scraper.output_writer.close(schedule.term)
+            schedule.last_elapsed = time.time() - startt
+            with self.lock:
+                schedule.running = False
+                schedule.runs += 1
+            logging.info(
+                f'Programador: {schedule.term} terminado en {schedule.last_elapsed:.2f}s '
+                f'({schedule.last_products} productos, ejecucion #{schedule.runs})'
+            )
+            try:
+                self.scraper.export_metrics()
+            except Exception as e:
+                logging.error(f'Error al exportar las métricas {e}')
+
+
+    def dispatch(self, now:float):
+        """
+        Lanza las búsquedas pendientes respetando el límite de concurrencia. Las búsquedas que siguen
+        en curso se omiten hasta su próximo intervalo.
+        Parámetros:
+        now (float): El instante actual (`time.monotonic`).
+        """
+        with self.lock:
+            active = sum(schedule.running for schedule in self.schedules)
+            for schedule in self.get_due(now):
+                if schedule.running:
+                    schedule.skipped += 1
+                    schedule.next_run = now + self.get_delay(schedule.interval)
+                    METRICS.incr('scheduler_skipped', term=schedule.term)
+                    logging.warning(f'Programador: {schedule.term} sigue en curso, se omite esta ejecucion')
+                    continue
+                if active >= self.max_concurrency:
+                    break
+                schedule.running = True
+                schedule.next_run = now + self.get_delay(schedule.interval)
+                active += 1
+                self.executor.submit(self.run_term, schedule, datetime.now())
+
+
+    def run(self, duration:float=None):
+        """
+        Ejecuta el planificador hasta que se llame a `stop` o se cumpla la duración indicada.
+        Parámetros:
+        duration (float): La duración máxima en segundos (opcional).
+        """
+        # Envía los mensajes que quedaron pendientes si el proceso anterior se interrumpió
+        self.scraper.flush_pending_messages()
+        startt = time.monotonic()
+        for schedule in self.schedules:
+            schedule.next_run = startt
+        logging.info(f'Programador iniciado: {len(self.schedules)} busquedas, concurrencia {self.max_concurrency}')
+        for schedule in self.schedules:
+            logging.info(f'Programador: {schedule.term} cada {schedule.interval}s (prioridad {schedule.priority})')
+        try:
+            while not self.stopped.is_set():
+                now = time.monotonic()
+                if duration is not None and now - startt >= duration:
+                    break
+                self.dispatch(now)
+                # Las búsquedas pendientes que esperan un lugar libre se revisan en cada `tick`
+                next_run = min((schedule.next_run for schedule in self.schedules if schedule.next_run > now), default=now + self.tick)
+                self.stopped.wait(min(self.tick, max(next_run - time.monotonic(), 0.05)))
+        finally:
+            self.close()
+
+
+    def stop(self):
+        """
+        Detiene el planificador. Las búsquedas en curso terminan antes de cerrar.
+        """
+        self.stopped.set()
+
+
+    def close(self):
+        """
+        Espera a que terminen las búsquedas en curso y cierra las sesiones del navegador.
+        """
+        self.executor.shutdown(wait=True)
+        self.driver_pool.close()
+        for schedule in self.schedules:
+            logging.info(
+                f'Programador: {schedule.term} {schedule.runs} ejecuciones, {schedule.skipped} omitidas'
+            )
@@ -1,45 +1,41 @@
-import json
 import logging
 import os
-import time
 import urllib
-import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import quote, quote_plus
 
 import pandas as pd
 import pytz
 from dotenv import load_dotenv
-from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 
-from core.base import BASE_PATH, Base
+from core.base import BASE_PATH, Base, Param
+from core.browser import BrowserFactory
+from core.checkpoint import RunJournal
+from core.delivery import DeliveryQueue
+from core.enrichment import EnrichmentService
+from core.fingerprint import FingerprintCache, make_fingerprint
+from core.history import PriceHistory
+from core.http import HttpFetcher
+from core.identity import IdentityPool, is_driver_retired
+from core.metrics import METRICS, timer
+from core.output import get_output_writer
+from core.parser import DETAIL_MARKER, RESULT_SELECTOR, TILE_SCRIPT, ProductParser, get_type
+from core.pipeline import build_product_frame, get_empty_raw_dict, render_messages, select_discounts
+from core.pool import ScrapingPool
+from core.registry import ProductRegistry
+from core.sent_index import SentIndex
+from core.shortlink import ShortLinkService
 from core.telegram import TelegramBot
+from core.throttle import Throttle, classify_page
+from core.waits import PageWaiter
 
 load_dotenv(BASE_PATH+'/.env/.env')
 
 TZ=os.getenv('TZ', 'America/Lima')
 
-def timer(func):
-    """
-    Decorador que mide el tiempo de ejecución de una función
-    Parámetros:
-    func (function): La función que se va a medir.
-    Devuelve:
-    function: Una función envoltorio que ejecuta `func` y registra el tiempo de inicio y finalización.
-    """
-    def wrapper(*args, **kwargs):
-        startt = time.time()
-        logging.info(f'INICIA {func.__name__}')
-        result = func(*args, **kwargs)
-        endt = time.time()
-        logging.info(f'FIN {func.__name__}')
-        logging.info(f'{"="*15} Tiempo de ejecución {func.__name__}: {timedelta(seconds=endt-startt)} {"="*25}')
-        return result
-
-    return wrapper
-
-
 class Amazonscraping(Base):
     """
     Clase que implementa funciones para realizar scraping de productos en Amazon.
@@ -51,20 +47,102 @@ class Amazonscraping(Base):
     amazon_filters (dict): Un diccionario que contiene los filtros de búsqueda de Amazon.
     download_df (bool): Indica si se deben descargar los resultados en formato DataFrame (por defecto, False).
     discount_rate (float): La tasa de descuento mínima requerida para considerar un producto como válido.
+    parser_backend (str): El motor de extracción de datos: 'html' (BeautifulSoup sobre `page_source`), 'selenium'
+    (un solo script por página) o 'elements' (una búsqueda de Selenium por campo, para comparar).
+    parser (ProductParser): Una instancia de ProductParser para extraer los datos desde el HTML de la página.
+    max_workers (int): La cantidad de sesiones de navegador que procesan búsquedas en paralelo (por defecto, 1).
+    fetch_mode (str): El modo de descarga de las páginas: 'selenium' o 'http' (sesión HTTP sin navegador,
+    con Selenium como respaldo cuando la página no contiene resultados).
+    http_fetcher (HttpFetcher): Una instancia de HttpFetcher para el modo 'http'.
+    page_waiter (PageWaiter): Una instancia de PageWaiter para esperar a que las páginas estén listas.
+    navigation (str): El modo de navegación: 'url' (URLs de página y filtro construidas directamente)
+    o 'click' (clics sobre los filtros y la paginación).
+    page_workers (int): La cantidad de páginas que se descargan en paralelo por búsqueda en modo 'http'.
+    browser_factory (BrowserFactory): La fábrica de sesiones del navegador según el parámetro `browser`.
+    identity_pool (IdentityPool): El pool de identidades de salida (proxy, User-Agent y cookies) de las
+    descargas HTTP y de las sesiones del navegador (None si no hay identidades configuradas).
+    throttle (Throttle): El control adaptativo de la tasa de descarga por host y sesión, con detección de bloqueos.
     telegram_bot (TelegramBot): Una instancia de la clase TelegramBot para enviar mensajes de Telegram.
+    message_template (jinja2.Template): La plantilla compilada de los mensajes de descuento.
+    delivery_queue (DeliveryQueue): La cola de entrega de mensajes de Telegram con límites de tasa.
+    sent_index (SentIndex): El índice persistente de ofertas enviadas por producto y chat.
+    use_price_history (bool): Indica si los precios obtenidos se agregan al histórico de precios.
+    history_filter (bool): Indica si se descartan los descuentos que no son bajos según el histórico.
+    price_history (PriceHistory): El histórico de precios por producto.
+    short_link_service (ShortLinkService): El servicio de links cortos de las ofertas enviadas (None si está desactivado).
+    enrichment_service (EnrichmentService): El servicio que completa las ofertas con los datos de la página de detalle
+    de cada producto (None si está desactivado).
+    incremental (bool): Indica si solo se procesan los productos nuevos o con cambios de precio desde la última ejecución.
+    fingerprints (FingerprintCache): La caché de huellas por producto del modo incremental (None si está desactivado).
+    output_writer (CsvOutputWriter | ParquetOutputWriter): El escritor de resultados según `output_format`.
+    consolidate_run (bool): Indica si `process` registra los productos de todas las búsquedas en un registro
+    de la ejecución, de modo que cada producto se procesa una sola vez y se guarda un único archivo de resultados.
+    product_registry (ProductRegistry): El registro de productos de la ejecución en curso (None fuera de `process`).
+    run_started (datetime): La fecha y hora de inicio de la ejecución actual.
+    resume_runs (bool): Indica si `process` reanuda la última ejecución interrumpida, omitiendo sus unidades terminadas.
+    journal (RunJournal): El diario de unidades terminadas y mensajes pendientes de las ejecuciones.
+
+    Los parámetros ajustables (`Param`) se leen de la configuración en cada uso, por lo que los cambios
+    de `config.json` llegan a las ejecuciones largas (daemon y scheduler) sin reiniciar el proceso.
     """
 
-
-    def __init__(self):
-        super().__init__()
+    use_amazon_filters = Param('use_amazon_filters', False)
+    search_values = Param('search_values', [])
+    amazon_filters = Param('amazon_filters', {})
+    download_df = Param('download_df', False)
+    discount_rate = Param('discount_rate')
+    parser_backend = Param('parser_backend', 'html')
+    fetch_mode = Param('fetch_mode', 'selenium')
+    navigation = Param('navigation', 'url')
+    use_price_history = Param('use_price_history', True)
+    history_filter = Param('history_filter', False)
+    consolidate_run = Param('consolidate_run', True)
+    resume_runs = Param('resume_runs', True)
+
+
+    def __init__(self, params:dict=None):
+        super().__init__(params)
         self.url = "https://www.amazon.com.mx//s?k=" 
-        self.use_amazon_filters = self.params.get('use_amazon_filters', False)
-        self.search_values = self.params.get('search_values', [])
-        self.amazon_filters = self.params.get('amazon_filters', {})
-        self.download_df = self.params.get('download_df', False)
-        self.discount_rate = self.params.get('discount_rate')
         self.tag_associates = self.params.get('tag_associates', False)
-        self.telegram_bot = TelegramBot()
+        self.parser = ProductParser(self.tag_associates)
+        self.max_workers = self.params.get('max_workers', 1)
+        self.http_fetcher = HttpFetcher.from_params(self.params, pool_size=self.max_workers)
+        self.page_waiter = PageWaiter(self.params.get('wait_timeouts', {}))
+        self.page_workers = self.params.get('page_workers', 4)
+        self.browser_factory = BrowserFactory.from_params(self.params, BASE_PATH)
+        self.identity_pool = IdentityPool.from_params(
+            self.params,
+            lambda proxy, user_agent: HttpFetcher.from_params(self.params, pool_size=max(1, self.page_workers), proxy=proxy, user_agent=user_agent),
+        )
+        self.throttle = Throttle(self.params.get('throttle', {}), max(1, self.page_workers), self.send_alert)
+        self.telegram_bot = TelegramBot(params)
+        self.message_template = self.jinja_env.get_template('message.html')
+        self.delivery_queue = DeliveryQueue.from_params(self.telegram_bot, self.params)
+        self.sent_index = SentIndex(
+            os.path.join(BASE_PATH, self.params.get('sent_index_path', 'data/sent_deals.db')),
+            realert_price_drop=self.params.get('realert_price_drop', 0),
+            realert_after_days=self.params.get('realert_after_days', 0),
+        )
+        self.sent_index.migrate_sended_csvs(os.path.join(BASE_PATH, 'sended'), list(self.telegram_bot.get_chat_group_ids()))
+        self.price_history = PriceHistory(os.path.join(BASE_PATH, self.params.get('price_history_path', 'data/price_history.db')))
+        self.short_link_service = ShortLinkService.from_params(self.params, BASE_PATH)
+        self.enrichment_service = EnrichmentService.from_params(
+            self.params,
+            BASE_PATH,
+            lambda url: self.fetch_html(url, marker=DETAIL_MARKER, channel='detail'),
+            self.parser,
+        )
+        self.incremental = self.params.get('incremental', True)
+        self.fingerprints = None
+        if self.incremental:
+            self.fingerprints = FingerprintCache(
+                os.path.join(BASE_PATH, self.params.get('fingerprint_path', 'data/fingerprints.db')),
+                ttl_hours=self.params.get('fingerprint_ttl_hours', 24),
+            )
+        self.output_writer = get_output_writer(self.params, BASE_PATH)
+        self.product_registry = None
+        self.run_started = datetime.now()
+        self.journal = RunJournal(os.path.join(BASE_PATH, self.params.get('checkpoint_path', 'data/checkpoint.db')))
 
 
     def send_alert(self, alert_msg, detail):
@@ -81,15 +159,23 @@ class Amazonscraping(Base):
             logging.error('Error al enviar mensaje de alerta')
 
 
-    def get_search_url(self, value:str):
+    def get_search_url(self, value:str, page:int=1, filter_key:str=None):
         """
         Construye y devuelve la URL de búsqueda en Amazon con el valor proporcionado.
         Parámetros:
         value (str): El valor de búsqueda para construir la URL.
+        page (int): El número de página (por defecto, 1).
+        filter_key (str): El identificador del filtro de Amazon a aplicar, por ejemplo
+        'p_n_deal_type/23565477011', que se envía en el parámetro `rh` (opcional).
         Devuelve:
         str: La URL de búsqueda completa.
         """
-        return f'{self.url}{value}'
+        url = f'{self.url}{quote_plus(value)}'
+        if filter_key:
+            url = f'{url}&rh={quote(filter_key.replace("/", ":"), safe=":")}'
+        if page > 1:
+            url = f'{url}&page={page}'
+        return url
 
 
     def get_product_code(self, product_element):
@@ -100,13 +186,9 @@ class Amazonscraping(Base):
         Devuelve:
         str: El código del producto o None si no se puede obtener.
         """
-        product_code = None
-        try:
-            product_code = product_element.get_attribute('data-asin')
-        except Exception as e:
-            logging.error('Error al obtener el codigo del producto')
-            logging.error(e.msg)            
-
+        product_code = product_element.get_attribute('data-asin')
+        if not product_code:
+            METRICS.incr('parse_failures', field='code')
         return product_code
 
 
@@ -118,16 +200,11 @@ class Amazonscraping(Base):
         Devuelve:
         str: El nombre del producto o None si no se puede obtener.
         """
-        product_name = None
-        try:
-            product_name_element = product_element.find_element(By.XPATH, './/span[@class="a-size-base-plus a-color-base a-text-normal"]')
-            product_name = product_name_element.text
-            logging.info(f'Producto: {product_name}')
-        except Exception as e:
-            logging.error('Error al obtener el nombre del producto')
-            logging.error(e.msg)
-
-        return product_name
+        product_name_elements = product_element.find_elements(By.XPATH, './/span[@class="a-size-base-plus a-color-base a-text-normal"]')
+        if not product_name_elements:
+            METRICS.incr('parse_failures', field='name')
+            return None
+        return product_name_elements[0].text
 
 
     def get_product_type(self, product_element):
@@ -138,16 +215,14 @@ class Amazonscraping(Base):
         Devuelve:
         str: El tipo de producto ('standard', 'sponsored', 'featured' u 'other').
         """
-        product_type = None
-        try:
-            sponsored_element = product_element.find_element(By.XPATH, './/div[@class="a-row a-spacing-micro"]')
-            if len(sponsored_element.find_elements(By.XPATH, './/span[@class="a-color-secondary"]')) > 0:
-                product_type = 'sponsored'
-            if len(sponsored_element.find_elements(By.XPATH, './/span[@class="a-size-micro a-color-secondary"]')) > 0:
-                product_type = 'featured'
-        except Exception as e:
-            product_type = 'standard'
-        return product_type
+        sponsored_elements = product_element.find_elements(By.XPATH, './/div[@class="a-row a-spacing-micro"]')
+        if not sponsored_elements:
+            return get_type(False, False, False)
+        return get_type(
+            True,
+            len(sponsored_elements[0].find_elements(By.XPATH, './/span[@class="a-color-secondary"]')) > 0,
+            len(sponsored_elements[0].find_elements(By.XPATH, './/span[@class="a-size-micro a-color-secondary"]')) > 0,
+        )
 
 
     def get_product_price(self, product_element):
@@ -158,24 +233,13 @@ class Amazonscraping(Base):
         Devuelve:
         float: El precio del producto o None si no se puede obtener.
         """
-        product_price = None
-        try:
-            product_price_element = product_element.find_element(By.XPATH, './/span[@class="a-price"]')
-            elements = product_price_element.find_elements(By.XPATH, 'span')
-            product_price_raw = elements[0].get_attribute('innerHTML')
-            product_price = float(product_price_raw.replace('$', '').replace(',', ''))
-        except NoSuchElementException as e:
-            logging.warn('Product sin precio')
-            product_content_elements = product_element.find_element(By.XPATH, './/div[@class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small"]')
-            if len(product_content_elements.find_elements(By.CSS_SELECTOR, 'div')):
-                product_price = 0.00
-            else:
-                logging.error(e)
-        except Exception as e:
-            logging.error('Error al obtener el precio del producto')
-            logging.error(e.msg)
-
-        return product_price
+        price_spans = product_element.find_elements(By.XPATH, './/span[@class="a-price"]/span')
+        if price_spans:
+            return self.parser.get_price_text_value(price_spans[0].get_attribute('innerHTML'))
+        if not product_element.find_elements(By.XPATH, './/span[@class="a-price"]'):
+            content_divs = product_element.find_elements(By.XPATH, './/div[@class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small"]//div')
+            return self.parser.classify_missing_price(len(content_divs) > 0)
+        return None
 
 
     def get_product_price_list(self, product_element):
@@ -186,19 +250,14 @@ class Amazonscraping(Base):
         Devuelve:
         float: El precio de lista del producto o None si no se puede obtener.
         """
-        product_price_list = None
-        try:
-            product_price_list_element = product_element.find_element(By.XPATH, './/span[@class="a-price a-text-price"]')
-            elements = product_price_list_element.find_elements(By.XPATH, 'span')
-            product_price_list_raw = elements[0].get_attribute('innerHTML')
-            product_price_list = float(product_price_list_raw.replace('$', '').replace(',', ''))
-        except NoSuchElementException as e:
-            logging.warn('Producto sin Descuento')
-            product_price_list = 0.00
-        except Exception as e:
-            logging.error('Error al obtener el precio de lista del producto')
-            logging.error(e)
-        return product_price_list
+        price_list_elements = product_element.find_elements(By.XPATH, './/span[@class="a-price a-text-price"]')
+        if not price_list_elements:
+            METRICS.incr('parse_anomalies', field='price_list')
+            return 0.00
+        price_list_spans = price_list_elements[0].find_elements(By.XPATH, 'span')
+        if not price_list_spans:
+            return None
+        return self.parser.get_price_text_value(price_list_spans[0].get_attribute('innerHTML'))
 
 
     def get_discount(self, price_list:float, price:float):
@@ -225,73 +284,209 @@ class Amazonscraping(Base):
         Devuelve:
         str: El enlace del producto o None si no se puede obtener.
         """
-        product_link = None
-        try:
-            product_link_element = product_element.find_element(By.XPATH, './/a[@class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal"]')
-            product_link = product_link_element.get_attribute('href')
-            product_link = f'{product_link[:product_link.index(product_code)]}{product_code}/'
-            if self.tag_associates:
-                product_link = f'{product_link}&tag={self.tag_associates}'
-        except Exception as e:
-            logging.error('Error al obtener link del producto')
-            logging.error(e)
-        return product_link
-
-
-    def get_short_link(self, product_link, product_code):
-        bitly_token = os.getenv('BITLY_TOKEN')
-        bitly_group = os.getenv('BITLY_GROUP')
-        bitly_domain = os.getenv('BITLY_DOMAIN')
-        bitly_url = f'{bitly_domain}/v4/bitlinks'
-        short_link = ''
-        headers = {
-            'Content-type': 'application/json',
-            'Authorization': f'Bearer {bitly_token}'
-        }
-        data = {
-            'group_guid': bitly_group,
-            'domain': 'bit.ly',
-            'title': product_code,
-            'long_url': product_link
+        product_link_elements = product_element.find_elements(By.XPATH, './/a[@class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal"]')
+        href = product_link_elements[0].get_attribute('href') if product_link_elements else None
+        return self.parser.build_product_link(href, product_code)
+
+
+    def get_short_link(self, product_link:str, product_code:str):
+        """
+        Obtiene el link corto de un producto desde el caché o lo crea con el servicio de links cortos.
+        Parámetros:
+        product_link (str): El link del producto.
+        product_code (str): El código del producto (ASIN).
+        Devuelve:
+        str: El link corto o una cadena vacía si no se pudo obtener o el servicio está desactivado.
+        """
+        if self.short_link_service is None:
+            return ''
+        links, errors = self.short_link_service.shorten_many([(product_code, product_link, product_code)])
+        if errors:
+            self.alert_short_link_errors(errors)
+        return links.get(product_code, '')
+
+
+    def alert_short_link_errors(self, errors:list):
+        """
+        Registra y envía una alerta con los errores al acortar links.
+        Parámetros:
+        errors (list): Los errores de cada link.
+        """
+        alert_message = 'Error al acortar el link del producto.'
+        detail = '\n'.join(errors[:10])
+        logging.error(alert_message)
+        logging.error(detail)
+        self.send_alert(alert_message, detail)
+
+
+    def get_empty_product_dict(self):
+        """
+        Construye el diccionario vacío con las columnas crudas de los datos de productos. El descuento,
+        la clasificación de tipo y el resto de columnas se calculan al generar el DataFrame.
+        Devuelve:
+        dict: Un diccionario con una lista vacía por cada columna cruda.
+        """
+        return get_empty_raw_dict()
+
+
+    def get_product_fields(self, product_element, changed=None):
+        """
+        Obtiene los campos del producto desde el elemento Web proporcionado usando Selenium.
+        En el modo incremental, el nombre y el link solo se obtienen si el producto cambió.
+        Parámetros:
+        product_element: El elemento Web del producto.
+        changed (function): Función que indica si el producto se debe procesar (por defecto, `is_product_changed`).
+        Devuelve:
+        dict: Un diccionario con las llaves 'code', 'name', 'type', 'price', 'price_list' y 'link',
+        o None si el producto no cambió.
+        """
+        product_code = self.get_product_code(product_element)
+        product_type = self.get_product_type(product_element)
+        product_price = self.get_product_price(product_element)
+        product_price_list = self.get_product_price_list(product_element)
+        changed = changed or self.is_product_changed
+        if not changed(product_code, product_price, product_price_list, product_type):
+            return None
+        return {
+            'code': product_code,
+            'name': self.get_product_name(product_element),
+            'type': product_type,
+            'price': product_price,
+            'price_list': product_price_list,
+            'link': self.get_product_link(product_element, product_code),
         }
-        res = requests.post(bitly_url, body=json.dumps(data), headers=headers)
-        if res.status_code == 200:
-            data = res.json()
-            short_link = data['link']
-        else:
-            alert_message = 'Error al acortar el link del producto.'
-            detail = res.text
-            logging.error(detail)
-            logging.error(alert_message)
-            self.send_alert(alert_message, detail)
 
-        return short_link
 
+    def is_product_changed(self, code:str, price:float, price_list:float, product_type:str, search_val:str=None, filter:str=None):
+        """
+        Indica si un producto es nuevo o cambió su precio, precio de lista o tipo desde la última
+        ejecución, según la caché de huellas. Sin el modo incremental todos los productos se procesan.
+        El precio de un producto sin cambios se registra igualmente en el histórico de precios, ya
+        que el producto no llega a `process_product_dict`.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        price (float): El precio del producto.
+        price_list (float): El precio de lista del producto.
+        product_type (str): El tipo de producto.
+        search_val (str): El valor de búsqueda del que proviene el producto (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        Devuelve:
+        bool: True si el producto se debe procesar.
+        """
+        if self.fingerprints is None:
+            return True
+        if self.fingerprints.is_changed(code, make_fingerprint(price, price_list, product_type)):
+            return True
+        METRICS.incr('products_unchanged')
+        if self.use_price_history:
+            self.price_history.record(code, price, price_list, search_val, filter)
+        return False
 
-    def get_product_data(self, driver):
+
+    def get_product_filter(self, search_val:str=None, filter:str=None, page:int=None):
         """
-        Realiza el scraping de datos de los productos en la página web.
+        Construye la función que decide, durante la extracción, si un producto de una página se
+        procesa. Durante `process` los productos se registran en el registro de la ejecución: un
+        producto ya visto en otra búsqueda, filtro o página solo agrega la fuente y se omite. Los
+        productos sin cambios se registran en el histórico de precios con su búsqueda y filtro.
+        Parámetros:
+        search_val (str): El valor de búsqueda de la página (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        page (int): La página de resultados (opcional).
+        Devuelve:
+        function: Una función `changed(code, price, price_list, type)`.
+        """
+        registry = self.product_registry
+        if search_val is None:
+            return self.is_product_changed
+        source = (search_val, filter, page)
+
+        def changed(code, price, price_list, product_type):
+            if registry is not None and not registry.add_sighting(code, source):
+                METRICS.incr('products_duplicated')
+                return False
+            return self.is_product_changed(code, price, price_list, product_type, search_val, filter)
+
+        return changed
+
+
+    def filter_products(self, products:list, search_val:str=None, filter:str=None, page:int=None):
+        """
+        Aplica a productos ya extraídos (por ejemplo, por un worker de la cola distribuida) el mismo
+        filtro que se aplica durante la extracción: registro de la ejecución y modo incremental.
+        Parámetros:
+        products (list): Los datos de los productos.
+        search_val (str): El valor de búsqueda (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        page (int): La página de resultados (opcional).
+        Devuelve:
+        list: Los productos que se deben procesar.
+        """
+        changed = self.get_product_filter(search_val, filter, page)
+        return [
+            product for product in products
+            if changed(product['code'], product['price'], product['price_list'], product['type'])
+        ]
+
+
+    def add_product(self, product_dict:dict, product:dict, active_page:int):
+        """
+        Agrega los campos crudos de un producto al diccionario de datos de productos.
+        Parámetros:
+        product_dict (dict): El diccionario de datos de productos.
+        product (dict): Los campos extraídos del producto.
+        active_page (int): La página en la que se encontró el producto.
+        """
+        product_dict['code'].append(product['code'])
+        product_dict['name'].append(product['name'])
+        product_dict['type'].append(product['type'])
+        product_dict['price'].append(product['price'])
+        product_dict['price_list'].append(product['price_list'])
+        product_dict['link'].append(product['link'])
+        product_dict['page'].append(active_page)
+
+
+    def get_driver_products(self, driver, changed=None):
+        """
+        Extrae los campos de todos los productos de la página cargada en el navegador. Con el motor
+        'selenium', los campos de todos los productos se obtienen con un solo script (`TILE_SCRIPT`);
+        con el motor 'elements', cada campo se obtiene con `get_product_fields` (varias llamadas al
+        WebDriver por producto), como referencia para comparar los resultados y el rendimiento.
+        Parámetros:
+        driver: Una instancia del navegador web con la página cargada.
+        changed (function): Función que indica si un producto se debe procesar (por defecto, `is_product_changed`).
+        Devuelve:
+        list: Una lista de diccionarios con los datos de cada producto.
+        """
+        changed = changed or self.is_product_changed
+        with METRICS.span('parse', backend=self.parser_backend):
+            if self.parser_backend == 'html':
+                return self.parser.parse_products(driver.page_source, changed)
+            if self.parser_backend == 'elements':
+                products = [
+                    self.get_product_fields(product_element, changed)
+                    for product_element in driver.find_elements(By.CSS_SELECTOR, RESULT_SELECTOR)
+                ]
+                products = [product for product in products if product is not None]
+                METRICS.incr('products_parsed', len(products), backend='elements')
+                return products
+            # Una sola llamada al WebDriver por página en lugar de varias búsquedas por producto
+            return self.parser.parse_tiles(driver.execute_script(TILE_SCRIPT), changed)
+
+
+    def iter_driver_pages(self, driver, search_val:str=None, filter:str=None):
+        """
+        Recorre las páginas de resultados cargadas en el navegador, haciendo clic en la paginación
+        hasta `pagination_level`, y entrega los productos de cada página en cuanto se extraen.
         Parámetros:
         driver: Una instancia del navegador web para interactuar con la página.
+        search_val (str): El valor de búsqueda, para el registro de productos de la ejecución (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
         Devuelve:
-        dict: Un diccionario con los datos de los productos obtenidos del scraping.
+        generator: Tuplas (page, products) con el número de página y la lista de productos extraídos.
         """
-        page = 1
         page_limit = self.params.get('pagination_level', 1)
-        product_list = driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
-        product_dict = {
-            'code': [],
-            'name': [],
-            'price': [],
-            'price_list': [],
-            'discount': [],
-            'link': [],
-            'short_link': [],
-            'type': [],
-            'page': [],
-            'sended': []
-        }
-        for active_page in range(page, page_limit+1):
+        for active_page in range(1, page_limit+1):
             logging.info('='*50)
             logging.info(f'Pagina #: {active_page}')
             logging.info('='*50)
@@ -308,217 +503,712 @@ class Amazonscraping(Base):
                 except Exception as e:
                     logging.error('Error al realizar la paginación')
                 if next_page_element.text == str(active_page):
-                    next_page_element.click()
-                    time.sleep(8)
-                    product_list = driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
-
-            # Iteración de la lista de productos
-            for i, product_element in enumerate(product_list):
-
-                # Codigo del Producto
-                product_code = self.get_product_code(product_element)
-
-                # Nombre del Producto
-                product_name = self.get_product_name(product_element)
-
-                # Tipo de Producto
-                product_type = self.get_product_type(product_element)
-
-                # Precio del Producto
-                product_price = self.get_product_price(product_element)
-                if product_price == 0.00:
-                    product_type = 'other'
-
-                # Precio de Lista del producto
-                product_price_list = self.get_product_price_list(product_element)
-
-                # Descuento
-                discount = self.get_discount(product_price_list, product_price)
-
-                # Link del Producto
-                product_link = self.get_product_link(product_element, product_code)
-
-                # Link corto del Producto
-                # short_link = self.get_short_link(product_dict, product_code)
-                short_link = ''
-
-                product_dict['code'].append(product_code)
-                product_dict['name'].append(product_name)
-                product_dict['price_list'].append(product_price_list)
-                product_dict['price'].append(product_price)
-                product_dict['discount'].append(discount)
-                product_dict['type'].append(product_type)
-                product_dict['link'].append(product_link)
-                product_dict['short_link'].append(short_link)
-                product_dict['page'].append(active_page)
-                product_dict['sended'].append(False)
+                    old_result = self.page_waiter.get_first_result(driver)
+                    with METRICS.span('page_load', mode='selenium'):
+                        next_page_element.click()
+                        self.page_waiter.wait_for_page(driver, active_page, old_result)
+                    METRICS.incr('pages_fetched', mode='selenium')
+
+            yield active_page, self.get_driver_products(driver, self.get_product_filter(search_val, filter, active_page))
+
+
+    def get_product_data(self, driver, search_val:str=None, filter:str=None):
+        """
+        Realiza el scraping de datos de los productos en la página web, acumulando todas las páginas.
+        Parámetros:
+        driver: Una instancia del navegador web para interactuar con la página.
+        search_val (str): El valor de búsqueda, para el registro de productos de la ejecución (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        Devuelve:
+        dict: Un diccionario con los datos de los productos obtenidos del scraping.
+        """
+        product_dict = self.get_empty_product_dict()
+        for active_page, products in self.iter_driver_pages(driver, search_val, filter):
+            for product in products:
+                self.add_product(product_dict, product, active_page)
         return product_dict
 
 
-    def get_product_df(self, product_dict:dict, filename:str):
+    def iter_http_pages(self, soup, search_val:str=None, filter:str=None):
         """
-        Genera un DataFrame a partir del diccionario de datos de los productos.
+        Recorre las páginas de resultados descargadas por HTTP, siguiendo los links de paginación
+        hasta `pagination_level`, y entrega los productos de cada página en cuanto se extraen.
         Parámetros:
-        product_dict (dict): Un diccionario con los datos de los productos.
-        filename (str): El nombre del archivo para descargar los resultados.
+        soup: El árbol del documento de la primera página de resultados.
+        search_val (str): El valor de búsqueda, para el registro de productos de la ejecución (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        Devuelve:
+        generator: Tuplas (page, products) con el número de página y la lista de productos extraídos.
+        """
+        page_limit = self.params.get('pagination_level', 1)
+        for active_page in range(1, page_limit+1):
+            logging.info('='*50)
+            logging.info(f'Pagina #: {active_page}')
+            logging.info('='*50)
+
+            # Paginación
+            if active_page > 1:
+                next_page_url = self.parser.get_next_page_url(soup)
+                if next_page_url is None:
+                    logging.error('No existen mas paginas')
+                    break
+                html = self.fetch_html(next_page_url, active_page)
+                if html is None:
+                    logging.error('Error al realizar la paginación')
+                    break
+                soup = self.parser.get_soup(html)
+
+            yield active_page, self.parser.parse_soup(soup, self.get_product_filter(search_val, filter, active_page))
+
+
+    def get_page_units(self, search_val:str):
+        """
+        Construye las unidades de trabajo (filtro, página) de un valor de búsqueda con sus URLs.
+        Parámetros:
+        search_val (str): El valor de búsqueda.
+        Devuelve:
+        list: Una lista de tuplas (filter_key, filter, page, url). Si no se usan filtros de Amazon,
+        `filter_key` y `filter` son None.
+        """
+        page_limit = self.params.get('pagination_level', 1)
+        filters = list(self.amazon_filters.items()) if self.use_amazon_filters else [(None, None)]
+        return [
+            (key, filter, page, self.get_search_url(search_val, page, key))
+            for key, filter in filters
+            for page in range(1, page_limit+1)
+        ]
+
+
+    def fetch_html(self, url:str, page:int=1, marker:str='s-search-result', channel:str=None):
+        """
+        Descarga una página de resultados por HTTP respetando el control de tasa del host, que se
+        ajusta según el resultado de la descarga (bloqueo, grilla vacía, error o latencia). Con un
+        pool de identidades, cada descarga usa la identidad asignada y su propio control de tasa.
+        Parámetros:
+        url (str): La URL de la página.
+        page (int): La página de resultados, para distinguir una grilla vacía del final de la paginación.
+        marker (str): El texto que indica que la página tiene contenido (por defecto, los resultados de búsqueda).
+        channel (str): El tipo de descarga con su propio control de tasa (por ejemplo, 'detail'), para que
+        sus resultados no modifiquen la tasa de las páginas de búsqueda del mismo host (opcional).
+        Devuelve:
+        str: El HTML de la página o None si la descarga falla.
+        """
+        identity = self.identity_pool.acquire() if self.identity_pool is not None else None
+        fetcher = identity.fetcher if identity is not None else self.http_fetcher
+        outcome = None
+        try:
+            session = '-'.join(name for name in (identity.name if identity is not None else None, channel) if name)
+            with self.throttle.slot(url, session or None) as slot:
+                status_code, html = fetcher.fetch(url)
+                slot['outcome'] = outcome = classify_page(status_code, html, html is not None and marker in html, page)
+        finally:
+            if identity is not None:
+                self.identity_pool.release(identity, outcome)
+        return html
+
+
+    def get_http_page_products(self, url:str, changed=None, page:int=1):
+        """
+        Descarga una página de resultados por HTTP y extrae sus productos. La descarga respeta el
+        control de tasa del host, que se ajusta según el resultado (bloqueo, grilla vacía, latencia).
+        Parámetros:
+        url (str): La URL de la página.
+        changed (function): Función que indica si un producto se debe procesar (por defecto, `is_product_changed`).
+        page (int): La página de resultados, para distinguir una grilla vacía del final de la paginación.
+        Devuelve:
+        list: Los datos de los productos de la página o None si la página no contiene resultados.
+        """
+        html = self.fetch_html(url, page)
+        if html is None:
+            return None
+        with METRICS.span('parse', backend='html'):
+            soup = self.parser.get_soup(html)
+            if not self.parser.has_results(soup):
+                return None
+            return self.parser.parse_soup(soup, changed or self.is_product_changed)
+
+
+    def get_driver_page_products(self, driver, url:str, changed=None, page:int=1):
+        """
+        Carga una página de resultados en el navegador y extrae sus productos. La carga respeta el
+        control de tasa de la sesión, que se ajusta según el resultado (captcha, grilla vacía, latencia).
+        Parámetros:
+        driver: Una instancia del navegador web.
+        url (str): La URL de la página.
+        changed (function): Función que indica si un producto se debe procesar (por defecto, `is_product_changed`).
+        page (int): La página de resultados, para distinguir una grilla vacía del final de la paginación.
+        Devuelve:
+        list: Los datos de los productos de la página o None si la página no contiene resultados.
+        """
+        with self.throttle.slot(url, getattr(driver, 'session_name', 'selenium')) as slot:
+            with METRICS.span('page_load', mode='selenium'):
+                driver.get(url)
+                has_results = self.page_waiter.wait_for_results(driver)
+            slot['outcome'] = classify_page(html='' if has_results else driver.page_source, has_results=has_results, page=page)
+        if getattr(driver, 'identity', None) is not None:
+            self.identity_pool.record(driver.identity, slot['outcome'])
+        if not has_results:
+            return None
+        METRICS.incr('pages_fetched', mode='selenium')
+        return self.get_driver_products(driver, changed)
+
+
+    def iter_url_pages(self, search_val:str, driver=None):
+        """
+        Recorre todas las páginas y filtros de un valor de búsqueda navegando directamente a sus
+        URLs y entrega los productos de cada página en cuanto están disponibles. En el modo 'http'
+        las páginas se descargan en paralelo y se entregan en el orden en que terminan; en el modo
+        'selenium' se cargan una tras otra en el navegador. En el modo 'http', la primera página de
+        un filtro que no contiene resultados se vuelve a cargar con Selenium. Las páginas terminadas
+        de una ejecución reanudada no se descargan.
+        Parámetros:
+        search_val (str): El valor de búsqueda.
+        driver: Una sesión del navegador a reutilizar (opcional).
+        Devuelve:
+        generator: Tuplas (filter, page, products) con la descripción del filtro (None si no se usan
+        filtros), el número de página y la lista de productos extraídos.
+        """
+        units = self.get_page_units(search_val)
+        pending_units = [unit for unit in units if not self.journal.is_completed(search_val, unit[1], unit[2])]
+        if len(pending_units) < len(units):
+            logging.info(f'{search_val}: {len(units) - len(pending_units)} paginas ya terminadas en la ejecucion reanudada')
+            METRICS.incr('units_skipped', len(units) - len(pending_units))
+            units = pending_units
+        own_driver = False
+        executor = None
+        if self.fetch_mode == 'http':
+            executor = ThreadPoolExecutor(max_workers=max(1, self.page_workers))
+            futures = {
+                executor.submit(self.get_http_page_products, unit[3], self.get_product_filter(search_val, unit[1], unit[2]), unit[2]): unit
+                for unit in units
+            }
+            pages = ((futures[future], future.result()) for future in as_completed(futures))
+        else:
+            pages = ((unit, None) for unit in units)
+
+        try:
+            for (key, filter, page, url), products in pages:
+                if products is None and (self.fetch_mode != 'http' or page == 1):
+                    if self.fetch_mode == 'http':
+                        logging.warning(f'Utilizando Selenium para {url}')
+                    if driver is not None and is_driver_retired(driver):
+                        # La identidad de la sesión entró en espera: se continúa con una sesión nueva
+                        logging.warning(f'Reemplazando la sesion {driver.session_name}: identidad en espera')
+                        METRICS.incr('browser_sessions_retired')
+                        if own_driver:
+                            driver.quit()
+                        driver = None
+                    if driver is None:
+                        driver = self.get_driver()
+                        own_driver = True
+                    products = self.get_driver_page_products(driver, url, self.get_product_filter(search_val, filter, page), page)
+                if products is None:
+                    logging.error(f'No existen mas paginas: {url}')
+                    continue
+                yield filter, page, products
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if own_driver:
+                driver.quit()
+
+
+    def url_scraping(self, search_val:str, driver=None, run_started:datetime=None):
+        """
+        Realiza el scraping de productos en Amazon para un valor de búsqueda navegando
+        directamente a las URLs de cada página y filtro. Cada página se procesa en cuanto llega.
+        Parámetros:
+        search_val (str): El valor de búsqueda para el scraping.
+        driver: Una sesión del navegador a reutilizar (opcional).
+        run_started (datetime): La fecha y hora de inicio de la ejecución (por defecto, `run_started`).
+        Devuelve:
+        int: La cantidad de productos obtenidos del scraping.
+        """
+        total_products = 0
+        for filter, page, products in self.iter_url_pages(search_val, driver):
+            total_products += self.process_page(products, page, search_val, filter, run_started)
+        return total_products
+
+
+    def get_product_df(self, product_dict:dict, filename:str, search_val:str=None, filter:str=None):
+        """
+        Genera un DataFrame a partir del diccionario de datos de los productos, calculando el
+        descuento y el tipo de producto de forma vectorizada, y lo guarda con el escritor de resultados.
+        Parámetros:
+        product_dict (dict): Un diccionario con los datos crudos de los productos.
+        filename (str): El nombre del archivo para descargar los resultados en formato CSV.
+        search_val (str): El valor de búsqueda, para la partición de los resultados (opcional).
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
         Devuelve:
         pd.DataFrame: El DataFrame generado a partir de los datos de los productos.
         """
         df = None
         try:
-            df = pd.DataFrame(product_dict)
-            if self.download_df:
-                df.to_csv(f'results/{filename}', index=False)
+            with METRICS.span('build_df'):
+                df = build_product_frame(product_dict)
+            # Durante `process` los resultados se guardan en el archivo consolidado de la ejecución
+            if self.download_df and self.product_registry is None:
+                with METRICS.span('output_write'):
+                    self.output_writer.write(df, search_val, filter, filename)
         except Exception as e:
             logging.error(f'Error al generar DataFrame {e}')
 
         return df
 
 
-    def short_link_scraping(self, df:pd.DataFrame):
-
-        bitly_driver = webdriver.Chrome()
-        bitly_driver.get('https://bitly.com/a/sign_in')
-        cookies_button = bitly_driver.find_element(By.ID, 'onetrust-accept-btn-handler')
-        cookies_button.click()
-        time.sleep(3)
-        username_input = bitly_driver.find_element(By.XPATH, '/html/body/div[4]/form[2]/div[2]/fieldset/input[1]')
-        username_input.send_keys('jora2415@gmail.com')
-        password_input = bitly_driver.find_element(By.XPATH, '/html/body/div[4]/form[2]/div[2]/fieldset/input[2]')
-        password_input.send_keys('24115035Jo$$')
-        login_button = bitly_driver.find_element(By.XPATH, '/html/body/div[4]/form[2]/div[2]/fieldset/input[4]')
-        login_button.click()
-        time.sleep(8)
-        bitly_driver.get('https://app.bitly.com/Bn81lrjhxqh/create/')
-        short_links = []
-        for i, row in df.iterrows():
-            destination_input = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[1]/div/div[2]/div[2]/div/input')
-            destination_input.send_keys(row.link)
-
-            title_input = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[1]/div/div[4]/div/input')
-            title_input.send_keys(row['name'])
-
-            alias = ''
-            split_link = row.link.split('/')
-            if split_link[3] == 'sspa':
-                alias = row.link.split('url=%')[1].split('%')[0]
-                print(alias)
-            else:
-                alias = split_link[3]
-                print(alias)
-
-            div_domain_element = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[1]/div/div[7]/div/div/div[1]/div[1]/label/div/div')
-            time.sleep(2)
-            div_domain_element.click()
-            options_element = bitly_driver.execute_script("return arguments[0].nextElementSibling;", div_domain_element)
-            option_0_element = options_element.find_element(By.ID, 'react-select-2-option-0')
-            option_0_element.click()
-            alias_input = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[1]/div/div[7]/div/div/div[1]/div[3]/div/input')
-            alias_input.send_keys(alias)
-            create_button = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[2]/div[2]/button[2]')
-            create_button.click()
-            time.sleep(5)
-            short_link_element = bitly_driver.find_element(By.XPATH, '/html/body/div[1]/div[2]/div/div[2]/div/div[4]/div[2]/div/div[1]/div[2]/div/div[1]/h2/a')
-            short_link = short_link_element.text
-            short_links.append(short_link)
-        df['short_link'] = short_links
-
-
-    def process_discount(self, df:pd.DataFrame, filename:str):
+    def process_discount(self, df:pd.DataFrame, filename:str, run_started:datetime=None, undelivered:set=None):
         """
         Procesa el DataFrame de productos y envía mensajes de descuento a través de Telegram.
+        Cada oferta se consulta en el índice de ofertas enviadas por producto y chat, de modo que
+        un producto no se reenvía en otras búsquedas, filtros o días salvo que cumpla las reglas
+        de reenvío. Si el servicio de links cortos está activo, los mensajes usan el link corto de
+        cada oferta. Si el enriquecimiento está activo, solo las ofertas por enviar se completan con
+        los datos de su página de detalle. Los mensajes se envían en lote mediante la cola de entrega.
         Parámetros:
         df (pd.DataFrame): El DataFrame con los datos de los productos.
+        filename (str): El nombre del archivo de resultados procesado.
+        run_started (datetime): La fecha y hora de inicio de la ejecución; el histórico solo usa los
+        precios anteriores (por defecto, `run_started`).
+        undelivered (set): Un conjunto al que se agregan los códigos de las ofertas con algún mensaje
+        sin entregar (opcional).
+        Devuelve:
+        list: Los resultados de entrega (DeliveryResult) de cada mensaje.
         """
-
         try:
-            discount_df = df[df['discount'] >= self.discount_rate]
-            discount_df = discount_df.drop_duplicates(subset=['code'])
+            discount_df = select_discounts(df, self.discount_rate)
         except Exception as e:
             logging.error(e)
-
-        sended_file_path = f'sended/{filename}'
-        if not os.path.exists(sended_file_path):
-            sended_df = discount_df[['code', 'name', 'sended']].copy()
-        else:
-            sended_df = pd.read_csv(sended_file_path)
-            merged_df = sended_df.merge(discount_df[['code', 'name', 'sended']], on='code', how='right', suffixes=('', '_y'), indicator=True)
-            merged_df['name'] = merged_df['name_y'].combine_first(sended_df['name'])
-            merged_df.loc[pd.isna(merged_df['sended']), 'sended'] = merged_df['sended_y']
-            merged_df = merged_df[sended_df.columns]
-            sended_df = merged_df
-
-
-
-        for i,row in discount_df.iterrows():
-            template = self.jinja_env.get_template('message.html')
-            message = template.render(
-                product_name=row['name'],
-                price=row.price,
-                discount=row.discount,
-                link=row.link
+            return []
+
+        # Descarta los descuentos sobre precios de lista inflados según el histórico
+        if self.use_price_history and self.history_filter:
+            discount_df = self.price_history.filter_genuine_discounts(
+                discount_df,
+                max_ratio=self.params.get('history_max_ratio', 0.95),
+                min_samples=self.params.get('history_min_samples', 3),
+                before=run_started or self.run_started,
             )
-            sdf_filter = sended_df['code']==row.code
-            if not sended_df[sdf_filter]['sended'].any():
-                for chat_id, chat_data in self.telegram_bot.get_chat_group_ids().items():
-                    self.telegram_bot.send_message(chat_id, message, 'html')
-                sended_df.loc[sdf_filter, 'sended'] = True
-        sended_df.to_csv(sended_file_path, index=False)
+
+        chat_group_ids = self.telegram_bot.get_chat_group_ids()
+        claims = {}
+        # Las reservas que no se confirman con `mark_sent` se liberan aunque falle algún paso
+        # (links cortos, enriquecimiento, renderizado, diario o envío)
+        try:
+            for code, price in zip(discount_df['code'], discount_df['price']):
+                chat_ids = [chat_id for chat_id in chat_group_ids if self.sent_index.claim(code, chat_id, price)]
+                if chat_ids:
+                    claims[code] = chat_ids
+
+            # Renderizado en lote con la plantilla compilada una sola vez
+            pending_df = discount_df[discount_df['code'].isin(claims)]
+            if self.short_link_service is not None and len(pending_df):
+                links, errors = self.short_link_service.shorten_many(list(zip(pending_df['code'], pending_df['link'], pending_df['name'])))
+                if errors:
+                    self.alert_short_link_errors(errors)
+                pending_df = pending_df.assign(short_link=pending_df['code'].map(links).fillna(''))
+            if self.enrichment_service is not None and len(pending_df):
+                with METRICS.span('enrichment'):
+                    pending_df, errors = self.enrichment_service.enrich_frame(pending_df)
+                if errors:
+                    logging.warning(f'{filename}: {len(errors)} productos sin datos de detalle: {"; ".join(errors[:5])}')
+            messages = []
+            records = []
+            rendered = render_messages(self.message_template, pending_df)
+            for message, code, price, discount in zip(rendered, pending_df['code'], pending_df['price'], pending_df['discount']):
+                for chat_id in claims[code]:
+                    messages.append((chat_id, message, 'html'))
+                    records.append((code, chat_id, price, int(discount)))
+
+            # Envío en lote a través de la cola de entrega. Los mensajes se registran en el diario antes
+            # de enviarse y se eliminan después de registrarse en el índice de enviados; los que fallaron
+            # por un error transitorio quedan pendientes y se reintentan con `flush_pending_messages`
+            pending_ids = self.journal.add_pending(messages, records) if messages else []
+            results = self.delivery_queue.send_batch(messages)
+            self.settle_deliveries(pending_ids, records, results, undelivered)
+        finally:
+            for code, chat_ids in claims.items():
+                for chat_id in chat_ids:
+                    # `mark_sent` ya liberó las reservas de los enviados: liberar de nuevo no tiene efecto
+                    self.sent_index.release(code, chat_id)
+        METRICS.incr('deals_found', len(discount_df))
+        logging.info(f'{filename}: {len(discount_df)} ofertas, {sum(result.ok for result in results)}/{len(results)} mensajes enviados')
+        return results
+
+
+    def get_driver(self):
+        """
+        Crea una nueva sesión del navegador con la configuración de `browser`. Con un pool de
+        identidades, la sesión usa el proxy y el User-Agent de la identidad asignada (LRU), que
+        queda en uso hasta que la sesión se cierra. El resultado de cada página se registra en la
+        identidad y, si esta entra en espera, la sesión se reemplaza (`is_driver_retired`).
+        Devuelve:
+        webdriver.Chrome: La sesión del navegador.
+        """
+        identity = None
+        if self.identity_pool is not None:
+            identity = self.identity_pool.acquire()
+        try:
+            with METRICS.span('browser_start'):
+                driver = self.browser_factory.create(identity)
+        except Exception:
+            if identity is not None:
+                self.identity_pool.release(identity)
+            raise
+        if identity is not None:
+            self.identity_pool.attach(identity, driver)
+        METRICS.incr('browser_sessions')
+        return driver
+
+
+    def get_filename(self, search_val:str, filter:str=None):
+        """
+        Construye el nombre del archivo de resultados de un valor de búsqueda y filtro.
+        Parámetros:
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        Devuelve:
+        str: El nombre del archivo.
+        """
+        today = datetime.now(tz=pytz.timezone(TZ)).strftime('%Y-%m-%d')
+        if filter is None:
+            return f'{search_val}_products_{today}.csv'
+        return f'{search_val}_{filter.replace(" ", "_")}_products_{today}.csv'
 
 
-    def scraping(self, url, search_val):
+    def process_product_dict(self, product_dict:dict, search_val:str, filter:str=None, run_started:datetime=None):
         """
-        Realiza el scraping de productos en Amazon para un valor de búsqueda dado.
+        Genera el DataFrame de los productos obtenidos, procesa los descuentos y agrega los
+        precios al histórico. En el modo incremental, el diccionario solo contiene los productos
+        que cambiaron, cuyas huellas se registran al terminar, salvo las de las ofertas cuyos mensajes
+        no se entregaron, para que se vuelvan a procesar en la próxima ejecución.
+        Parámetros:
+        product_dict (dict): Un diccionario con los datos de los productos.
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        run_started (datetime): La fecha y hora de inicio de la ejecución (por defecto, `run_started`).
+        Devuelve:
+        int: La cantidad de productos procesados.
+        """
+        filename = self.get_filename(search_val, filter)
+        if not product_dict['code']:
+            if self.use_price_history:
+                self.price_history.flush()
+            logging.info(f'{filename}: sin productos por procesar (sin cambios o ya vistos en la ejecucion)')
+            return 0
+        df = self.get_product_df(product_dict, filename, search_val, filter)
+        undelivered = set()
+        with METRICS.span('process_discount'):
+            self.process_discount(df, filename, run_started, undelivered)
+        if self.use_price_history and df is not None:
+            with METRICS.span('history_ingest'):
+                self.price_history.ingest(df, search_val, filter)
+        if self.product_registry is not None and df is not None:
+            self.product_registry.add_products(df)
+        if self.fingerprints is not None:
+            self.fingerprints.update([
+                (code, make_fingerprint(price, price_list, product_type))
+                for code, price, price_list, product_type in zip(
+                    product_dict['code'], product_dict['price'], product_dict['price_list'], product_dict['type'])
+                if code not in undelivered
+            ])
+        return len(product_dict['code'])
+
+
+    def process_page(self, products:list, page:int, search_val:str, filter:str=None, run_started:datetime=None):
+        """
+        Procesa los productos de una sola página en cuanto se extraen: genera su DataFrame, filtra
+        los descuentos, descarta los ya enviados y envía los mensajes, de modo que las alertas no
+        esperan al resto de páginas y la memoria no crece con `pagination_level`. La página se
+        registra como terminada en el diario de la ejecución y se omite si ya estaba terminada.
+        Parámetros:
+        products (list): Los datos de los productos de la página.
+        page (int): La página de resultados.
+        search_val (str): El valor de búsqueda.
+        filter (str): La descripción del filtro de Amazon aplicado (opcional).
+        run_started (datetime): La fecha y hora de inicio de la ejecución (por defecto, `run_started`).
+        Devuelve:
+        int: La cantidad de productos procesados.
+        """
+        if self.journal.is_completed(search_val, filter, page):
+            METRICS.incr('units_skipped')
+            if self.use_price_history:
+                self.price_history.flush()
+            return 0
+        if filter is not None:
+            logging.info(f'Filtro activo: {filter} - Pagina #: {page}')
+        product_dict = self.get_empty_product_dict()
+        for product in products:
+            self.add_product(product_dict, product, page)
+        METRICS.incr('pages_processed')
+        total_products = self.process_product_dict(product_dict, search_val, filter, run_started)
+        self.journal.complete_unit(search_val, filter, page, total_products)
+        return total_products
+
+
+    def http_scraping(self, url, search_val, run_started:datetime=None):
+        """
+        Realiza el scraping de productos en Amazon descargando las páginas por HTTP, sin navegador.
         Parámetros:
         url (str): La URL de búsqueda en Amazon.
         search_val (str): El valor de búsqueda para el scraping.
+        run_started (datetime): La fecha y hora de inicio de la ejecución (por defecto, `run_started`).
         Devuelve:
-        pd.DataFrame: Un DataFrame con los datos de los productos obtenidos del scraping.
+        int: La cantidad de productos obtenidos del scraping o None si la página descargada
+        no contiene resultados y se debe utilizar Selenium.
         """
-        driver = webdriver.Chrome()
-        driver.get(url)
-        today = datetime.now(tz=pytz.timezone(TZ)).strftime('%Y-%m-%d')
-        df = None
-        filename = ''
+        html = self.fetch_html(url)
+        if html is None:
+            return None
+        soup = self.parser.get_soup(html)
+        if not self.parser.has_results(soup):
+            logging.warning(f'La página de {search_val} no contiene resultados por HTTP')
+            return None
+
+        total_products = 0
         if self.use_amazon_filters:
             for key, filter in self.amazon_filters.items():
                 logging.info(f'Filtro activo: {filter} ')
                 logging.info('='*50)
-                try:
-                    filter_element = driver.find_element(By.ID, key).find_element(By.TAG_NAME, 'a')
-                    filter_element.click()
-                    time.sleep(8)
-                except NoSuchElementException as e:
-                    logging.error(e.msg)
+                filter_url = self.parser.get_filter_url(soup, key)
+                filter_html = self.fetch_html(filter_url) if filter_url else None
+                if filter_html is None:
                     logging.error('Filtro no encontrado')
                     continue
+                for page, products in self.iter_http_pages(self.parser.get_soup(filter_html), search_val, filter):
+                    total_products += self.process_page(products, page, search_val, filter, run_started)
+        else:
+            for page, products in self.iter_http_pages(soup, search_val):
+                total_products += self.process_page(products, page, search_val, run_started=run_started)
+        return total_products
 
-                product_dict = self.get_product_data(driver)
-                filename = f'{search_val}_{filter.replace(" ", "_")}_products_{today}.csv'
-                df = self.get_product_df(product_dict, filename)
-                # df = self.short_link_scraping(df)
-                self.process_discount(df, filename)
 
-        else:
-            product_dict = self.get_product_data(driver)
-            filename = f'{search_val}_products_{today}.csv'
-            df = self.get_product_df(product_dict, f'{search_val}_products_{today}.csv')
-            # df = self.short_link_scraping(df)
-            self.process_discount(df, filename)
+    def scraping(self, url, search_val, driver=None, run_started:datetime=None):
+        """
+        Realiza el scraping de productos en Amazon para un valor de búsqueda dado.
+        En el modo 'http' las páginas se descargan sin navegador y Selenium solo se utiliza
+        cuando el HTML descargado no contiene resultados de búsqueda. Con la navegación 'url'
+        las páginas y filtros se cargan directamente desde sus URLs.
+        Parámetros:
+        url (str): La URL de búsqueda en Amazon.
+        search_val (str): El valor de búsqueda para el scraping.
+        driver: Una sesión del navegador a reutilizar (opcional). Si no se proporciona, se crea
+        una nueva sesión que se cierra al terminar.
+        run_started (datetime): La fecha y hora de inicio de la ejecución (por defecto, `run_started`).
+        Devuelve:
+        int: La cantidad de productos obtenidos del scraping.
+        """
+        if self.navigation == 'url':
+            return self.url_scraping(search_val, driver, run_started)
+
+        if self.fetch_mode == 'http':
+            total_products = self.http_scraping(url, search_val, run_started)
+            if total_products is not None:
+                return total_products
+            logging.warning(f'Utilizando Selenium para {search_val}')
+
+        own_driver = driver is None
+        if own_driver:
+            driver = self.get_driver()
+        driver.get(url)
+        self.page_waiter.wait_for_results(driver)
+        total_products = 0
+        try:
+            if self.use_amazon_filters:
+                for key, filter in self.amazon_filters.items():
+                    logging.info(f'Filtro activo: {filter} ')
+                    logging.info('='*50)
+                    try:
+                        filter_element = driver.find_element(By.ID, key).find_element(By.TAG_NAME, 'a')
+                        old_result = self.page_waiter.get_first_result(driver)
+                        filter_element.click()
+                        self.page_waiter.wait_for_results_refresh(driver, old_result)
+                    except NoSuchElementException as e:
+                        logging.error(e.msg)
+                        logging.error('Filtro no encontrado')
+                        continue
+
+                    for page, products in self.iter_driver_pages(driver, search_val, filter):
+                        total_products += self.process_page(products, page, search_val, filter, run_started)
+
+            else:
+                for page, products in self.iter_driver_pages(driver, search_val):
+                    total_products += self.process_page(products, page, search_val, run_started=run_started)
+        finally:
+            if own_driver:
+                driver.quit()
 
-        driver.quit()
+        return total_products
+
+
+    def scraping_worker(self, driver, search_val:str, run_started:datetime=None):
+        """
+        Procesa un valor de búsqueda dentro de un worker del pool, reutilizando su sesión del navegador.
+        Parámetros:
+        driver: La sesión del navegador del worker.
+        search_val (str): El valor de búsqueda.
+        run_started (datetime): La fecha y hora de inicio de la ejecución de la búsqueda (por defecto,
+        `run_started`, compartido por todas las búsquedas de `process`).
+        Devuelve:
+        int: La cantidad de productos obtenidos del scraping.
+        """
+        search_url = self.get_search_url(search_val)
+        logging.info('='*50)
+        logging.info(f'Valor en busqueda: {search_val}')
+        logging.info('='*50)
+        with METRICS.span('term', term=search_val):
+            total_products = self.scraping(search_url, search_val, driver, run_started)
+        if driver is not None:
+            self.browser_factory.record_footprint(driver)
+        return total_products
 
 
     @timer
-    def process(self):
+    def process(self, fetch_mode:str=None):
         """
         Procesa los valores de búsqueda y realiza el scraping de productos en Amazon.
+        Las búsquedas se reparten entre `max_workers` workers. En el modo 'selenium' cada worker
+        mantiene una sesión de navegador que se reutiliza durante toda la ejecución.
+        Si la ejecución anterior se interrumpió y `resume_runs` está activo, se reanuda: primero se
+        envían los mensajes pendientes y luego se omiten las páginas ya terminadas. La ejecución solo
+        se marca como terminada si todas las búsquedas terminaron sin errores; una ejecución con más
+        de `resume_max_age_hours` horas o `resume_max_attempts` reanudaciones se descarta.
+        Parámetros:
+        fetch_mode (str): El modo de descarga para esta ejecución ('selenium' o 'http'). Si no se
+        proporciona, se utiliza el parámetro `fetch_mode` de la configuración.
         Devuelve:
-        pd.DataFrame: Un DataFrame con los datos de los productos obtenidos del scraping.
+        list: Las métricas de rendimiento de cada worker.
         """
-        for search_val in self.search_values:
-            search_url = self.get_search_url(search_val)
-            logging.info('='*50)
-            logging.info(f'Valor en busqueda: {search_val}')
-            logging.info('='*50)
-            self.scraping(search_url, search_val)
+        if fetch_mode is not None:
+            self.fetch_mode = fetch_mode
+        self.run_started = datetime.now()
+        logging.info(f'Modo de descarga: {self.fetch_mode}')
+        if self.journal.start_run(
+            self.resume_runs,
+            max_age_hours=self.params.get('resume_max_age_hours', 12),
+            max_resumes=self.params.get('resume_max_attempts', 3),
+        ):
+            logging.info(f'Reanudando la ejecucion interrumpida: {len(self.journal.completed)} paginas terminadas')
+        self.flush_pending_messages()
+        if self.consolidate_run:
+            self.product_registry = ProductRegistry()
+        try:
+            # En modo 'http' no se abren navegadores por adelantado, solo como respaldo
+            driver_factory = self.get_driver if self.fetch_mode == 'selenium' else None
+            pool = ScrapingPool(self.max_workers, driver_factory)
+            stats = pool.run(self.search_values, self.scraping_worker)
+            pool.log_stats()
+            self.page_waiter.log_summary()
+            self.throttle.log_summary()
+            if self.product_registry is not None:
+                self.write_run_products()
+            if any(worker_stats.errors for worker_stats in stats):
+                logging.warning('La ejecucion termino con errores; la proxima ejecucion la reanudara')
+            else:
+                self.journal.finish_run()
+        finally:
+            self.product_registry = None
+            self.output_writer.close()
+        return [worker_stats.to_dict() for worker_stats in stats]
+
+
+    def settle_deliveries(self, pending_ids:list, records:list, results:list, undelivered:set=None):
+        """
+        Registra el resultado de un lote de mensajes del diario. Los entregados se registran en el
+        índice de enviados y se eliminan del diario. Los que fallaron por un error permanente se
+        eliminan del diario; los que fallaron por un error transitorio siguen pendientes hasta
+        `pending_max_attempts` intentos. Las reservas de los mensajes no entregados se liberan.
+        Parámetros:
+        pending_ids (list): Los identificadores de los mensajes en el diario.
+        records (list): Una lista de tuplas (code, chat_id, price, discount), una por mensaje.
+        results (list): Los DeliveryResult de cada mensaje, en el mismo orden.
+        undelivered (set): Un conjunto al que se agregan los códigos de las ofertas con algún mensaje
+        que sigue pendiente (opcional).
+        """
+        self.sent_index.mark_sent([record for record, result in zip(records, results) if result.ok])
+        self.journal.remove_pending([
+            pending_id for pending_id, result in zip(pending_ids, results) if result.ok or not result.retryable
+        ])
+        dropped = set(self.journal.record_failures(
+            [pending_id for pending_id, result in zip(pending_ids, results) if result.retryable],
+            self.params.get('pending_max_attempts', 5),
+        ))
+        for record, result in zip(records, results):
+            if result.ok:
+                continue
+            self.sent_index.release(record[0], record[1])
+            if not result.retryable:
+                METRICS.incr('messages_dropped')
+                logging.warning(f'Mensaje de {record[0]} al chat {record[1]} descartado: {result.error}')
+            elif (record[0], str(record[1])) in dropped:
+                METRICS.incr('messages_dropped')
+                logging.warning(f'Mensaje de {record[0]} al chat {record[1]} descartado tras agotar los reintentos: {result.error}')
+            elif undelivered is not None:
+                undelivered.add(record[0])
+
+
+    def flush_pending_messages(self):
+        """
+        Envía los mensajes que quedaron pendientes en el diario por una ejecución interrumpida o por
+        un envío fallido. Los mensajes que ya figuran en el índice de enviados después de registrarse
+        en el diario se descartan sin reenviarse, de modo que cada mensaje se envía una sola vez; los
+        que vuelven a fallar se resuelven con `settle_deliveries`.
+        Devuelve:
+        int: La cantidad de mensajes enviados.
+        """
+        pending = self.journal.get_pending()
+        if not pending:
+            return 0
+        messages = []
+        records = []
+        pending_ids = []
+        done_ids = []
+        for message_id, code, chat_id, price, discount, message, parse_mode, created_at in pending:
+            entry = self.sent_index.sent.get((code, chat_id))
+            if entry is not None and entry[1] >= created_at:
+                done_ids.append(message_id)
+                continue
+            messages.append((chat_id, message, parse_mode))
+            records.append((code, chat_id, price, discount))
+            pending_ids.append(message_id)
+        self.journal.remove_pending(done_ids)
+        results = self.delivery_queue.send_batch(messages)
+        self.settle_deliveries(pending_ids, records, results)
+        sent = sum(result.ok for result in results)
+        METRICS.incr('messages_recovered', sent)
+        logging.info(f'Mensajes pendientes de la ejecucion interrumpida: {sent}/{len(messages)} enviados, {len(pending) - len(messages)} ya enviados')
+        return sent
+
+
+    def write_run_products(self):
+        """
+        Guarda el archivo consolidado de la ejecución con los productos procesados de todas las
+        búsquedas y filtros, cada uno con las fuentes en las que apareció.
+        Devuelve:
+        pd.DataFrame: El DataFrame consolidado.
+        """
+        registry = self.product_registry
+        df = registry.to_frame()
+        logging.info(
+            f'Registro de la ejecucion: {len(registry.sources)} productos unicos, '
+            f'{registry.duplicates} apariciones repetidas omitidas, {len(df)} procesados'
+        )
+        if self.download_df:
+            with METRICS.span('output_write'):
+                self.output_writer.write_run(df, self.run_started)
+        return df
+
+
+    def export_metrics(self):
+        """
+        Guarda las métricas de la ejecución en los archivos `metrics_json_path` (JSON) y
+        `metrics_prometheus_path` (formato de texto de Prometheus) de la configuración. Las rutas
+        relativas se resuelven desde la carpeta del proyecto y una ruta vacía desactiva el archivo.
+        """
+        paths = [self.params.get('metrics_json_path', 'logs/metrics.json'), self.params.get('metrics_prometheus_path', 'logs/metrics.prom')]
+        json_path, prometheus_path = [os.path.join(BASE_PATH, path) if path else None for path in paths]
+        METRICS.export(json_path, prometheus_path)
+        snapshot = METRICS.snapshot()
+        for counter in snapshot['counters']:
+            logging.info(f'Métrica {counter["counter"]} {counter["labels"]}: {counter["value"]}')
+        for gauge in snapshot['gauges']:
+            logging.info(f'Métrica {gauge["gauge"]} {gauge["labels"]}: {gauge["value"]}')
@@ -0,0 +1,209 @@
+import glob
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+class SentIndex():
+    """
+    Clase que mantiene el índice persistente (SQLite) de ofertas enviadas por producto (ASIN) y chat,
+    junto con una copia en memoria para consultar en O(1) si una oferta ya fue enviada.
+
+    Una oferta ya enviada se vuelve a enviar si su precio bajó al menos `realert_price_drop` por ciento
+    respecto al último envío, o si pasaron `realert_after_days` días desde el último envío.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    realert_price_drop (float): El porcentaje de baja adicional de precio para reenviar (0 lo desactiva).
+    realert_after_days (float): Los días tras los cuales se puede reenviar una oferta (0 lo desactiva).
+    sent (dict): Los envíos en memoria: (code, chat_id) -> (price, sent_at).
+    """
+
+
+    def __init__(self, db_path:str, realert_price_drop:float=0, realert_after_days:float=0):
+        self.db_path = db_path
+        self.realert_price_drop = realert_price_drop or 0
+        self.realert_after_days = realert_after_days or 0
+        self.lock = threading.Lock()
+        self.pending = set()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS sent_deals (
+                code TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                price REAL,
+                discount INTEGER,
+                sent_at TEXT NOT NULL,
+                PRIMARY KEY (code, chat_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_sent_deals_chat ON sent_deals (chat_id);
+            CREATE TABLE IF NOT EXISTS migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TEXT NOT NULL
+            );
+            '''
+        )
+        self.sent = self.load()
+
+
+    def load(self):
+        """
+        Carga en memoria todos los envíos registrados.
+        Devuelve:
+        dict: Los envíos: (code, chat_id) -> (price, sent_at).
+        """
+        rows = self.conn.execute('SELECT code, chat_id, price, sent_at FROM sent_deals').fetchall()
+        return {(code, chat_id): (price, datetime.fromisoformat(sent_at)) for code, chat_id, price, sent_at in rows}
+
+
+    def should_send(self, code:str, chat_id, price:float=None, now:datetime=None):
+        """
+        Indica si una oferta debe enviarse a un chat según los envíos previos y las reglas de reenvío.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        chat_id: El ID de chat.
+        price (float): El precio actual del producto (opcional).
+        now (datetime): La fecha y hora de referencia (por defecto, ahora).
+        Devuelve:
+        bool: True si la oferta no fue enviada o cumple alguna regla de reenvío.
+        """
+        entry = self.sent.get((code, str(chat_id)))
+        if entry is None:
+            return True
+        last_price, sent_at = entry
+        if self.realert_price_drop and price is not None and last_price:
+            if price <= last_price * (1 - self.realert_price_drop / 100):
+                return True
+        if self.realert_after_days:
+            now = now or datetime.now()
+            if now - sent_at >= timedelta(days=self.realert_after_days):
+                return True
+        return False
+
+
+    def claim(self, code:str, chat_id, price:float=None):
+        """
+        Reserva el envío de una oferta a un chat si corresponde enviarla, para que otros workers
+        de la misma ejecución no la envíen en paralelo.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        chat_id: El ID de chat.
+        price (float): El precio actual del producto (opcional).
+        Devuelve:
+        bool: True si la oferta fue reservada y debe enviarse.
+        """
+        key = (code, str(chat_id))
+        with self.lock:
+            if key in self.pending or not self.should_send(code, chat_id, price):
+                return False
+            self.pending.add(key)
+            return True
+
+
+    def release(self, code:str, chat_id):
+        """
+        Libera la reserva de una oferta que no pudo enviarse.
+        Parámetros:
+        code (str): El código del producto (ASIN).
+        chat_id: El ID de chat.
+        """
+        with self.lock:
+            self.pending.discard((code, str(chat_id)))
+
+
+    def mark_sent(self, records:list, sent_at:datetime=None):
+        """
+        Registra los envíos realizados y libera sus reservas.
+        Parámetros:
+        records (list): Una lista de tuplas (code, chat_id, price, discount).
+        sent_at (datetime): La fecha y hora del envío (por defecto, ahora).
+        """
+        if not records:
+            return
+        sent_at = sent_at or datetime.now()
+        rows = [(code, str(chat_id), price, discount, sent_at.isoformat()) for code, chat_id, price, discount in records]
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    '''
+                    INSERT INTO sent_deals (code, chat_id, price, discount, sent_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (code, chat_id) DO UPDATE SET
+                        price = excluded.price,
+                        discount = excluded.discount,
+                        sent_at = excluded.sent_at
+                    ''',
+                    rows,
+                )
+            for code, chat_id, price, discount, _ in rows:
+                self.sent[(code, chat_id)] = (price, sent_at)
+                self.pending.discard((code, chat_id))
+
+
+    def migrate_sended_csvs(self, sended_path:str, chat_ids:list):
+        """
+        Migra los archivos CSV de productos enviados (`sended/`) al índice. Como los CSV no registran
+        el chat ni el precio, cada producto enviado se registra para todos los chats indicados, sin
+        precio y con la fecha de modificación del archivo. La migración se registra como aplicada
+        solo si se importaron los envíos sin errores; sin chats o si los CSV existentes no aportaron
+        ningún envío, se vuelve a intentar en la próxima ejecución.
+        Parámetros:
+        sended_path (str): La carpeta con los CSV de productos enviados.
+        chat_ids (list): Los ID de chat a los que se enviaban las ofertas.
+        Devuelve:
+        int: La cantidad de envíos migrados.
+        """
+        applied = self.conn.execute("SELECT 1 FROM migrations WHERE name = 'sended_csv'").fetchone()
+        if applied or not os.path.isdir(sended_path):
+            return 0
+        filepaths = sorted(glob.glob(os.path.join(sended_path, '*.csv')))
+        if filepaths and not chat_ids:
+            logging.warning(f'Sin ID de chat: se pospone la migracion de {sended_path}')
+            return 0
+
+        migrated = 0
+        imported = 0
+        failed = False
+        for filepath in filepaths:
+            try:
+                sended_df = pd.read_csv(filepath)
+                sended_df = sended_df[sended_df['sended'].astype(str).str.lower() == 'true']
+            except Exception as e:
+                logging.error(f'Error al migrar {filepath}: {e}')
+                failed = True
+                continue
+            sent_at = datetime.fromtimestamp(os.path.getmtime(filepath))
+            sended_codes = sended_df['code'].dropna().unique()
+            records = [
+                (code, chat_id, None, None)
+                for code in sended_codes
+                for chat_id in chat_ids
+                if (code, str(chat_id)) not in self.sent
+            ]
+            self.mark_sent(records, sent_at)
+            migrated += len(records)
+            # Los envíos ya registrados (por un intento anterior) también cuentan como importados
+            imported += len(sended_codes)
+
+        if failed or (filepaths and not imported):
+            logging.warning(f'Migracion de {sended_path} incompleta, se reintentara en la proxima ejecucion')
+            return migrated
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO migrations (name, applied_at) VALUES (?, ?)',
+                ('sended_csv', datetime.now().isoformat()),
+            )
+        logging.info(f'Envios migrados desde {sended_path}: {migrated}')
+        return migrated
+
+
+    def close(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        self.conn.close()
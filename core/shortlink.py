@@ -0,0 +1,308 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.delivery import TokenBucket
+from core.metrics import METRICS
+
+BITLY_API_DOMAIN = 'https://api-ssl.bitly.com'
+
+
+class ShortLinkError(Exception):
+    """
+    Error al acortar un link.
+
+    Atributos:
+    status_code (int): El código de estado HTTP de la respuesta (None si no hubo respuesta).
+    retry_after (float): Los segundos de espera indicados por el servicio antes de reintentar (opcional).
+    """
+
+
+    def __init__(self, message:str, status_code:int=None, retry_after:float=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class BitlyBackend():
+    """
+    Clase que acorta links con la API v4 de Bitly (`POST /v4/bitlinks`) mediante una sesión HTTP
+    persistente compartida entre hilos.
+
+    Atributos:
+    token (str): El token de acceso de Bitly.
+    group_guid (str): El grupo de Bitly donde se crean los links.
+    api_domain (str): El dominio de la API de Bitly.
+    short_domain (str): El dominio de los links cortos.
+    timeout (float): El tiempo máximo de espera por solicitud en segundos.
+    session (requests.Session): La sesión HTTP compartida.
+    """
+
+
+    def __init__(self, token:str, group_guid:str=None, api_domain:str=None, short_domain:str='bit.ly',
+                 timeout:float=10, pool_size:int=4):
+        self.token = token
+        self.group_guid = group_guid
+        self.api_domain = (api_domain or BITLY_API_DOMAIN).rstrip('/')
+        self.short_domain = short_domain
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {token}'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+
+    def shorten(self, long_url:str, title:str=None):
+        """
+        Crea un link corto.
+        Parámetros:
+        long_url (str): El link a acortar.
+        title (str): El título del link (opcional).
+        Devuelve:
+        str: El link corto.
+        Lanza:
+        ShortLinkError: Si Bitly responde con un error o la solicitud falla.
+        """
+        data = {'domain': self.short_domain, 'long_url': long_url}
+        if self.group_guid:
+            data['group_guid'] = self.group_guid
+        if title:
+            data['title'] = title
+        try:
+            res = self.session.post(f'{self.api_domain}/v4/bitlinks', json=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ShortLinkError(str(e))
+        if res.status_code in (200, 201):
+            return res.json()['link']
+        retry_after = res.headers.get('Retry-After')
+        raise ShortLinkError(
+            f'Bitly HTTP {res.status_code}: {res.text[:200]}',
+            status_code=res.status_code,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+
+
+    def close(self):
+        self.session.close()
+
+
+class StubBackend():
+    """
+    Clase que genera links cortos locales sin acceso a la red, para pruebas y benchmarks.
+
+    Atributos:
+    domain (str): El dominio de los links generados.
+    calls (int): La cantidad de links generados.
+    """
+
+
+    def __init__(self, domain:str='https://stub.link'):
+        self.domain = domain.rstrip('/')
+        self.calls = 0
+        self.lock = threading.Lock()
+
+
+    def shorten(self, long_url:str, title:str=None):
+        with self.lock:
+            self.calls += 1
+            return f'{self.domain}/{self.calls:x}'
+
+
+    def close(self):
+        pass
+
+
+SHORT_LINK_BACKENDS = {
+    'bitly': lambda params: BitlyBackend(
+        os.getenv('BITLY_TOKEN'),
+        group_guid=os.getenv('BITLY_GROUP'),
+        api_domain=os.getenv('BITLY_DOMAIN'),
+        pool_size=params.get('short_link_workers', 4),
+    ),
+    'stub': lambda params: StubBackend(),
+}
+
+
+class ShortLinkCache():
+    """
+    Clase que mantiene el caché persistente (SQLite) de links cortos por producto (ASIN), con una
+    copia en memoria, de modo que un producto se acorta una sola vez.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    links (dict): Los links cortos en memoria: code -> short_link.
+    """
+
+
+    def __init__(self, db_path:str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS short_links (
+                code TEXT PRIMARY KEY,
+                long_url TEXT NOT NULL,
+                short_link TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            '''
+        )
+        self.conn.commit()
+        self.links = dict(self.conn.execute('SELECT code, short_link FROM short_links').fetchall())
+
+
+    def get(self, code:str):
+        return self.links.get(code)
+
+
+    def save(self, records:list):
+        """
+        Guarda links cortos nuevos.
+        Parámetros:
+        records (list): Una lista de tuplas (code, long_url, short_link).
+        """
+        if not records:
+            return
+        created_at = datetime.now().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO short_links (code, long_url, short_link, created_at) VALUES (?, ?, ?, ?)',
+                [(code, long_url, short_link, created_at) for code, long_url, short_link in records],
+            )
+            self.conn.commit()
+            for code, _, short_link in records:
+                self.links[code] = short_link
+
+
+    def close(self):
+        self.conn.close()
+
+
+class ShortLinkService():
+    """
+    Clase que acorta los links de los productos en lote: consulta primero el caché por ASIN y
+    acorta los faltantes en paralelo con el backend configurado, respetando un límite de
+    solicitudes por segundo y reintentando las respuestas 429 y los errores del servidor.
+
+    Atributos:
+    backend: El backend que acorta los links (por ejemplo, BitlyBackend o StubBackend).
+    cache (ShortLinkCache): El caché persistente de links cortos.
+    max_retries (int): La cantidad máxima de reintentos por link.
+    backoff (float): El tiempo base de espera exponencial entre reintentos en segundos.
+    """
+
+
+    def __init__(self, backend, cache:ShortLinkCache, max_workers:int=4, rate_per_second:float=5,
+                 max_retries:int=2, backoff:float=1.0):
+        self.backend = backend
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate_per_second, max(1, rate_per_second))
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='shortlink')
+
+
+    @classmethod
+    def from_params(cls, params:dict, base_path:str):
+        """
+        Construye un ShortLinkService a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('short_link_backend', 'short_link_cache_path',
+        'short_link_workers', 'short_link_rate_per_second', 'short_link_retries').
+        base_path (str): La carpeta del proyecto, para resolver la ruta relativa del caché.
+        Devuelve:
+        ShortLinkService: La instancia configurada o None si los links cortos están desactivados.
+        """
+        backend_name = params.get('short_link_backend')
+        if not backend_name:
+            return None
+        if backend_name not in SHORT_LINK_BACKENDS:
+            raise ValueError(f'Backend de links cortos desconocido: {backend_name}')
+        cache_path = os.path.join(base_path, params.get('short_link_cache_path', 'data/short_links.db'))
+        return cls(
+            SHORT_LINK_BACKENDS[backend_name](params),
+            ShortLinkCache(cache_path),
+            max_workers=params.get('short_link_workers', 4),
+            rate_per_second=params.get('short_link_rate_per_second', 5),
+            max_retries=params.get('short_link_retries', 2),
+        )
+
+
+    def shorten_one(self, long_url:str, title:str=None):
+        """
+        Acorta un link respetando el límite de tasa y reintentando cuando corresponde.
+        Parámetros:
+        long_url (str): El link a acortar.
+        title (str): El título del link (opcional).
+        Devuelve:
+        str: El link corto.
+        Lanza:
+        ShortLinkError: Si el link no se pudo acortar.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                with METRICS.span('short_link'):
+                    return self.backend.shorten(long_url, title)
+            except ShortLinkError as e:
+                retryable = e.status_code is None or e.status_code == 429 or e.status_code >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                if e.status_code == 429:
+                    METRICS.incr('short_link_429')
+                    self.bucket.pause(e.retry_after or self.backoff * 2 ** attempt)
+                else:
+                    time.sleep(self.backoff * 2 ** attempt)
+
+
+    def shorten_many(self, items:list):
+        """
+        Obtiene los links cortos de un lote de productos, acortando solo los que no están en el caché.
+        Parámetros:
+        items (list): Una lista de tuplas (code, long_url, title).
+        Devuelve:
+        tuple: Un diccionario code -> short_link con los links obtenidos y una lista con los errores.
+        """
+        links = {}
+        missing = {}
+        for code, long_url, title in items:
+            if not code or not long_url:
+                continue
+            short_link = self.cache.get(code)
+            if short_link:
+                links[code] = short_link
+            elif code not in missing:
+                missing[code] = (long_url, title)
+        METRICS.incr('short_link_cache_hits', len(links))
+
+        futures = {code: self.executor.submit(self.shorten_one, long_url, title) for code, (long_url, title) in missing.items()}
+        records = []
+        errors = []
+        for code, future in futures.items():
+            try:
+                short_link = future.result()
+            except Exception as e:
+                errors.append(f'{code}: {e}')
+                METRICS.incr('short_link_errors')
+                continue
+            links[code] = short_link
+            records.append((code, missing[code][0], short_link))
+        self.cache.save(records)
+        METRICS.incr('short_links_created', len(records))
+        return links, errors
+
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.backend.close()
+        self.cache.close()
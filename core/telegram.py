@@ -1,9 +1,10 @@
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import os
-import json
 from pprint import pformat
-from core.base import Base, BASE_PATH
+from core.base import Base, BASE_PATH, Param
+from core.config import CONFIG
 
 load_dotenv(BASE_PATH+'/.env/.env')
 
@@ -16,15 +17,20 @@ class TelegramBot(Base):
     domain (str): El dominio de la API de Telegram.
     token (str): El token de acceso del bot de Telegram.
     chat_ids (dict): Un diccionario con los ID de chat de los usuarios con los que puede interactuar el bot.
+    session (requests.Session): La sesión HTTP persistente (keep-alive) compartida por los envíos.
     """
 
+    chat_ids = Param('chat_ids')
+    alert_chat_ids = Param('alert_chat_ids')
 
-    def __init__(self):
-        super().__init__()
+
+    def __init__(self, params:dict=None):
+        super().__init__(params)
         self.domain = os.getenv('TELEGRAM_DOMAIN')
         self.token = os.getenv('TELEGRAM_TOKEN')
-        self.chat_ids = self.params.get('chat_ids')
-        self.alert_chat_ids = self.params.get('alert_chat_ids')
+        pool_size = self.params.get('telegram_workers', 8)
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
 
     def get_bot_data(self):
         endpoint = '/getMe'
@@ -65,10 +71,7 @@ class TelegramBot(Base):
         Devuelve:
         dict: Un diccionario que contiene los datos de configuración.
         """
-        config_filepath = f'{BASE_PATH}/config.json'
-        with open(config_filepath, 'r') as config_file:
-            config_data = json.load(config_file)
-        return config_data
+        return CONFIG.get()
 
 
     def get_updates(self):
@@ -106,11 +109,7 @@ class TelegramBot(Base):
         y los guarda en el archivo de configuración.
         """
         chat_ids = self.get_chat_ids_from_bot('private')
-        config_data = self.get_config_data()
-        config_filepath = f'{BASE_PATH}/config.json'
-        config_data['params'].update(chat_ids = {**chat_ids, **config_data['params']['chat_ids']})
-        with open(config_filepath, 'w') as config_file:
-            json.dump(config_data, config_file, indent=4)
+        CONFIG.update_params(chat_ids = {**chat_ids, **self.get_chat_ids()})
 
 
     def update_chat_group_ids(self):
@@ -119,30 +118,20 @@ class TelegramBot(Base):
         y los guarda en el archivo de configuración.
         """
         group_chat_ids = self.get_chat_ids_from_bot('supergroup')
-        config_data = self.get_config_data()
-        config_filepath = f'{BASE_PATH}/config.json'
-        config_data['params'].update(chat_group_ids = {**group_chat_ids, **config_data['params']['chat_group_ids']})
-        with open(config_filepath, 'w') as config_file:
-            json.dump(config_data, config_file, indent=4)
+        CONFIG.update_params(chat_group_ids = {**group_chat_ids, **self.get_chat_group_ids()})
 
 
     def get_chat_group_ids(self):
         """
-        Obtiene los ID de grupos con los que puede interactuar el bot.
+        Obtiene los ID de grupos con los que puede interactuar el bot desde la configuración en memoria.
         Devuelve:
         dict: Un diccionario que contiene los ID de chat de grupos.
         """
-        config_filepath = f'{BASE_PATH}/config.json'
-        with open(config_filepath, 'r') as config_file:
-            config_data = json.load(config_file)
-        return config_data['params'].get('chat_group_ids', {})
+        return CONFIG.get_params().get('chat_group_ids', {})
 
 
     def get_chat_ids(self):
-        config_filepath = f'{BASE_PATH}/config.json'
-        with open(config_filepath, 'r') as config_file:
-            config_data = json.load(config_file)
-        return config_data['params'].get('chat_ids', {})
+        return CONFIG.get_params().get('chat_ids', {})
 
 
     def create_chat_invite_link(self, chat_id:str):
@@ -197,14 +186,16 @@ class TelegramBot(Base):
         if parse_mode is not None:
             body.update(parse_mode=parse_mode)
         url = f'{self.domain}{self.token}{endpoint}'
-        res = requests.post(url, data=body)
-        return res.status_code, res.json()
+        res = self.session.post(url, data=body, timeout=30)
+        try:
+            data = res.json()
+        except ValueError:
+            data = {'ok': False, 'description': res.text}
+        return res.status_code, data
     
 
     def ondemand_send_message(self):
-        group_chat_ids = self.get_chat_group_ids()
-        chat_ids = self.get_chat_ids()
-        chat_ids.update(group_chat_ids)
+        chat_ids = {**self.get_chat_ids(), **self.get_chat_group_ids()}
         chat_ids_list = []
         for i, chat_id in enumerate(chat_ids.values()):
             i += 1
@@ -0,0 +1,296 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from core.metrics import METRICS
+
+# Marcas de las páginas de verificación (captcha) y de error de Amazon
+BLOCK_MARKERS = (
+    '/errors/validatecaptcha',
+    'captchacharacters',
+    'enter the characters you see below',
+    'introduce los caracteres que ves',
+    'api-services-support@amazon.com',
+    'to discuss automated access to amazon data',
+)
+
+BLOCK_STATUS_CODES = (403, 429, 503)
+
+DEFAULT_THROTTLE = {
+    'enabled': True,
+    'initial_concurrency': 2,
+    'min_concurrency': 1,
+    'max_concurrency': None,
+    'initial_delay': 1.0,
+    'min_delay': 0.2,
+    'max_delay': 30.0,
+    'increase_after': 5,
+    'decrease_factor': 0.5,
+    'latency_threshold': 8.0,
+    'block_cooldown': 300,
+}
+
+OK = 'ok'
+END = 'end'
+SLOW = 'slow'
+EMPTY = 'empty'
+ERROR = 'error'
+BLOCKED = 'blocked'
+
+
+def is_block_page(html:str):
+    """
+    Indica si el HTML corresponde a una página de verificación (captcha) o de acceso automatizado de Amazon.
+    Parámetros:
+    html (str): El HTML de la página.
+    Devuelve:
+    bool: True si la página contiene alguna marca de bloqueo.
+    """
+    if not html:
+        return False
+    html = html.lower()
+    return any(marker in html for marker in BLOCK_MARKERS)
+
+
+def classify_page(status_code:int=None, html:str=None, has_results:bool=False, page:int=1):
+    """
+    Clasifica el resultado de la descarga de una página de búsqueda.
+    Parámetros:
+    status_code (int): El código de estado HTTP (None si no hubo respuesta o se usó el navegador).
+    html (str): El HTML de la página (opcional).
+    has_results (bool): Indica si la página contiene resultados de búsqueda.
+    page (int): La página de resultados. Una grilla vacía después de la primera página se considera
+    el final de la paginación y no una falla.
+    Devuelve:
+    str: 'ok', 'end', 'empty', 'error' o 'blocked'.
+    """
+    if status_code in BLOCK_STATUS_CODES or is_block_page(html):
+        return BLOCKED
+    if has_results:
+        return OK
+    if html is None:
+        return ERROR
+    return EMPTY if page == 1 else END
+
+
+class RateController():
+    """
+    Clase que ajusta la concurrencia y la pausa entre solicitudes de un host o sesión según los
+    resultados obtenidos, al estilo AIMD: tras `increase_after` páginas correctas seguidas la
+    concurrencia aumenta en 1 y la pausa disminuye en `min_delay`; ante una falla suave (grilla
+    vacía, error o latencia mayor a `latency_threshold`) la concurrencia se multiplica por
+    `decrease_factor` y la pausa se duplica. Un bloqueo (captcha, 403, 429 o 503) además detiene
+    las solicitudes durante `block_cooldown` segundos.
+
+    Atributos:
+    key (str): El host o sesión controlado.
+    concurrency (int): La cantidad actual de solicitudes simultáneas permitidas.
+    delay (float): La pausa actual entre el inicio de dos solicitudes en segundos.
+    pages (int): La cantidad de páginas correctas.
+    blocks (int): La cantidad de bloqueos detectados.
+    soft_failures (int): La cantidad de fallas suaves.
+    """
+
+
+    def __init__(self, key:str, initial_concurrency:int=2, min_concurrency:int=1, max_concurrency:int=4,
+                 initial_delay:float=1.0, min_delay:float=0.2, max_delay:float=30.0, increase_after:int=5,
+                 decrease_factor:float=0.5, latency_threshold:float=8.0, block_cooldown:float=300, on_block=None):
+        self.key = key
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.increase_after = max(1, increase_after)
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.block_cooldown = block_cooldown
+        self.on_block = on_block
+        self.condition = threading.Condition()
+        self.active = 0
+        self.next_start = 0.0
+        self.streak = 0
+        self.pages = 0
+        self.blocks = 0
+        self.soft_failures = 0
+        self.started = time.monotonic()
+        self.publish()
+
+
+    def acquire(self):
+        """
+        Espera hasta que haya un lugar libre según la concurrencia actual y se cumpla la pausa desde
+        la solicitud anterior.
+        """
+        with self.condition:
+            while self.active >= self.concurrency:
+                self.condition.wait()
+            self.active += 1
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+
+    def release(self, outcome:str, latency:float=0.0):
+        """
+        Libera el lugar de una solicitud y ajusta la concurrencia y la pausa según su resultado.
+        Parámetros:
+        outcome (str): El resultado de `classify_page`.
+        latency (float): La duración de la solicitud en segundos.
+        """
+        if outcome == OK and self.latency_threshold and latency > self.latency_threshold:
+            outcome = SLOW
+        alert = False
+        with self.condition:
+            self.active -= 1
+            if outcome == OK:
+                self.pages += 1
+                self.streak += 1
+                if self.streak >= self.increase_after:
+                    self.streak = 0
+                    self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+                    self.delay = max(self.delay - self.min_delay, self.min_delay)
+            elif outcome in (SLOW, EMPTY, ERROR, BLOCKED):
+                self.streak = 0
+                self.concurrency = max(math.floor(self.concurrency * self.decrease_factor), self.min_concurrency)
+                self.delay = min(max(self.delay * 2, self.min_delay), self.max_delay)
+                if outcome == BLOCKED:
+                    self.blocks += 1
+                    self.next_start = max(self.next_start, time.monotonic() + self.block_cooldown)
+                    alert = True
+                else:
+                    self.soft_failures += 1
+            self.condition.notify_all()
+        METRICS.incr('throttle_outcomes', key=self.key, outcome=outcome)
+        self.publish()
+        if alert:
+            logging.warning(f'Bloqueo detectado en {self.key}: pausa de {self.block_cooldown}s, concurrencia {self.concurrency}')
+            if self.on_block is not None:
+                self.on_block(self)
+
+
+    @contextmanager
+    def slot(self):
+        """
+        Ocupa un lugar durante una solicitud. El resultado se asigna en `slot['outcome']` (por
+        defecto, 'error') y la latencia se mide automáticamente.
+        """
+        slot = {'outcome': ERROR}
+        self.acquire()
+        startt = time.monotonic()
+        try:
+            yield slot
+        finally:
+            self.release(slot['outcome'], time.monotonic() - startt)
+
+
+    def get_pages_per_minute(self):
+        minutes = (time.monotonic() - self.started) / 60
+        return round(self.pages / minutes, 2) if minutes else 0.0
+
+
+    def publish(self):
+        """
+        Registra la concurrencia, la pausa y las páginas por minuto actuales en las métricas.
+        """
+        METRICS.set_gauge('throttle_concurrency', self.concurrency, key=self.key)
+        METRICS.set_gauge('throttle_delay_seconds', round(self.delay, 3), key=self.key)
+        METRICS.set_gauge('pages_per_minute', self.get_pages_per_minute(), key=self.key)
+
+
+class Throttle():
+    """
+    Clase que mantiene un RateController por host (modo 'http') o por sesión del navegador, y envía
+    una alerta cuando un host o sesión es bloqueado (como máximo una vez por `block_cooldown`).
+
+    Atributos:
+    options (dict): Las opciones de los controladores (ver DEFAULT_THROTTLE).
+    enabled (bool): Indica si se controla la tasa; si es False, `slot` no espera ni ajusta nada.
+    controllers (dict): Los controladores por host o sesión.
+    """
+
+
+    def __init__(self, options:dict=None, max_concurrency:int=4, send_alert=None):
+        self.options = {**DEFAULT_THROTTLE, **(options or {})}
+        self.enabled = self.options['enabled']
+        if self.options['max_concurrency'] is None:
+            self.options['max_concurrency'] = max_concurrency
+        self.send_alert = send_alert
+        self.lock = threading.Lock()
+        self.controllers = {}
+        self.alerted = {}
+
+
+    def get_key(self, url:str=None, session:str=None):
+        host = urlparse(url).netloc if url else ''
+        return f'{session}@{host}' if session else host
+
+
+    def get_controller(self, key:str):
+        """
+        Obtiene el controlador de un host o sesión, creándolo si no existe.
+        Parámetros:
+        key (str): El host o sesión.
+        Devuelve:
+        RateController: El controlador.
+        """
+        with self.lock:
+            controller = self.controllers.get(key)
+            if controller is None:
+                options = {name: value for name, value in self.options.items() if name != 'enabled'}
+                controller = self.controllers[key] = RateController(key, on_block=self.alert_block, **options)
+            return controller
+
+
+    @contextmanager
+    def slot(self, url:str, session:str=None):
+        """
+        Ocupa un lugar del controlador del host (y sesión) de la URL durante una solicitud.
+        Parámetros:
+        url (str): La URL solicitada.
+        session (str): El nombre de la sesión del navegador (opcional).
+        """
+        if not self.enabled:
+            yield {'outcome': ERROR}
+            return
+        with self.get_controller(self.get_key(url, session)).slot() as slot:
+            yield slot
+
+
+    def alert_block(self, controller:RateController):
+        """
+        Envía una alerta de bloqueo, como máximo una vez por `block_cooldown` por host o sesión.
+        Parámetros:
+        controller (RateController): El controlador bloqueado.
+        """
+        now = time.monotonic()
+        with self.lock:
+            last = self.alerted.get(controller.key)
+            if last is not None and now - last < controller.block_cooldown:
+                return
+            self.alerted[controller.key] = now
+        if self.send_alert is not None:
+            self.send_alert(
+                'Amazon bloqueó una sesión de scraping.',
+                f'{controller.key}: {controller.blocks} bloqueos, pausa de {controller.block_cooldown}s, '
+                f'concurrencia reducida a {controller.concurrency} y pausa de {controller.delay:.1f}s entre páginas',
+            )
+
+
+    def log_summary(self):
+        """
+        Registra en el log las páginas por minuto logradas y los ajustes de cada host o sesión.
+        """
+        for key, controller in self.controllers.items():
+            controller.publish()
+            logging.info(
+                f'Tasa {key}: {controller.pages} paginas, {controller.get_pages_per_minute()} paginas/min, '
+                f'{controller.blocks} bloqueos, {controller.soft_failures} fallas suaves, '
+                f'concurrencia {controller.concurrency}, pausa {controller.delay:.2f}s'
+            )
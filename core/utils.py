@@ -0,0 +1,25 @@
+import os
+import shutil
+import tempfile
+
+
+def write_atomic(filepath:str, content:str):
+    """
+    Escribe un archivo de forma atómica: escribe un archivo temporal en la misma carpeta y lo renombra.
+    Parámetros:
+    filepath (str): La ruta del archivo.
+    content (str): El contenido del archivo.
+    """
+    dirpath = os.path.dirname(filepath) or '.'
+    os.makedirs(dirpath, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(content)
+        if os.path.exists(filepath):
+            # mkstemp crea el archivo con permisos 0600: se conservan los del archivo reemplazado
+            shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        os.remove(tmp_path)
+        raise
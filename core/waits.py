@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from core.metrics import METRICS
+
+RESULT_LOCATOR = (By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
+SELECTED_PAGE_LOCATOR = (By.XPATH, '//span[@class="s-pagination-item s-pagination-selected"]')
+
+DEFAULT_TIMEOUTS = {
+    'load': 15,
+    'filter': 15,
+    'pagination': 15,
+}
+
+
+class PageWaiter():
+    """
+    Clase que espera a que la página esté lista mediante condiciones explícitas de Selenium en lugar
+    de pausas fijas, y acumula por paso cuánto tardaron realmente las esperas, de modo que la memoria
+    no crece con la cantidad de esperas en los procesos de larga duración.
+
+    Atributos:
+    timeouts (dict): El tiempo máximo de espera en segundos por paso ('load', 'filter', 'pagination').
+    poll_frequency (float): El intervalo en segundos entre verificaciones de la condición.
+    steps (dict): Las esperas acumuladas por paso: la cantidad, los tiempos agotados y la duración total y máxima.
+    """
+
+
+    def __init__(self, timeouts:dict=None, poll_frequency:float=0.2):
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.poll_frequency = poll_frequency
+        self.steps = {}
+        self.lock = threading.Lock()
+
+
+    def record(self, step:str, seconds:float, ok:bool):
+        """
+        Registra la duración de una espera.
+        Parámetros:
+        step (str): El paso de la espera.
+        seconds (float): La duración de la espera en segundos.
+        ok (bool): Indica si la condición se cumplió antes del tiempo máximo.
+        """
+        with self.lock:
+            totals = self.steps.setdefault(step, {'count': 0, 'timeouts': 0, 'total': 0.0, 'max': 0.0})
+            totals['count'] += 1
+            totals['timeouts'] += 0 if ok else 1
+            totals['total'] += seconds
+            totals['max'] = max(totals['max'], seconds)
+        if not ok:
+            logging.warning(f'Tiempo de espera agotado en {step} ({seconds:.2f}s)')
+
+
+    def wait(self, driver, step:str, *conditions):
+        """
+        Espera a que se cumplan las condiciones en orden, compartiendo el tiempo máximo del paso.
+        Parámetros:
+        driver: La sesión del navegador.
+        step (str): El paso de la espera.
+        conditions: Las condiciones de `expected_conditions` a esperar.
+        Devuelve:
+        bool: True si todas las condiciones se cumplieron antes del tiempo máximo.
+        """
+        timeout = self.timeouts.get(step, DEFAULT_TIMEOUTS['load'])
+        startt = time.time()
+        ok = True
+        with METRICS.span(f'wait_{step}'):
+            try:
+                for condition in conditions:
+                    remaining = max(timeout - (time.time() - startt), self.poll_frequency)
+                    WebDriverWait(driver, remaining, poll_frequency=self.poll_frequency).until(condition)
+            except (TimeoutException, WebDriverException):
+                ok = False
+                METRICS.incr('wait_timeouts', step=step)
+        self.record(step, time.time() - startt, ok)
+        return ok
+
+
+    def get_first_result(self, driver):
+        """
+        Obtiene el primer resultado de búsqueda de la página actual.
+        Parámetros:
+        driver: La sesión del navegador.
+        Devuelve:
+        WebElement: El primer resultado o None si la página no tiene resultados.
+        """
+        results = driver.find_elements(*RESULT_LOCATOR)
+        return results[0] if results else None
+
+
+    def wait_for_results(self, driver, step:str='load'):
+        """
+        Espera a que la página contenga resultados de búsqueda.
+        Parámetros:
+        driver: La sesión del navegador.
+        step (str): El paso de la espera.
+        Devuelve:
+        bool: True si la página tiene resultados.
+        """
+        return self.wait(driver, step, EC.presence_of_element_located(RESULT_LOCATOR))
+
+
+    def wait_for_results_refresh(self, driver, old_result, step:str='filter'):
+        """
+        Espera a que la grilla de resultados anterior sea reemplazada por una nueva.
+        Parámetros:
+        driver: La sesión del navegador.
+        old_result: Un resultado de la grilla anterior (o None si no existía).
+        step (str): El paso de la espera.
+        Devuelve:
+        bool: True si la nueva grilla está disponible.
+        """
+        conditions = [EC.presence_of_element_located(RESULT_LOCATOR)]
+        if old_result is not None:
+            conditions.insert(0, EC.staleness_of(old_result))
+        return self.wait(driver, step, *conditions)
+
+
+    def wait_for_page(self, driver, page:int, old_result=None, step:str='pagination'):
+        """
+        Espera a que el elemento seleccionado de la paginación corresponda a la página indicada
+        y a que la grilla de resultados se haya actualizado.
+        Parámetros:
+        driver: La sesión del navegador.
+        page (int): El número de página esperado.
+        old_result: Un resultado de la grilla anterior (opcional).
+        step (str): El paso de la espera.
+        Devuelve:
+        bool: True si la página está lista.
+        """
+        conditions = [
+            EC.text_to_be_present_in_element(SELECTED_PAGE_LOCATOR, str(page)),
+            EC.presence_of_element_located(RESULT_LOCATOR),
+        ]
+        if old_result is not None:
+            conditions.insert(0, EC.staleness_of(old_result))
+        return self.wait(driver, step, *conditions)
+
+
+    def get_summary(self):
+        """
+        Resume las esperas registradas por paso.
+        Devuelve:
+        dict: Por cada paso, la cantidad de esperas, los tiempos agotados y la duración promedio y máxima.
+        """
+        with self.lock:
+            summary = {step: dict(totals) for step, totals in self.steps.items()}
+        for step in summary.values():
+            step['avg'] = round(step['total'] / step['count'], 3)
+            step['total'] = round(step['total'], 3)
+            step['max'] = round(step['max'], 3)
+        return summary
+
+
+    def log_summary(self):
+        """
+        Registra en el log el resumen de las esperas por paso.
+        """
+        for step, data in self.get_summary().items():
+            logging.info(
+                f'Espera {step}: {data["count"]} esperas, {data["timeouts"]} agotadas, '
+                f'promedio {data["avg"]}s, maximo {data["max"]}s'
+            )
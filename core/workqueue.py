@@ -0,0 +1,1058 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from core.identity import is_driver_retired
+from core.metrics import METRICS
+from core.registry import ProductRegistry
+
+# Los puntajes de las unidades pendientes son negativos y ordenados por id; los de las prestadas son
+# la fecha de vencimiento del préstamo (timestamp)
+PENDING_SCORE = -1e12
+
+# KEYS: queue, status, worker, attempts, units - ARGV: now, lease_until, max_attempts, worker
+# Las unidades vencidas sin intentos restantes se omiten; `expire` las marca como fallidas
+REDIS_LEASE_SCRIPT = '''
+local offset = 0
+while true do
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1], 'LIMIT', offset, 50)
+    if #ids == 0 then
+        return false
+    end
+    for _, id in ipairs(ids) do
+        if tonumber(redis.call('HGET', KEYS[4], id) or '0') < tonumber(ARGV[3]) then
+            redis.call('ZADD', KEYS[1], ARGV[2], id)
+            redis.call('HSET', KEYS[2], id, 'leased')
+            redis.call('HSET', KEYS[3], id, ARGV[4])
+            redis.call('HINCRBY', KEYS[4], id, 1)
+            return {id, redis.call('HGET', KEYS[5], id)}
+        end
+    end
+    offset = offset + #ids
+end
+'''
+
+# KEYS: queue, status, worker - ARGV: id, worker, lease_until
+REDIS_RENEW_SCRIPT = '''
+if redis.call('HGET', KEYS[2], ARGV[1]) == 'leased' and redis.call('HGET', KEYS[3], ARGV[1]) == ARGV[2] then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+'''
+
+# KEYS: queue, status, worker, results - ARGV: id, worker, payload
+REDIS_COMPLETE_SCRIPT = '''
+if redis.call('HGET', KEYS[2], ARGV[1]) == 'leased' and redis.call('HGET', KEYS[3], ARGV[1]) == ARGV[2] then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[1], 'done')
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[3])
+    return 1
+end
+return 0
+'''
+
+# KEYS: queue, status, worker, attempts, errors - ARGV: id, worker, error, max_attempts, pending_score
+REDIS_FAIL_SCRIPT = '''
+if redis.call('HGET', KEYS[2], ARGV[1]) == 'leased' and redis.call('HGET', KEYS[3], ARGV[1]) == ARGV[2] then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    redis.call('HSET', KEYS[5], ARGV[1], ARGV[3])
+    if tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0') >= tonumber(ARGV[4]) then
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HSET', KEYS[2], ARGV[1], 'failed')
+    else
+        redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+        redis.call('HSET', KEYS[2], ARGV[1], 'pending')
+    end
+end
+return 0
+'''
+
+# KEYS: queue, status, attempts, errors - ARGV: now, max_attempts
+REDIS_EXPIRE_SCRIPT = '''
+local expired = 0
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], 0, '(' .. ARGV[1])) do
+    if tonumber(redis.call('HGET', KEYS[3], id) or '0') >= tonumber(ARGV[2]) then
+        redis.call('ZREM', KEYS[1], id)
+        redis.call('HSET', KEYS[2], id, 'failed')
+        redis.call('HSET', KEYS[4], id, 'lease expired')
+        expired = expired + 1
+    end
+end
+return expired
+'''
+
+
+class WorkQueue():
+    """
+    Clase que implementa una cola de trabajo compartida sobre SQLite para repartir las unidades
+    (búsqueda, filtro y página) de una ejecución entre varios procesos worker de un mismo equipo:
+    el bloqueo de archivos de SQLite no es confiable en carpetas de red (NFS o SMB), por lo que la
+    base de datos debe estar en un disco local. Para workers en varios equipos se usa `RedisWorkQueue`,
+    que implementa la misma interfaz.
+
+    Los workers toman unidades en préstamo (lease) por `lease_seconds` segundos y lo renuevan
+    mientras las procesan. Una unidad cuyo préstamo venció vuelve a estar disponible, y solo el
+    worker que tiene el préstamo vigente puede entregar su resultado, de modo que cada unidad se
+    entrega una sola vez. Tras `max_attempts` préstamos sin resultado, la unidad se marca como fallida.
+    Solo se prestan unidades de ejecuciones vivas: el coordinador renueva su ejecución mientras la
+    procesa, y una ejecución sin renovar durante `run_timeout` segundos (por ejemplo, porque el
+    coordinador terminó de forma inesperada) se considera abandonada y se elimina.
+
+    Atributos:
+    db_path (str): La ruta de la base de datos SQLite.
+    lease_seconds (float): La duración de un préstamo en segundos.
+    max_attempts (int): La cantidad máxima de préstamos por unidad.
+    run_timeout (float): Los segundos sin renovar tras los cuales una ejecución se considera abandonada.
+    """
+
+
+    def __init__(self, db_path:str, lease_seconds:float=300, max_attempts:int=3, run_timeout:float=300):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.run_timeout = run_timeout
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        # Las transacciones se controlan explícitamente con BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS queue_runs (
+                run_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                finished_at TEXT,
+                heartbeat_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS queue_units (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                search_val TEXT NOT NULL,
+                filter_key TEXT,
+                filter TEXT,
+                page INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                products INTEGER,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_queue_units_status ON queue_units (status, id);
+            CREATE TABLE IF NOT EXISTS queue_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                unit_id INTEGER NOT NULL UNIQUE,
+                products TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            '''
+        )
+        # Colas creadas antes de controlar las ejecuciones abandonadas
+        if 'heartbeat_at' not in {row[1] for row in self.conn.execute('PRAGMA table_info(queue_runs)')}:
+            self.conn.execute('ALTER TABLE queue_runs ADD COLUMN heartbeat_at REAL')
+
+
+    @classmethod
+    def from_params(cls, params:dict, base_path:str):
+        """
+        Construye una WorkQueue a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('queue_path', 'queue_lease_seconds',
+        'queue_max_attempts', 'queue_run_timeout').
+        base_path (str): La carpeta del proyecto, para resolver la ruta relativa de la cola.
+        Devuelve:
+        WorkQueue: La instancia configurada.
+        """
+        return cls(
+            os.path.join(base_path, params.get('queue_path', 'data/work_queue.db')),
+            lease_seconds=params.get('queue_lease_seconds', 300),
+            max_attempts=params.get('queue_max_attempts', 3),
+            run_timeout=params.get('queue_run_timeout', 300),
+        )
+
+
+    def transaction(self, func):
+        """
+        Ejecuta una función dentro de una transacción exclusiva de escritura.
+        Parámetros:
+        func (function): Función que recibe la conexión y devuelve un valor.
+        Devuelve:
+        El valor devuelto por la función.
+        """
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self.conn)
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+
+    def create_run(self, units:list):
+        """
+        Crea una ejecución y agrega sus unidades a la cola. Antes se eliminan las ejecuciones abandonadas.
+        Parámetros:
+        units (list): Una lista de tuplas (search_val, filter_key, filter, page, url).
+        Devuelve:
+        str: El identificador de la ejecución.
+        """
+        self.expire_runs()
+        run_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+
+        def create(conn):
+            conn.execute('INSERT INTO queue_runs (run_id, created_at, heartbeat_at) VALUES (?, ?, ?)', (run_id, now, time.time()))
+            conn.executemany(
+                '''
+                INSERT INTO queue_units (run_id, search_val, filter_key, filter, page, url, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                [(run_id, search_val, filter_key, filter, page, url, now) for search_val, filter_key, filter, page, url in units],
+            )
+        self.transaction(create)
+        return run_id
+
+
+    def touch_run(self, run_id:str):
+        """
+        Renueva una ejecución para indicar que su coordinador sigue activo.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        """
+        self.transaction(lambda conn: conn.execute(
+            'UPDATE queue_runs SET heartbeat_at = ? WHERE run_id = ? AND finished_at IS NULL', (time.time(), run_id)))
+
+
+    def expire_runs(self):
+        """
+        Elimina las ejecuciones abandonadas: sin terminar y sin renovar durante `run_timeout` segundos.
+        Devuelve:
+        int: La cantidad de ejecuciones eliminadas.
+        """
+        def expire_runs(conn):
+            run_ids = [row[0] for row in conn.execute(
+                'SELECT run_id FROM queue_runs WHERE finished_at IS NULL AND (heartbeat_at IS NULL OR heartbeat_at < ?)',
+                (time.time() - self.run_timeout,),
+            )]
+            for run_id in run_ids:
+                conn.execute('UPDATE queue_runs SET finished_at = ? WHERE run_id = ?', (datetime.now().isoformat(), run_id))
+                conn.execute('DELETE FROM queue_units WHERE run_id = ?', (run_id,))
+                conn.execute('DELETE FROM queue_results WHERE run_id = ?', (run_id,))
+            return len(run_ids)
+        expired = self.transaction(expire_runs)
+        if expired:
+            METRICS.incr('queue_runs_expired', expired)
+            logging.warning(f'Cola: {expired} ejecuciones abandonadas eliminadas')
+        return expired
+
+
+    def lease(self, worker:str):
+        """
+        Toma en préstamo la primera unidad disponible de una ejecución viva (sin terminar y renovada
+        por su coordinador en los últimos `run_timeout` segundos).
+        Parámetros:
+        worker (str): El identificador del worker.
+        Devuelve:
+        dict: La unidad ('id', 'run_id', 'search_val', 'filter_key', 'filter', 'page', 'url') o None
+        si no hay unidades disponibles.
+        """
+        now = time.time()
+
+        def lease(conn):
+            row = conn.execute(
+                '''
+                SELECT u.id, u.run_id, u.search_val, u.filter_key, u.filter, u.page, u.url
+                FROM queue_units u JOIN queue_runs r ON r.run_id = u.run_id
+                WHERE (u.status = 'pending' OR (u.status = 'leased' AND u.lease_until < ?)) AND u.attempts < ?
+                AND r.finished_at IS NULL AND r.heartbeat_at >= ?
+                ORDER BY u.id LIMIT 1
+                ''',
+                (now, self.max_attempts, now - self.run_timeout),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                '''
+                UPDATE queue_units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+                ''',
+                (worker, now + self.lease_seconds, datetime.now().isoformat(), row[0]),
+            )
+            return dict(zip(('id', 'run_id', 'search_val', 'filter_key', 'filter', 'page', 'url'), row))
+        return self.transaction(lease)
+
+
+    def renew(self, unit:dict, worker:str):
+        """
+        Extiende el préstamo vigente de una unidad.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        Devuelve:
+        bool: True si el worker todavía tenía el préstamo.
+        """
+        def renew(conn):
+            return conn.execute(
+                "UPDATE queue_units SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, unit['id'], worker),
+            ).rowcount == 1
+        return self.transaction(renew)
+
+
+    def complete(self, unit:dict, worker:str, products:list):
+        """
+        Entrega el resultado de una unidad. El resultado solo se acepta si el worker todavía tiene
+        el préstamo de la unidad.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        products (list): Los datos de los productos extraídos de la página.
+        Devuelve:
+        bool: True si el resultado fue aceptado.
+        """
+        unit_id = unit['id']
+        payload = json.dumps(products, ensure_ascii=False)
+        now = datetime.now().isoformat()
+
+        def complete(conn):
+            accepted = conn.execute(
+                '''
+                UPDATE queue_units SET status = 'done', products = ?, lease_until = NULL, updated_at = ?
+                WHERE id = ? AND worker = ? AND status = 'leased'
+                ''',
+                (len(products), now, unit_id, worker),
+            ).rowcount == 1
+            if accepted:
+                conn.execute(
+                    '''
+                    INSERT INTO queue_results (run_id, unit_id, products, created_at)
+                    SELECT run_id, id, ?, ? FROM queue_units WHERE id = ?
+                    ''',
+                    (payload, now, unit_id),
+                )
+            return accepted
+        return self.transaction(complete)
+
+
+    def fail(self, unit:dict, worker:str, error:str):
+        """
+        Devuelve a la cola una unidad que no se pudo procesar, o la marca como fallida si agotó sus intentos.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        error (str): La descripción del error.
+        """
+        def fail(conn):
+            conn.execute(
+                '''
+                UPDATE queue_units
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker = NULL, lease_until = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND worker = ? AND status = 'leased'
+                ''',
+                (self.max_attempts, error[:500], datetime.now().isoformat(), unit['id'], worker),
+            )
+        self.transaction(fail)
+
+
+    def expire(self, run_id:str):
+        """
+        Marca como fallidas las unidades de una ejecución cuyo último préstamo venció sin intentos restantes.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        int: La cantidad de unidades marcadas como fallidas.
+        """
+        def expire(conn):
+            return conn.execute(
+                '''
+                UPDATE queue_units SET status = 'failed', error = 'lease expired', updated_at = ?
+                WHERE run_id = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?
+                ''',
+                (datetime.now().isoformat(), run_id, time.time(), self.max_attempts),
+            ).rowcount
+        return self.transaction(expire)
+
+
+    def fetch_results(self, run_id:str, limit:int=100):
+        """
+        Obtiene los resultados entregados de una ejecución que todavía no se procesaron.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        limit (int): La cantidad máxima de resultados.
+        Devuelve:
+        list: Una lista de tuplas (result_id, search_val, filter, page, products).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                '''
+                SELECT r.id, u.search_val, u.filter, u.page, r.products
+                FROM queue_results r JOIN queue_units u ON u.id = r.unit_id
+                WHERE r.run_id = ? ORDER BY r.id LIMIT ?
+                ''',
+                (run_id, limit),
+            ).fetchall()
+        return [(result_id, search_val, filter, page, json.loads(products)) for result_id, search_val, filter, page, products in rows]
+
+
+    def ack_results(self, run_id:str, result_ids:list):
+        """
+        Elimina los resultados ya procesados.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        result_ids (list): Los identificadores de los resultados.
+        """
+        if not result_ids:
+            return
+        self.transaction(lambda conn: conn.executemany('DELETE FROM queue_results WHERE id = ?', [(result_id,) for result_id in result_ids]))
+
+
+    def get_progress(self, run_id:str):
+        """
+        Obtiene la cantidad de unidades de una ejecución por estado.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        dict: La cantidad de unidades por estado ('pending', 'leased', 'done', 'failed').
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM queue_units WHERE run_id = ? GROUP BY status', (run_id,)).fetchall()
+        return {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0, **dict(rows)}
+
+
+    def finish_run(self, run_id:str):
+        """
+        Marca una ejecución como terminada y elimina sus unidades.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        """
+        def finish(conn):
+            conn.execute('UPDATE queue_runs SET finished_at = ? WHERE run_id = ?', (datetime.now().isoformat(), run_id))
+            conn.execute('DELETE FROM queue_units WHERE run_id = ?', (run_id,))
+            conn.execute('DELETE FROM queue_results WHERE run_id = ?', (run_id,))
+        self.transaction(finish)
+
+
+    def close(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        self.conn.close()
+
+
+class RedisWorkQueue():
+    """
+    Clase que implementa la cola de trabajo compartida de `WorkQueue` sobre Redis (o un servidor
+    compatible), de modo que el coordinador y los workers pueden ejecutarse en equipos distintos.
+    Las operaciones de préstamo, renovación, entrega y falla son scripts Lua atómicos en el servidor,
+    con las mismas reglas que `WorkQueue`: préstamos con vencimiento, una sola entrega por unidad,
+    `max_attempts` préstamos por unidad y solo ejecuciones vivas. Las claves de una ejecución
+    comparten el hash tag `{run_id}`, por lo que la cola también funciona en Redis Cluster.
+    Requiere `redis`.
+
+    Atributos:
+    client (redis.Redis): El cliente de Redis.
+    prefix (str): El prefijo de las claves de la cola.
+    lease_seconds (float): La duración de un préstamo en segundos.
+    max_attempts (int): La cantidad máxima de préstamos por unidad.
+    run_timeout (float): Los segundos sin renovar tras los cuales una ejecución se considera abandonada.
+    """
+
+
+    def __init__(self, url:str, lease_seconds:float=300, max_attempts:int=3, run_timeout:float=300, prefix:str='amazon_queue'):
+        if redis is None:
+            raise ImportError('La cola de trabajo en Redis requiere redis: pip install redis')
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.run_timeout = run_timeout
+        self.lease_script = self.client.register_script(REDIS_LEASE_SCRIPT)
+        self.renew_script = self.client.register_script(REDIS_RENEW_SCRIPT)
+        self.complete_script = self.client.register_script(REDIS_COMPLETE_SCRIPT)
+        self.fail_script = self.client.register_script(REDIS_FAIL_SCRIPT)
+        self.expire_script = self.client.register_script(REDIS_EXPIRE_SCRIPT)
+
+
+    @classmethod
+    def from_params(cls, params:dict):
+        """
+        Construye una RedisWorkQueue a partir de los parámetros de configuración.
+        Parámetros:
+        params (dict): Los parámetros de configuración ('queue_url', 'queue_lease_seconds',
+        'queue_max_attempts', 'queue_run_timeout').
+        Devuelve:
+        RedisWorkQueue: La instancia configurada.
+        """
+        return cls(
+            params.get('queue_url', 'redis://localhost:6379/0'),
+            lease_seconds=params.get('queue_lease_seconds', 300),
+            max_attempts=params.get('queue_max_attempts', 3),
+            run_timeout=params.get('queue_run_timeout', 300),
+        )
+
+
+    def get_keys(self, run_id:str):
+        """
+        Obtiene las claves de una ejecución.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        dict: Las claves 'queue' (unidades pendientes y prestadas), 'units', 'status', 'worker',
+        'attempts', 'errors' y 'results'.
+        """
+        return {name: f'{self.prefix}:{{{run_id}}}:{name}' for name in ('queue', 'units', 'status', 'worker', 'attempts', 'errors', 'results')}
+
+
+    def create_run(self, units:list):
+        """
+        Crea una ejecución y agrega sus unidades a la cola. Antes se eliminan las ejecuciones abandonadas.
+        Parámetros:
+        units (list): Una lista de tuplas (search_val, filter_key, filter, page, url).
+        Devuelve:
+        str: El identificador de la ejecución.
+        """
+        self.expire_runs()
+        run_id = uuid.uuid4().hex
+        keys = self.get_keys(run_id)
+        last_id = self.client.incrby(f'{self.prefix}:unit_id', max(len(units), 1))
+        unit_ids = range(last_id - len(units) + 1, last_id + 1)
+        pipeline = self.client.pipeline()
+        if units:
+            pipeline.hset(keys['units'], mapping={
+                unit_id: json.dumps({'search_val': search_val, 'filter_key': filter_key, 'filter': filter, 'page': page, 'url': url}, ensure_ascii=False)
+                for unit_id, (search_val, filter_key, filter, page, url) in zip(unit_ids, units)
+            })
+            pipeline.hset(keys['status'], mapping={unit_id: 'pending' for unit_id in unit_ids})
+            pipeline.zadd(keys['queue'], {unit_id: PENDING_SCORE + unit_id for unit_id in unit_ids})
+        pipeline.hset(f'{self.prefix}:runs', run_id, time.time())
+        pipeline.execute()
+        return run_id
+
+
+    def touch_run(self, run_id:str):
+        """
+        Renueva una ejecución para indicar que su coordinador sigue activo.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        """
+        if self.client.hexists(f'{self.prefix}:runs', run_id):
+            self.client.hset(f'{self.prefix}:runs', run_id, time.time())
+
+
+    def get_live_runs(self):
+        """
+        Obtiene las ejecuciones vivas, en orden de renovación.
+        Devuelve:
+        list: Los identificadores de las ejecuciones renovadas en los últimos `run_timeout` segundos.
+        """
+        cutoff = time.time() - self.run_timeout
+        runs = self.client.hgetall(f'{self.prefix}:runs')
+        return [run_id for run_id, heartbeat in sorted(runs.items(), key=lambda item: float(item[1])) if float(heartbeat) >= cutoff]
+
+
+    def expire_runs(self):
+        """
+        Elimina las ejecuciones abandonadas: sin renovar durante `run_timeout` segundos.
+        Devuelve:
+        int: La cantidad de ejecuciones eliminadas.
+        """
+        cutoff = time.time() - self.run_timeout
+        run_ids = [run_id for run_id, heartbeat in self.client.hgetall(f'{self.prefix}:runs').items() if float(heartbeat) < cutoff]
+        for run_id in run_ids:
+            self.finish_run(run_id)
+        if run_ids:
+            METRICS.incr('queue_runs_expired', len(run_ids))
+            logging.warning(f'Cola: {len(run_ids)} ejecuciones abandonadas eliminadas')
+        return len(run_ids)
+
+
+    def lease(self, worker:str):
+        """
+        Toma en préstamo la primera unidad disponible de una ejecución viva.
+        Parámetros:
+        worker (str): El identificador del worker.
+        Devuelve:
+        dict: La unidad ('id', 'run_id', 'search_val', 'filter_key', 'filter', 'page', 'url') o None
+        si no hay unidades disponibles.
+        """
+        for run_id in self.get_live_runs():
+            keys = self.get_keys(run_id)
+            now = time.time()
+            leased = self.lease_script(
+                keys=[keys['queue'], keys['status'], keys['worker'], keys['attempts'], keys['units']],
+                args=[now, now + self.lease_seconds, self.max_attempts, worker],
+            )
+            if leased:
+                unit_id, unit = leased
+                return {'id': int(unit_id), 'run_id': run_id, **json.loads(unit)}
+        return None
+
+
+    def renew(self, unit:dict, worker:str):
+        """
+        Extiende el préstamo vigente de una unidad.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        Devuelve:
+        bool: True si el worker todavía tenía el préstamo.
+        """
+        keys = self.get_keys(unit['run_id'])
+        return self.renew_script(
+            keys=[keys['queue'], keys['status'], keys['worker']],
+            args=[unit['id'], worker, time.time() + self.lease_seconds],
+        ) == 1
+
+
+    def complete(self, unit:dict, worker:str, products:list):
+        """
+        Entrega el resultado de una unidad. El resultado solo se acepta si el worker todavía tiene
+        el préstamo de la unidad.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        products (list): Los datos de los productos extraídos de la página.
+        Devuelve:
+        bool: True si el resultado fue aceptado.
+        """
+        keys = self.get_keys(unit['run_id'])
+        return self.complete_script(
+            keys=[keys['queue'], keys['status'], keys['worker'], keys['results']],
+            args=[unit['id'], worker, json.dumps(products, ensure_ascii=False)],
+        ) == 1
+
+
+    def fail(self, unit:dict, worker:str, error:str):
+        """
+        Devuelve a la cola una unidad que no se pudo procesar, o la marca como fallida si agotó sus intentos.
+        Parámetros:
+        unit (dict): La unidad devuelta por `lease`.
+        worker (str): El identificador del worker.
+        error (str): La descripción del error.
+        """
+        keys = self.get_keys(unit['run_id'])
+        self.fail_script(
+            keys=[keys['queue'], keys['status'], keys['worker'], keys['attempts'], keys['errors']],
+            args=[unit['id'], worker, error[:500], self.max_attempts, PENDING_SCORE + unit['id']],
+        )
+
+
+    def expire(self, run_id:str):
+        """
+        Marca como fallidas las unidades de una ejecución cuyo último préstamo venció sin intentos restantes.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        int: La cantidad de unidades marcadas como fallidas.
+        """
+        keys = self.get_keys(run_id)
+        return self.expire_script(
+            keys=[keys['queue'], keys['status'], keys['attempts'], keys['errors']],
+            args=[time.time(), self.max_attempts],
+        )
+
+
+    def fetch_results(self, run_id:str, limit:int=100):
+        """
+        Obtiene los resultados entregados de una ejecución que todavía no se procesaron.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        limit (int): La cantidad máxima de resultados.
+        Devuelve:
+        list: Una lista de tuplas (result_id, search_val, filter, page, products).
+        """
+        keys = self.get_keys(run_id)
+        unit_ids = sorted(self.client.hkeys(keys['results']), key=int)[:limit]
+        if not unit_ids:
+            return []
+        payloads = self.client.hmget(keys['results'], unit_ids)
+        units = [json.loads(unit) for unit in self.client.hmget(keys['units'], unit_ids)]
+        return [
+            (int(unit_id), unit['search_val'], unit['filter'], unit['page'], json.loads(payload))
+            for unit_id, unit, payload in zip(unit_ids, units, payloads)
+        ]
+
+
+    def ack_results(self, run_id:str, result_ids:list):
+        """
+        Elimina los resultados ya procesados.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        result_ids (list): Los identificadores de los resultados.
+        """
+        if result_ids:
+            self.client.hdel(self.get_keys(run_id)['results'], *result_ids)
+
+
+    def get_progress(self, run_id:str):
+        """
+        Obtiene la cantidad de unidades de una ejecución por estado.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        dict: La cantidad de unidades por estado ('pending', 'leased', 'done', 'failed').
+        """
+        progress = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status in self.client.hvals(self.get_keys(run_id)['status']):
+            progress[status] += 1
+        return progress
+
+
+    def finish_run(self, run_id:str):
+        """
+        Marca una ejecución como terminada y elimina sus unidades.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        """
+        pipeline = self.client.pipeline()
+        pipeline.hdel(f'{self.prefix}:runs', run_id)
+        pipeline.delete(*self.get_keys(run_id).values())
+        pipeline.execute()
+
+
+    def close(self):
+        """
+        Cierra la conexión con el servidor.
+        """
+        self.client.close()
+
+
+def get_work_queue(params:dict, base_path:str):
+    """
+    Construye la cola de trabajo compartida según la configuración.
+    Parámetros:
+    params (dict): Los parámetros de configuración ('queue_backend' y los de cada cola).
+    base_path (str): La carpeta del proyecto, para resolver la ruta relativa de la cola SQLite.
+    Devuelve:
+    WorkQueue o RedisWorkQueue: La cola configurada.
+    """
+    backend = params.get('queue_backend', 'sqlite')
+    if backend == 'redis':
+        return RedisWorkQueue.from_params(params)
+    if backend == 'sqlite':
+        return WorkQueue.from_params(params, base_path)
+    raise ValueError(f'Cola de trabajo desconocida: {backend}')
+
+
+class QueueCoordinator():
+    """
+    Clase que coordina una ejecución distribuida: agrega a la cola las unidades de todos los valores
+    de búsqueda y procesa de forma centralizada los resultados entregados por los workers
+    (registro de la ejecución, modo incremental, descuentos, ofertas ya enviadas, mensajes,
+    histórico y resultados), a medida que llegan.
+
+    Mientras procesa la ejecución, el coordinador la renueva en la cola para que los workers la
+    consideren viva. Si la ejecución no termina en `timeout` segundos, se da por terminada: las
+    unidades restantes se descartan y los resultados entregados hasta ese momento ya se procesaron.
+
+    Atributos:
+    scraper (Amazonscraping): La instancia de scraping que procesa los resultados.
+    queue (WorkQueue | RedisWorkQueue): La cola de trabajo compartida.
+    poll_interval (float): El tiempo de espera entre consultas a la cola en segundos.
+    timeout (float): La duración máxima de la ejecución en segundos (0 no la limita).
+    """
+
+
+    def __init__(self, scraper, queue, poll_interval:float=1.0, timeout:float=0):
+        self.scraper = scraper
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+
+    @contextmanager
+    def keep_run(self, run_id:str):
+        """
+        Renueva la ejecución en la cola cada `run_timeout / 3` segundos mientras se procesa, en un
+        hilo aparte para que el procesamiento de un lote largo de resultados no la deje vencer.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        """
+        done = threading.Event()
+        interval = max(self.queue.run_timeout / 3, 0.1)
+
+        def heartbeat():
+            while not done.wait(interval):
+                try:
+                    self.queue.touch_run(run_id)
+                except Exception as e:
+                    logging.warning(f'Coordinador: error al renovar la ejecucion {run_id}: {e}')
+
+        thread = threading.Thread(target=heartbeat, name=f'run-{run_id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+
+    def get_units(self):
+        """
+        Construye las unidades de trabajo de todos los valores de búsqueda.
+        Devuelve:
+        list: Una lista de tuplas (search_val, filter_key, filter, page, url).
+        """
+        return [
+            (search_val, key, filter, page, url)
+            for search_val in self.scraper.search_values
+            for key, filter, page, url in self.scraper.get_page_units(search_val)
+        ]
+
+
+    def process_results(self, run_id:str):
+        """
+        Procesa los resultados pendientes de una ejecución.
+        Parámetros:
+        run_id (str): El identificador de la ejecución.
+        Devuelve:
+        int: La cantidad de resultados procesados.
+        """
+        results = self.queue.fetch_results(run_id)
+        for result_id, search_val, filter, page, products in results:
+            products = self.scraper.filter_products(products, search_val, filter, page)
+            self.scraper.process_page(products, page, search_val, filter)
+        self.queue.ack_results(run_id, [result[0] for result in results])
+        METRICS.incr('queue_results', len(results))
+        return len(results)
+
+
+    def run(self):
+        """
+        Crea la ejecución en la cola y procesa sus resultados hasta que todas las unidades terminan
+        o se cumple `timeout`.
+        Devuelve:
+        dict: La cantidad de unidades por estado al terminar.
+        """
+        units = self.get_units()
+        run_id = self.queue.create_run(units)
+        self.scraper.run_started = datetime.now()
+        if self.scraper.consolidate_run:
+            self.scraper.product_registry = ProductRegistry()
+        logging.info(f'Coordinador: ejecucion {run_id} con {len(units)} unidades')
+        started = time.monotonic()
+        try:
+            with self.keep_run(run_id):
+                while True:
+                    if self.timeout and time.monotonic() - started >= self.timeout:
+                        progress = self.queue.get_progress(run_id)
+                        METRICS.incr('queue_runs_timed_out')
+                        logging.warning(f'Coordinador: la ejecucion {run_id} supero {self.timeout}s, se descartan las unidades restantes')
+                        break
+                    if self.process_results(run_id):
+                        continue
+                    self.queue.expire(run_id)
+                    progress = self.queue.get_progress(run_id)
+                    if not progress['pending'] and not progress['leased']:
+                        # Procesa los resultados entregados después de la última consulta
+                        if not self.process_results(run_id):
+                            break
+                        continue
+                    time.sleep(self.poll_interval)
+            logging.info(f'Coordinador: ejecucion {run_id} terminada {progress}')
+            if progress['failed']:
+                METRICS.incr('queue_units_failed', progress['failed'])
+                logging.warning(f'Coordinador: {progress["failed"]} unidades fallidas')
+            if self.scraper.product_registry is not None:
+                self.scraper.write_run_products()
+            self.queue.finish_run(run_id)
+            return progress
+        finally:
+            self.scraper.product_registry = None
+            self.scraper.output_writer.close()
+
+
+class QueueWorker():
+    """
+    Clase que toma unidades de la cola de trabajo compartida, extrae los productos de cada página con
+    `Amazonscraping` y entrega los resultados al coordinador. El worker no envía mensajes ni aplica
+    el modo incremental: todos los productos se entregan y el coordinador los procesa.
+
+    Atributos:
+    scraper (Amazonscraping): La instancia de scraping que descarga y extrae las páginas.
+    queue (WorkQueue | RedisWorkQueue): La cola de trabajo compartida.
+    threads (int): La cantidad de unidades que se procesan en paralelo en este equipo.
+    poll_interval (float): El tiempo de espera cuando no hay unidades disponibles en segundos.
+    idle_timeout (float): Los segundos sin unidades disponibles tras los cuales el worker termina (0 no termina).
+    name (str): El prefijo de los identificadores de los hilos del worker (equipo y proceso).
+    """
+
+
+    def __init__(self, scraper, queue, threads:int=1, poll_interval:float=1.0, idle_timeout:float=60):
+        self.scraper = scraper
+        self.queue = queue
+        self.threads = max(1, threads)
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.name = f'{socket.gethostname()}-{os.getpid()}'
+        self.stopped = threading.Event()
+
+
+    @contextmanager
+    def keep_lease(self, unit:dict, worker:str):
+        """
+        Renueva el préstamo de una unidad cada `lease_seconds / 3` segundos mientras se procesa.
+        Parámetros:
+        unit (dict): La unidad de trabajo.
+        worker (str): El identificador del hilo.
+        Devuelve:
+        threading.Event: Un evento que se activa si el préstamo se perdió (venció y se asignó a otro worker).
+        """
+        done = threading.Event()
+        lost = threading.Event()
+        interval = max(self.queue.lease_seconds / 3, 0.1)
+
+        def heartbeat():
+            while not done.wait(interval):
+                try:
+                    renewed = self.queue.renew(unit, worker)
+                except Exception as e:
+                    logging.warning(f'[{worker}] Error al renovar el prestamo de {unit["url"]}: {e}')
+                    continue
+                if not renewed:
+                    lost.set()
+                    METRICS.incr('queue_leases_lost')
+                    logging.warning(f'[{worker}] Prestamo perdido: {unit["url"]}')
+                    return
+                METRICS.incr('queue_lease_renewals')
+
+        thread = threading.Thread(target=heartbeat, name=f'lease-{worker}', daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            done.set()
+            thread.join()
+
+
+    def scrape_unit(self, unit:dict, driver=None, lost:threading.Event=None):
+        """
+        Descarga y extrae los productos de una unidad. En el modo 'http', la primera página de un
+        filtro que no contiene resultados se vuelve a cargar con Selenium, salvo que el préstamo
+        de la unidad ya se haya perdido.
+        Parámetros:
+        unit (dict): La unidad de trabajo.
+        driver: La sesión del navegador del hilo (opcional).
+        lost (threading.Event): El evento de préstamo perdido de `keep_lease` (opcional).
+        Devuelve:
+        tuple: Los productos extraídos y la sesión del navegador (creada si fue necesaria).
+        """
+        accept_all = lambda *args: True
+        products = None
+        if self.scraper.fetch_mode == 'http':
+            products = self.scraper.get_http_page_products(unit['url'], accept_all, unit['page'])
+        if lost is not None and lost.is_set():
+            return [], driver
+        if products is None and (self.scraper.fetch_mode != 'http' or unit['page'] == 1):
+            if driver is None:
+                driver = self.scraper.get_driver()
+            products = self.scraper.get_driver_page_products(driver, unit['url'], accept_all, unit['page'])
+        if products is None:
+            logging.info(f'No existen mas paginas: {unit["url"]}')
+        return products or [], driver
+
+
+    def work(self, worker:str):
+        """
+        Procesa unidades hasta que se detiene el worker o se cumple `idle_timeout` sin unidades.
+        Parámetros:
+        worker (str): El identificador del hilo.
+        Devuelve:
+        int: La cantidad de unidades entregadas.
+        """
+        driver = None
+        delivered = 0
+        idle_since = time.monotonic()
+        try:
+            while not self.stopped.is_set():
+                unit = self.queue.lease(worker)
+                if unit is None:
+                    if self.idle_timeout and time.monotonic() - idle_since >= self.idle_timeout:
+                        break
+                    self.stopped.wait(self.poll_interval)
+                    continue
+                try:
+                    if driver is not None and is_driver_retired(driver):
+                        # La identidad de la sesión entró en espera
+                        self.quit_driver(driver)
+                        driver = None
+                    with self.keep_lease(unit, worker) as lost, METRICS.span('queue_unit'):
+                        products, driver = self.scrape_unit(unit, driver, lost)
+                except Exception as e:
+                    logging.error(f'[{worker}] Error al procesar {unit["url"]}: {e}')
+                    METRICS.incr('queue_unit_errors')
+                    self.queue.fail(unit, worker, str(e))
+                    if driver is not None:
+                        self.quit_driver(driver)
+                        driver = None
+                    continue
+                if lost.is_set():
+                    # El préstamo no se pudo renovar y la unidad puede estar asignada a otro worker
+                    logging.warning(f'[{worker}] Resultado descartado, prestamo perdido: {unit["url"]}')
+                    METRICS.incr('queue_units_discarded')
+                elif self.queue.complete(unit, worker, products):
+                    delivered += 1
+                    METRICS.incr('queue_units_done')
+                else:
+                    # El préstamo venció y la unidad se asignó a otro worker
+                    logging.warning(f'[{worker}] Resultado descartado, prestamo vencido: {unit["url"]}')
+                    METRICS.incr('queue_units_discarded')
+                idle_since = time.monotonic()
+        finally:
+            if driver is not None:
+                self.quit_driver(driver)
+        return delivered
+
+
+    def quit_driver(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f'Error al cerrar el navegador {e}')
+
+
+    def run(self):
+        """
+        Ejecuta los hilos del worker hasta que terminan.
+        Devuelve:
+        int: La cantidad de unidades entregadas.
+        """
+        logging.info(f'Worker {self.name}: {self.threads} hilos')
+        results = [0] * self.threads
+
+        def target(i):
+            results[i] = self.work(f'{self.name}-{i+1}')
+
+        threads = [threading.Thread(target=target, args=(i,), name=f'queue-worker-{i+1}') for i in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logging.info(f'Worker {self.name}: {sum(results)} unidades entregadas')
+        self.scraper.throttle.log_summary()
+        return sum(results)
+
+
+    def stop(self):
+        """
+        Detiene el worker. Las unidades en curso terminan antes de cerrar.
+        """
+        self.stopped.set()
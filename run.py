@@ -6,8 +6,12 @@ El archivo `run.py` es el punto de entrada del programa, donde se ejecuta el pro
 """
 
 from core.scraping import Amazonscraping
+from core.scheduler import Scheduler
+from core.workqueue import QueueCoordinator, QueueWorker, get_work_queue
+import argparse
 import logging
 import os
+import signal
 from datetime import datetime
 import pandas as pd
 import urllib
@@ -30,5 +34,51 @@ logging.basicConfig(
 
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description='Scraping de descuentos en Amazon')
+    parser.add_argument('--fetch-mode', choices=['selenium', 'http'], default=None,
+                        help='Modo de descarga de las páginas (por defecto, el valor de config.json)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Ejecutar de forma continua según la programación `schedule` de config.json')
+    parser.add_argument('--coordinator', action='store_true',
+                        help='Coordinar una ejecución distribuida: agregar las páginas a la cola compartida y procesar los resultados de los workers')
+    parser.add_argument('--worker', action='store_true',
+                        help='Procesar páginas de la cola compartida y entregar los resultados al coordinador')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Descartar la ejecución interrumpida anterior en lugar de reanudarla')
+    args = parser.parse_args()
+
     amazon_scraping = Amazonscraping()
-    amazon_scraping.process()
\ No newline at end of file
+    if args.fresh:
+        amazon_scraping.resume_runs = False
+    if args.coordinator or args.worker:
+        if args.fetch_mode is not None:
+            amazon_scraping.fetch_mode = args.fetch_mode
+        params = amazon_scraping.params
+        work_queue = get_work_queue(params, BASE_PATH)
+        poll_interval = params.get('queue_poll_interval', 1.0)
+        try:
+            if args.coordinator:
+                QueueCoordinator(amazon_scraping, work_queue, poll_interval, params.get('queue_timeout', 3600)).run()
+            else:
+                worker = QueueWorker(amazon_scraping, work_queue, params.get('max_workers', 1),
+                                     poll_interval, params.get('queue_idle_timeout', 60))
+                signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+                worker.run()
+        finally:
+            work_queue.close()
+            amazon_scraping.export_metrics()
+    elif args.daemon:
+        if args.fetch_mode is not None:
+            amazon_scraping.fetch_mode = args.fetch_mode
+        scheduler = Scheduler.from_params(amazon_scraping, amazon_scraping.params)
+        signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            # `Scheduler.run` ya cerró las sesiones del navegador al salir
+            scheduler.stop()
+    else:
+        try:
+            amazon_scraping.process(fetch_mode=args.fetch_mode)
+        finally:
+            amazon_scraping.export_metrics()
\ No newline at end of file